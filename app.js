@@ -8,6 +8,8 @@ const state = {
   isDataLoading: false,
   loadError: null,
   loadPromise: null,
+  shardsPromise: null,
+  shardRows: new Map(),
 };
 
 const DATA_PATHS = [
@@ -19,6 +21,13 @@ const DATA_PATHS = [
 
 const DATA_PATH_CACHE_KEY = "journal_scout_data_path";
 
+const SHARD_MANIFEST_NAME = "search_shards_manifest.json";
+// Same headroom as search_shards.py: what scoreRow can still give a row outside the prefix and popular
+// shards on top of its IF/Q1/1区 tail (substring bonuses, and an abbreviation hit the prefix does not pin).
+const SHARD_SUBSTRING_SCORE = 250;
+const SHARD_ABBR_SCORE = 280;
+const SHARD_SCORE_SLACK = 1e-9;
+
 const TAG_TEXT = {
   casPrefix: "\u4e2d\u79d1\u9662",
   hqPrefix: "\u79d1\u534f-",
@@ -48,8 +57,6 @@ const els = {
   cmdList: document.getElementById("cmdList"),
 };
 
-const DETAIL_PAGE_REV = "20260327-ni-v1";
-
 function safe(v) {
   return v === null || v === undefined || v === "" ? "-" : String(v);
 }
@@ -281,7 +288,7 @@ function renderTagList(tags) {
   return tags.map((t) => `<span class="tag ${t.cls}">${escapeHtml(t.text)}</span>`).join("");
 }
 
-function findSuggestions(query, limit = 12) {
+function findSuggestions(query, limit = 12, rows = state.rows) {
   const q = query.trim();
   if (!q) return [];
   const qLower = q.toLowerCase();
@@ -289,7 +296,7 @@ function findSuggestions(query, limit = 12) {
   const useAbbrMatch = isAbbrQuery(qAbbr);
   const shortAbbrMode = useAbbrMatch && qAbbr.length <= 4;
 
-  return state.rows
+  return rows
     .filter((row) => {
       if (shortAbbrMode) {
         const title = String(row.title || "").toLowerCase();
@@ -386,7 +393,7 @@ function gotoDetail(id, q = "") {
   const url = new URL("./journal.html", window.location.href);
   url.searchParams.set("id", String(id));
   if (q) url.searchParams.set("q", q);
-  url.searchParams.set("v", DETAIL_PAGE_REV);
+  if (state.meta?.revision) url.searchParams.set("v", String(state.meta.revision));
   window.location.href = url.toString();
 }
 
@@ -428,16 +435,30 @@ async function renderSuggestions() {
   }
 
   if (!state.isDataReady) {
-    setPanelMessage("\u6b63\u5728\u52a0\u8f7d\u671f\u520a\u7d22\u5f15...");
+    // Answer from one prefix shard first; the full index is only fetched when the shard cannot prove the ranking.
+    const shardResult = await findShardSuggestions(q).catch(() => null);
+    if (els.searchInput.value.trim() !== q) return;
+    if (shardResult && (shardResult.exact || shardResult.rows.length)) {
+      applyShardMeta(shardResult.meta);
+      showSuggestions(q, shardResult.rows);
+      if (shardResult.exact) return;
+    } else {
+      setPanelMessage("\u6b63\u5728\u52a0\u8f7d\u671f\u520a\u7d22\u5f15...");
+    }
     try {
       await ensureDataReady();
     } catch (err) {
-      showLoadError(err);
+      if (!shardResult?.rows.length) showLoadError(err);
       return;
     }
+    if (els.searchInput.value.trim() !== q) return;
   }
 
-  state.suggestions = findSuggestions(q);
+  showSuggestions(q, findSuggestions(q));
+}
+
+function showSuggestions(q, rows) {
+  state.suggestions = rows;
   state.activeIndex = state.suggestions.length ? 0 : -1;
   openSuggestionPanel();
 
@@ -653,6 +674,7 @@ function bindEvents() {
   });
   els.searchInput.addEventListener("focus", () => {
     if (els.searchInput.value.trim()) void renderSuggestions();
+    else warmSearchShards();
   });
 
   els.searchInput.addEventListener("keydown", async (e) => {
@@ -727,7 +749,7 @@ async function tryLoadPayload(path) {
   if (!res.ok) {
     throw new Error(`HTTP ${res.status}`);
   }
-  const payload = await res.json();
+  const payload = decodeSearchIndexPayload(await res.json());
   if (!payload || !Array.isArray(payload.journals)) {
     throw new Error("invalid_payload");
   }
@@ -748,6 +770,115 @@ async function loadPayloadWithFallback() {
   throw lastError || new Error("load_failed");
 }
 
+async function loadShardManifest() {
+  if (!state.shardsPromise) {
+    state.shardsPromise = (async () => {
+      for (const path of dataPathCandidates()) {
+        const manifestPath = path.replace(/search_index\.json$/, SHARD_MANIFEST_NAME);
+        try {
+          const res = await fetch(manifestPath, { cache: "no-cache", headers: { Accept: "application/json" } });
+          if (!res.ok) continue;
+          const manifest = await res.json();
+          if (manifest?.format !== "search-shards-v1" || !manifest.shards) continue;
+          return { manifest, base: manifestPath.slice(0, -SHARD_MANIFEST_NAME.length) };
+        } catch (err) {
+          // Try the next location; without shards the full index is used.
+        }
+      }
+      return null;
+    })();
+  }
+  return state.shardsPromise;
+}
+
+async function loadShardRows(shards, rel) {
+  if (!rel) return [];
+  const url = shards.base + rel;
+  if (!state.shardRows.has(url)) {
+    const promise = fetch(url, { cache: "default", headers: { Accept: "application/json" } }).then(async (res) => {
+      if (!res.ok) throw new Error(`HTTP ${res.status}`);
+      const payload = decodeSearchIndexPayload(await res.json());
+      return Array.isArray(payload?.journals) ? payload.journals : [];
+    });
+    promise.catch(() => state.shardRows.delete(url));
+    state.shardRows.set(url, promise);
+  }
+  return state.shardRows.get(url);
+}
+
+function warmSearchShards() {
+  if (state.isDataReady) return;
+  loadShardManifest()
+    .then((shards) => shards && loadShardRows(shards, shards.manifest.popular?.file))
+    .catch(() => {});
+}
+
+function shardEntry(manifest, prefix) {
+  // [hash, count] for complete shards, [hash, count, floor] for split keys (see search_shards.py).
+  const raw = Object.prototype.hasOwnProperty.call(manifest.shards, prefix) ? manifest.shards[prefix] : null;
+  if (!Array.isArray(raw)) return null;
+  const stem = Array.from(new TextEncoder().encode(prefix), (b) => b.toString(16).padStart(2, "0")).join("");
+  return {
+    file: `${manifest.dir || ""}shard-${stem}.${raw[0]}.json`,
+    split: raw.length > 2,
+    floor: raw.length > 2 ? raw[2] : null,
+  };
+}
+
+function resolveShard(manifest, qLower) {
+  const chars = Array.from(qLower);
+  let prefix = "";
+  for (let i = 0; i < chars.length; i += 1) {
+    prefix += chars[i];
+    const entry = shardEntry(manifest, prefix);
+    if (!entry || !entry.split || i === chars.length - 1) return { prefix, entry };
+  }
+  return { prefix, entry: null };
+}
+
+function shardOutsideBound(manifest, q, prefix, entry) {
+  // Upper bound on the score of rows missing from the loaded shards; -Infinity when none can match.
+  const qAbbr = normalizeAbbrQuery(q);
+  const useAbbrMatch = isAbbrQuery(qAbbr);
+  const shortAbbrMode = useAbbrMatch && qAbbr.length <= 4;
+  const abbrOutside = useAbbrMatch && !/^[a-z0-9]+$/.test(prefix);
+  const popularFloor = manifest.popular?.floor;
+  let bound = -Infinity;
+  if ((!shortAbbrMode || abbrOutside) && popularFloor !== null && popularFloor !== undefined) {
+    bound =
+      (q.length >= 3 ? SHARD_SUBSTRING_SCORE : 0) + (abbrOutside ? SHARD_ABBR_SCORE : 0) + popularFloor + SHARD_SCORE_SLACK;
+  }
+  if (entry?.split && entry.floor !== null && entry.floor !== undefined) bound = Math.max(bound, entry.floor);
+  return bound;
+}
+
+async function findShardSuggestions(query, limit = 12) {
+  const shards = await loadShardManifest();
+  if (!shards) return null;
+  const q = query.trim();
+  const { manifest } = shards;
+  const { prefix, entry } = resolveShard(manifest, q.toLowerCase());
+  const [popularRows, prefixRows] = await Promise.all([
+    loadShardRows(shards, manifest.popular?.file),
+    entry ? loadShardRows(shards, entry.file) : [],
+  ]);
+  const byOrder = new Map();
+  for (const row of [...popularRows, ...prefixRows]) byOrder.set(row.order, row);
+  const candidates = [...byOrder.values()].sort((a, b) => a.order - b.order);
+  const rows = findSuggestions(q, limit, candidates);
+  const bound = shardOutsideBound(manifest, q, prefix, entry);
+  const exact = bound === -Infinity || (rows.length >= limit && scoreRow(rows[limit - 1], q) > bound);
+  return { rows, exact, meta: manifest.meta || {} };
+}
+
+function applyShardMeta(meta) {
+  if (state.meta) return;
+  state.meta = meta;
+  if (els.genInfo) {
+    els.genInfo.textContent = `\u6570\u636e\u66f4\u65b0\u65f6\u95f4\uff1a${meta.generated_at || "-"}`;
+  }
+}
+
 async function ensureDataReady() {
   if (state.isDataReady) return;
   if (state.loadError) throw state.loadError;
@@ -1,30 +1,85 @@
 ﻿from __future__ import annotations
 
+import argparse
 import csv
+import gzip
+import hashlib
 import json
 import re
+import pickle
 import sqlite3
+import sys
+import tempfile
 import html as html_lib
 import openpyxl
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from urllib import request as urllib_request
 from urllib.error import URLError, HTTPError
 from dataclasses import dataclass, field
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from facet_index import FacetIndexBuilder
+from related_journals import RELATED_LIMIT, RelatedJournals, _HAS_NUMPY, latest_cas_fields, pick_latest_cas_record
+from search_index_codec import encode_columns, encode_search_index
+from search_query import SuggestIndexBuilder
+from search_shards import ORDER_FIELD, SHARD_FORMAT, SHARD_ROW_BUDGET, SearchShardBuilder, shard_file_stem
+
+try:
+    import brotli
+    _HAS_BROTLI = True
+except ImportError:
+    _HAS_BROTLI = False
 
 ROOT = Path(__file__).resolve().parents[1]
 DATA_DIR = ROOT / "data"
 OUT_DIR = Path(__file__).resolve().parent / "data"
 OUT_FILE = OUT_DIR / "journals.json"
 SEARCH_INDEX_FILE = OUT_DIR / "search_index.json"
+SUGGEST_INDEX_FILE = OUT_DIR / "suggest_index.json"
+FACET_INDEX_FILE = OUT_DIR / "facet_index.json"
 HQ_STATS_FILE = OUT_DIR / "hq_field_stats.json"
 CHUNK_DIR = OUT_DIR / "journal_chunks"
 CHUNK_MANIFEST_FILE = OUT_DIR / "journal_chunks_manifest.json"
+SEARCH_SHARD_DIR = OUT_DIR / "search_shards"
+SEARCH_SHARD_MANIFEST_FILE = OUT_DIR / "search_shards_manifest.json"
+ID_REGISTRY_FILE = OUT_DIR / "journal_id_registry.json"
+FINGERPRINT_FILE = OUT_DIR / "journal_fingerprints.json"
+DELTA_FILE = OUT_DIR / "journal_delta.json"
+DELTA_PATCH_FILE = OUT_DIR / "journal_delta_patch.json"
 CHUNK_COUNT = 64
+CHUNK_HASH_LENGTH = 12
+BROTLI_QUALITY = 11
+FINGERPRINT_LENGTH = 16
+CHUNK_TARGET_BYTES = 256 * 1024
+CHUNK_STRATEGIES = ("id_mod", "bytes", "category", "single")
+CHUNK_SINGLE_TEMPLATE = "journal-{id}.json"
+CHUNK_HISTORY_TEMPLATE = "history-{id}.json"
+# Below-the-fold fields that chunk records leave to the history chunk set (with any precomputed "related").
+CHUNK_HISTORY_FIELDS = (
+    "if_history",
+    "cas_history",
+    "warning_history",
+    "ccf_records",
+    "ccft_records",
+    "hq_records",
+    "hq_fields",
+    "hq_societies",
+    "hq_levels",
+    "sources",
+)
+BUILD_CACHE_DIR = Path(__file__).resolve().parent / ".build_cache"
+# Bump for cache-format changes; parser changes are caught by the source digest in the cache key.
+BUILD_CACHE_VERSION = 2
+XUANKAN_TIER_FILE = Path(__file__).resolve().parent / "2026新锐期刊分区信息下载.xlsx"
+XUANKAN_WARNING_FILE = Path(__file__).resolve().parent / "2026年新锐分区期刊under review名单下载.xlsx"
 SHOWJCR_DATA_SUBDIR = "中科院分区表及JCR原始数据文件"
 CNKI_SCHOLAR_JSON_URL = "https://gitee.com/kailangge/cnki-journals/raw/main/cnki_journals.json"
 NATURE_INDEX_FAQ_URL = "https://www.nature.com/nature-index/faq?spm=5176.28103460.0.0.39f27551AqtfKA#journals"
 
+SEARCH_INDEX_FORMATS = ("columnar", "rows")
 SEARCH_INDEX_FIELDS = [
     "id",
     "title",
@@ -44,6 +99,8 @@ SEARCH_INDEX_FIELDS = [
     "xuankan_2026",
     "xuankan_warning",
     "ni_journal",
+    "cas_category",
+    "cas_subcategories",
     "tags",
 ]
 
@@ -55,6 +112,8 @@ LEVEL_RE = re.compile(
     flags=re.I,
 )
 ABC_LEVEL_RE = re.compile(r"([ABC])\s*类", flags=re.I)
+TITLE_STRIP_RE = re.compile(r"[^\w\u4e00-\u9fff]")
+NORMALIZE_CACHE_SIZE = 1 << 16
 
 
 def norm_key(raw: str) -> str:
@@ -105,7 +164,24 @@ def best_hq_level(levels: List[str]) -> str:
     return cleaned[0]
 
 
-@dataclass
+# History rows are stored as tuples in these column orders; to_dict expands them back to dicts.
+IF_HISTORY_KEYS = ("year", "if_value", "quartile", "rank")
+CAS_HISTORY_KEYS = ("year", "rank", "top", "oa_status", "review", "wos", "category", "subcategories")
+WARNING_HISTORY_KEYS = ("year", "value")
+CCF_RECORD_KEYS = ("year", "area", "category", "level")
+CCFT_RECORD_KEYS = ("year", "tier", "category", "cn_number", "zh_title")
+HQ_RECORD_KEYS = ("field", "society", "level", "subfield")
+
+
+def intern_text(raw) -> str:
+    return sys.intern(str(raw or "").strip())
+
+
+def year_sort_value(row: Tuple) -> int:
+    return int(str(row[0] or "0"))
+
+
+@dataclass(slots=True)
 class Journal:
     id: int
     title: str
@@ -130,122 +206,58 @@ class Journal:
     pku_core: bool = False
     cssci_type: str = ""
     ei_indexed: bool = False
-    if_history: List[Dict] = field(default_factory=list)
-    cas_history: List[Dict] = field(default_factory=list)
-    warning_history: List[Dict] = field(default_factory=list)
-    ccf_records: List[Dict] = field(default_factory=list)
-    ccft_records: List[Dict] = field(default_factory=list)
+    if_history: Tuple[Tuple, ...] = ()
+    cas_history: Tuple[Tuple, ...] = ()
+    warning_history: Tuple[Tuple[str, str], ...] = ()
+    ccf_records: Tuple[Tuple[str, str, str, str], ...] = ()
+    ccft_records: Tuple[Tuple[str, str, str, str, str], ...] = ()
     hq_catalog: bool = False
     hq_level: str = ""
-    hq_records: List[Dict[str, str]] = field(default_factory=list)
+    hq_records: Tuple[Tuple[str, str, str, str], ...] = ()
     ni_journal: bool = False
-    tags: List[str] = field(default_factory=list)
-    sources: List[str] = field(default_factory=list)
+    tags: set[str] = field(default_factory=set)
+    sources: set[str] = field(default_factory=set)
+    # Raw (issn, eissn, cn_number, title) last indexed by JournalStore and their canonical keys.
+    index_source: Tuple[str, str, str, str] = field(default=("", "", "", ""), repr=False, compare=False)
+    index_keys: Tuple[str, str, str, str] = field(default=("", "", "", ""), repr=False, compare=False)
 
     def to_dict(self) -> Dict:
-        unique_records: List[Dict[str, str]] = []
-        seen: set[Tuple[str, str, str, str]] = set()
-        for rec in self.hq_records:
-            field_name = str(rec.get("field") or "").strip()
-            society = str(rec.get("society") or "").strip()
-            level = str(rec.get("level") or "").strip()
-            subfield = str(rec.get("subfield") or "").strip()
-            key = (field_name, society, level, subfield)
-            if key in seen:
-                continue
-            seen.add(key)
-            unique_records.append(
-                {
-                    "field": field_name,
-                    "society": society,
-                    "level": level,
-                    "subfield": subfield,
-                }
-            )
-        unique_records.sort(
-            key=lambda x: (
-                level_rank(x.get("level", "")),
-                x.get("field", ""),
-                x.get("society", ""),
-                x.get("subfield", ""),
-            )
-        )
+        def dedupe_rows(rows: List[Tuple]) -> List[Tuple]:
+            return list(dict.fromkeys(rows))
 
-        hq_fields = sorted({r["field"] for r in unique_records if r.get("field")})
-        hq_societies = sorted({r["society"] for r in unique_records if r.get("society")})
-        hq_levels = sorted({r["level"] for r in unique_records if r.get("level")}, key=level_rank)
+        unique_hq = dedupe_rows(self.hq_records)
+        unique_hq.sort(key=lambda x: (level_rank(x[2]), x[0], x[1], x[3]))
+        unique_records = [dict(zip(HQ_RECORD_KEYS, rec)) for rec in unique_hq]
 
-        def dedupe_dict_list(rows: List[Dict], keys: List[str]) -> List[Dict]:
-            out: List[Dict] = []
-            seen_keys: set[Tuple] = set()
-            for row in rows:
-                cleaned = {k: row.get(k, "") for k in keys}
-                dedupe_key = tuple(cleaned.get(k, "") for k in keys)
-                if dedupe_key in seen_keys:
-                    continue
-                seen_keys.add(dedupe_key)
-                out.append(cleaned)
-            return out
-
-        if_history = dedupe_dict_list(self.if_history, ["year", "if_value", "quartile", "rank"])
-        if_history.sort(key=lambda x: int(str(x.get("year") or "0")), reverse=True)
-
-        cas_history: List[Dict] = []
-        seen_cas: set[Tuple] = set()
-        for row in self.cas_history:
-            subcategories_raw = row.get("subcategories", [])
-            subcategories_clean: List[Dict[str, str]] = []
-            seen_sub: set[Tuple[str, str]] = set()
-            for sub in (subcategories_raw if isinstance(subcategories_raw, list) else []):
-                if not isinstance(sub, dict):
-                    continue
-                sub_name = str(sub.get("name") or "").strip()
-                sub_rank = parse_rank(sub.get("rank", ""))
-                if not sub_name and not sub_rank:
-                    continue
-                sub_key = (sub_name, sub_rank)
-                if sub_key in seen_sub:
-                    continue
-                seen_sub.add(sub_key)
-                subcategories_clean.append({"name": sub_name, "rank": sub_rank})
-            subcategories_clean.sort(key=lambda x: (cas_rank_value(x.get("rank", "")), x.get("name", "")))
-
-            cleaned_row = {
-                "year": str(row.get("year", "")).strip(),
-                "rank": parse_rank(row.get("rank", "")),
-                "top": str(row.get("top", "")).strip(),
-                "oa_status": str(row.get("oa_status", "")).strip(),
-                "review": str(row.get("review", "")).strip(),
-                "wos": str(row.get("wos", "")).strip(),
-                "category": str(row.get("category", "")).strip(),
-                "subcategories": subcategories_clean,
-            }
+        hq_fields = sorted({r[0] for r in unique_hq if r[0]})
+        hq_societies = sorted({r[1] for r in unique_hq if r[1]})
+        hq_levels = sorted({r[2] for r in unique_hq if r[2]}, key=level_rank)
 
-            dedupe_key = (
-                cleaned_row["year"],
-                cleaned_row["rank"],
-                cleaned_row["top"],
-                cleaned_row["oa_status"],
-                cleaned_row["review"],
-                cleaned_row["wos"],
-                cleaned_row["category"],
-                tuple((x["name"], x["rank"]) for x in subcategories_clean),
-            )
-            if dedupe_key in seen_cas:
-                continue
-            seen_cas.add(dedupe_key)
-            cas_history.append(cleaned_row)
+        if_rows = dedupe_rows(self.if_history)
+        if_rows.sort(key=year_sort_value, reverse=True)
+        if_history = [dict(zip(IF_HISTORY_KEYS, row)) for row in if_rows]
 
-        cas_history.sort(key=lambda x: int(str(x.get("year") or "0")), reverse=True)
+        cas_rows = dedupe_rows(self.cas_history)
+        cas_rows.sort(key=year_sort_value, reverse=True)
+        cas_history = [
+            {
+                **dict(zip(CAS_HISTORY_KEYS[:-1], row[:-1])),
+                "subcategories": [{"name": name, "rank": rank} for name, rank in row[-1]],
+            }
+            for row in cas_rows
+        ]
 
-        warning_history = dedupe_dict_list(self.warning_history, ["year", "value"])
-        warning_history.sort(key=lambda x: int(str(x.get("year") or "0")), reverse=True)
+        warning_rows = dedupe_rows(self.warning_history)
+        warning_rows.sort(key=year_sort_value, reverse=True)
+        warning_history = [dict(zip(WARNING_HISTORY_KEYS, row)) for row in warning_rows]
 
-        ccf_records = dedupe_dict_list(self.ccf_records, ["year", "area", "category", "level"])
-        ccf_records.sort(key=lambda x: (int(str(x.get("year") or "0")), x.get("level", "")), reverse=True)
+        ccf_rows = dedupe_rows(self.ccf_records)
+        ccf_rows.sort(key=lambda x: (year_sort_value(x), x[3]), reverse=True)
+        ccf_records = [dict(zip(CCF_RECORD_KEYS, row)) for row in ccf_rows]
 
-        ccft_records = dedupe_dict_list(self.ccft_records, ["year", "tier", "category", "cn_number", "zh_title"])
-        ccft_records.sort(key=lambda x: (int(str(x.get("year") or "0")), x.get("tier", "")), reverse=True)
+        ccft_rows = dedupe_rows(self.ccft_records)
+        ccft_rows.sort(key=lambda x: (year_sort_value(x), x[1]), reverse=True)
+        ccft_records = [dict(zip(CCFT_RECORD_KEYS, row)) for row in ccft_rows]
 
         return {
             "id": self.id,
@@ -283,16 +295,18 @@ class Journal:
             "hq_levels": hq_levels,
             "hq_records": unique_records,
             "ni_journal": self.ni_journal,
-            "tags": sorted(set(self.tags)),
-            "sources": sorted(set(self.sources)),
+            "tags": sorted(self.tags),
+            "sources": sorted(self.sources),
         }
 
 
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def _title_key(text: str) -> str:
+    return sys.intern(TITLE_STRIP_RE.sub("", text.strip().lower()))
+
+
 def normalize_title(title: str) -> str:
-    t = str(title or "").strip().lower()
-    t = re.sub(r"\s+", " ", t)
-    t = re.sub(r"[^\w\u4e00-\u9fff]", "", t)
-    return t
+    return _title_key(str(title or ""))
 
 
 def normalize_nature_index_title(title: str) -> str:
@@ -305,25 +319,35 @@ def normalize_nature_index_title(title: str) -> str:
     return s
 
 
-def normalize_issn(raw: str) -> str:
-    if raw is None:
-        return ""
-    s = str(raw).strip().upper().replace(" ", "")
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def _issn_key(text: str) -> str:
+    s = text.strip().upper().replace(" ", "")
     m = ISSN_RE.search(s)
     if not m:
         return ""
-    return f"{m.group(1)}-{m.group(2).upper()}"
+    return sys.intern(f"{m.group(1)}-{m.group(2).upper()}")
 
 
-def normalize_cn(raw: str) -> str:
+def normalize_issn(raw: str) -> str:
     if raw is None:
         return ""
-    s = str(raw).strip().upper().replace(" ", "")
+    return _issn_key(str(raw))
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def _cn_key(text: str) -> str:
+    s = text.strip().upper().replace(" ", "")
     s = s.removeprefix("CN")
     m = CN_RE.search(s)
     if not m:
         return ""
-    return f"{m.group(1)}-{m.group(2)}/{m.group(3).upper()}"
+    return sys.intern(f"{m.group(1)}-{m.group(2)}/{m.group(3).upper()}")
+
+
+def normalize_cn(raw: str) -> str:
+    if raw is None:
+        return ""
+    return _cn_key(str(raw))
 
 
 def parse_rank(raw) -> str:
@@ -405,67 +429,406 @@ class JournalStore:
         return j
 
     def touch_index(self, j: Journal) -> None:
+        index_source = (j.issn, j.eissn, j.cn_number, j.title)
+        if index_source != j.index_source:
+            j.index_source = index_source
+            j.index_keys = (
+                normalize_issn(j.issn),
+                normalize_issn(j.eissn),
+                normalize_cn(j.cn_number),
+                normalize_title(j.title),
+            )
+        issn_key, eissn_key, cn_key, t_key = j.index_keys
+        # Mappings are re-asserted on every touch: the last touched journal owns a shared key.
         if j.issn:
-            self.by_issn[normalize_issn(j.issn)] = j.id
+            self.by_issn[issn_key] = j.id
         if j.eissn:
-            self.by_eissn[normalize_issn(j.eissn)] = j.id
+            self.by_eissn[eissn_key] = j.id
         if j.cn_number:
-            self.by_cn[normalize_cn(j.cn_number)] = j.id
-        t_key = normalize_title(j.title)
+            self.by_cn[cn_key] = j.id
         if t_key:
             self.by_title[t_key] = j.id
 
     def finalize(self) -> List[Dict]:
-        rows = []
-        for j in self.items.values():
-            if j.hq_records:
-                j.hq_catalog = True
-                if not j.hq_level:
-                    levels = [r.get("level", "") for r in j.hq_records]
-                    j.hq_level = best_hq_level(levels)
-            if j.jcr_quartile:
-                j.tags.append(j.jcr_quartile)
-            if j.cas_2025:
-                j.tags.append(j.cas_2025)
-            if j.cscd_type:
-                j.tags.append(f"CSCD-{j.cscd_type}")
-            if j.pku_core:
-                j.tags.append("北大核心")
-            if j.cssci_type:
-                j.tags.append("CSSCI" if j.cssci_type == "来源版" else "CSSCI(扩展)")
-            if j.ei_indexed:
-                j.tags.append("EI")
-            if j.hq_catalog:
-                j.tags.append("高质量目录")
-            if j.hq_level:
-                j.tags.append(f"HQ-{j.hq_level}")
-            if j.ni_journal:
-                j.tags.append("NI期刊")
-            if j.is_top is True:
-                j.tags.append("中科院Top")
-            if j.xuankan_2026:
-                j.tags.append(f"新锐{j.xuankan_2026}")
-            if j.xuankan_warning:
-                j.tags.append("新锐预警")
-            if j.warning_latest:
-                j.tags.append("期刊预警")
-            if j.ccf_records:
-                ccf_levels = sorted({str(x.get("level") or "").strip() for x in j.ccf_records if str(x.get("level") or "").strip()})
-                if ccf_levels:
-                    j.tags.append(f"CCF-{ccf_levels[0]}")
-            if j.ccft_records:
-                ccft_tiers = sorted({str(x.get("tier") or "").strip() for x in j.ccft_records if str(x.get("tier") or "").strip()}, key=level_rank)
-                if ccft_tiers:
-                    j.tags.append(f"CCFT-{ccft_tiers[0]}")
-            rows.append(j.to_dict())
-        rows.sort(
-            key=lambda x: (
-                0 if x["if_2023"] is not None else 1,
-                -(x["if_2023"] or 0),
-                x["title"],
+        return list(self.iter_finalized())
+
+    def iter_finalized(self) -> Iterator[Dict]:
+        # Only the journals are sorted up front; each row dict is built as it is consumed.
+        for j in sorted(self.items.values(), key=journal_sort_key):
+            yield finalize_journal(j)
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> "JournalStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class SqliteJournalItems:
+    # Read-only mapping view over SqliteJournalStore, standing in for JournalStore.items.
+    def __init__(self, store: "SqliteJournalStore") -> None:
+        self.store = store
+
+    def __len__(self) -> int:
+        return self.store.seq - 1
+
+    def __contains__(self, jid: object) -> bool:
+        return isinstance(jid, int) and 1 <= jid < self.store.seq
+
+    def __getitem__(self, jid: int) -> Journal:
+        j = self.get(jid)
+        if j is None:
+            raise KeyError(jid)
+        return j
+
+    def get(self, jid: int, default: Optional[Journal] = None) -> Optional[Journal]:
+        if jid not in self:
+            return default
+        return self.store.load(jid)
+
+    def values(self) -> Iterator[Journal]:
+        for jid in range(1, self.store.seq):
+            yield self.store.load(jid, remember=False)
+
+
+class SqliteJournalStore:
+    # Same get_or_create/touch_index/finalize contract as JournalStore, staged in a temporary
+    # SQLite file so memory stays bounded by hot_size instead of the catalog size.
+    # Journals are written back on touch_index, which every loader calls after mutating one.
+    KEY_ISSN, KEY_EISSN, KEY_CN, KEY_TITLE = range(4)
+
+    def __init__(self, db_path: Optional[Path] = None, hot_size: int = 2048) -> None:
+        self._tmp_dir = None
+        if db_path is None:
+            self._tmp_dir = tempfile.TemporaryDirectory(prefix="journal_store_")
+            db_path = Path(self._tmp_dir.name) / "journals.db"
+        self.conn = sqlite3.connect(str(db_path))
+        self.conn.executescript(
+            """
+            PRAGMA journal_mode = OFF;
+            PRAGMA synchronous = OFF;
+            PRAGMA cache_size = -65536;
+            CREATE TABLE IF NOT EXISTS journals (
+                id INTEGER PRIMARY KEY,
+                if_2023 REAL,
+                title TEXT NOT NULL,
+                record BLOB NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS journal_keys (
+                kind INTEGER NOT NULL,
+                key TEXT NOT NULL,
+                id INTEGER NOT NULL,
+                PRIMARY KEY (kind, key)
+            ) WITHOUT ROWID;
+            """
+        )
+        self.items = SqliteJournalItems(self)
+        self.hot_size = hot_size
+        self._hot: OrderedDict[int, Journal] = OrderedDict()
+        self._dirty: set[int] = set()
+        self.seq = 1
+
+    def close(self) -> None:
+        self.conn.close()
+        if self._tmp_dir is not None:
+            self._tmp_dir.cleanup()
+            self._tmp_dir = None
+
+    def __enter__(self) -> "SqliteJournalStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _lookup(self, kind: int, key: str) -> Optional[int]:
+        row = self.conn.execute("SELECT id FROM journal_keys WHERE kind = ? AND key = ?", (kind, key)).fetchone()
+        return int(row[0]) if row else None
+
+    def _remember(self, j: Journal, dirty: bool) -> None:
+        self._hot[j.id] = j
+        self._hot.move_to_end(j.id)
+        if dirty:
+            self._dirty.add(j.id)
+        while len(self._hot) > self.hot_size:
+            jid, old = self._hot.popitem(last=False)
+            if jid in self._dirty:
+                self._write(old)
+
+    def _write(self, j: Journal) -> None:
+        self.conn.execute(
+            "INSERT OR REPLACE INTO journals (id, if_2023, title, record) VALUES (?, ?, ?, ?)",
+            (j.id, j.if_2023, j.title, pickle.dumps(j, protocol=pickle.HIGHEST_PROTOCOL)),
+        )
+        self._dirty.discard(j.id)
+
+    def flush(self) -> None:
+        for jid in list(self._dirty):
+            self._write(self._hot[jid])
+        self.conn.commit()
+
+    def load(self, jid: int, remember: bool = True) -> Journal:
+        j = self._hot.get(jid)
+        if j is not None:
+            return j
+        row = self.conn.execute("SELECT record FROM journals WHERE id = ?", (jid,)).fetchone()
+        if row is None:
+            raise KeyError(jid)
+        j = pickle.loads(row[0])
+        if remember:
+            self._remember(j, dirty=False)
+        return j
+
+    def _create(self, title: str) -> Journal:
+        jid = self.seq
+        self.seq += 1
+        j = Journal(id=jid, title=(str(title or "").strip() or f"Unknown-{jid}"))
+        self._remember(j, dirty=True)
+        return j
+
+    def get_or_create(
+        self,
+        title: str = "",
+        issn: str = "",
+        eissn: str = "",
+        cn_number: str = "",
+    ) -> Journal:
+        issn_key = normalize_issn(issn)
+        eissn_key = normalize_issn(eissn)
+        cn_key = normalize_cn(cn_number)
+
+        for idx_key, kind in (
+            (issn_key, self.KEY_ISSN),
+            (eissn_key, self.KEY_EISSN),
+            (cn_key, self.KEY_CN),
+        ):
+            if idx_key:
+                jid = self._lookup(kind, idx_key)
+                if jid is not None:
+                    return self.load(jid)
+
+        # Same rule as JournalStore: an unmatched CN never falls back to a title merge.
+        if cn_key:
+            return self._create(title)
+
+        t_key = normalize_title(title)
+        if t_key:
+            jid = self._lookup(self.KEY_TITLE, t_key)
+            if jid is not None:
+                return self.load(jid)
+        return self._create(title)
+
+    def touch_index(self, j: Journal) -> None:
+        index_source = (j.issn, j.eissn, j.cn_number, j.title)
+        if index_source != j.index_source:
+            j.index_source = index_source
+            j.index_keys = (
+                normalize_issn(j.issn),
+                normalize_issn(j.eissn),
+                normalize_cn(j.cn_number),
+                normalize_title(j.title),
             )
+        issn_key, eissn_key, cn_key, t_key = j.index_keys
+        rows = []
+        if j.issn:
+            rows.append((self.KEY_ISSN, issn_key, j.id))
+        if j.eissn:
+            rows.append((self.KEY_EISSN, eissn_key, j.id))
+        if j.cn_number:
+            rows.append((self.KEY_CN, cn_key, j.id))
+        if t_key:
+            rows.append((self.KEY_TITLE, t_key, j.id))
+        self.conn.executemany("INSERT OR REPLACE INTO journal_keys (kind, key, id) VALUES (?, ?, ?)", rows)
+        self._remember(j, dirty=True)
+
+    def iter_finalized(self) -> Iterator[Dict]:
+        self.flush()
+        self._hot.clear()
+        cur = self.conn.execute(
+            "SELECT record FROM journals ORDER BY if_2023 IS NULL, -COALESCE(if_2023, 0), title, id"
         )
-        return rows
+        for (record,) in cur:
+            yield finalize_journal(pickle.loads(record))
+
+    def finalize(self) -> List[Dict]:
+        return list(self.iter_finalized())
+
+
+def growable(rows):
+    # History rows are appended to a list while parsing and frozen back to a tuple by finalize_journal.
+    return rows if type(rows) is list else list(rows)
+
+
+def freeze_histories(j: Journal) -> None:
+    j.if_history = tuple(j.if_history)
+    j.cas_history = tuple(j.cas_history)
+    j.warning_history = tuple(j.warning_history)
+    j.ccf_records = tuple(j.ccf_records)
+    j.ccft_records = tuple(j.ccft_records)
+    j.hq_records = tuple(j.hq_records)
+
+
+def finalize_journal(j: Journal) -> Dict:
+    freeze_histories(j)
+    if j.hq_records:
+        j.hq_catalog = True
+        if not j.hq_level:
+            levels = [r[2] for r in j.hq_records]
+            j.hq_level = best_hq_level(levels)
+    if j.jcr_quartile:
+        j.tags.add(j.jcr_quartile)
+    if j.cas_2025:
+        j.tags.add(j.cas_2025)
+    if j.cscd_type:
+        j.tags.add(f"CSCD-{j.cscd_type}")
+    if j.pku_core:
+        j.tags.add("北大核心")
+    if j.cssci_type:
+        j.tags.add("CSSCI" if j.cssci_type == "来源版" else "CSSCI(扩展)")
+    if j.ei_indexed:
+        j.tags.add("EI")
+    if j.hq_catalog:
+        j.tags.add("高质量目录")
+    if j.hq_level:
+        j.tags.add(f"HQ-{j.hq_level}")
+    if j.ni_journal:
+        j.tags.add("NI期刊")
+    if j.is_top is True:
+        j.tags.add("中科院Top")
+    if j.xuankan_2026:
+        j.tags.add(f"新锐{j.xuankan_2026}")
+    if j.xuankan_warning:
+        j.tags.add("新锐预警")
+    if j.warning_latest:
+        j.tags.add("期刊预警")
+    if j.ccf_records:
+        ccf_levels = sorted({x[3] for x in j.ccf_records if x[3]})
+        if ccf_levels:
+            j.tags.add(f"CCF-{ccf_levels[0]}")
+    if j.ccft_records:
+        ccft_tiers = sorted({x[1] for x in j.ccft_records if x[1]}, key=level_rank)
+        if ccft_tiers:
+            j.tags.add(f"CCFT-{ccft_tiers[0]}")
+    return j.to_dict()
+
+
+def journal_sort_key(j: Journal) -> Tuple:
+    # Output order: by IF descending, then title. finalize_journal does not touch these fields.
+    return (0 if j.if_2023 is not None else 1, -(j.if_2023 or 0), j.title)
+
+
+def create_journal_store(backend: str = "memory"):
+    if backend == "sqlite":
+        return SqliteJournalStore()
+    return JournalStore()
+
+
+def journal_identity_keys(issn: str, eissn: str, cn_number: str, title: str) -> Tuple[List[str], str, bool]:
+    strong = []
+    for prefix, key in (
+        ("issn:", normalize_issn(issn)),
+        ("issn:", normalize_issn(eissn)),
+        ("cn:", normalize_cn(cn_number)),
+    ):
+        if key:
+            strong.append(prefix + key)
+    t_key = normalize_title(title)
+    return strong, ("title:" + t_key) if t_key else "", bool(normalize_cn(cn_number))
+
+
+class JournalIdRegistry:
+    # Persisted identity key -> public id map, so a journal keeps its id (and chunk, and URL)
+    # when sources are added or reordered. Ids are never reused once handed out.
+    def __init__(self, path: Optional[Path] = None) -> None:
+        self.path = path or ID_REGISTRY_FILE
+        self.keys: Dict[str, int] = {}
+        self.next_id = 1
+        self.seeded = False
+        try:
+            payload = json.loads(self.path.read_text(encoding="utf-8"))
+            self.keys = {str(k): int(v) for k, v in (payload.get("keys") or {}).items()}
+            self.next_id = int((payload.get("meta") or {}).get("next_id") or 1)
+        except (OSError, ValueError, TypeError, AttributeError):
+            self.seed_from_published()
+        self.next_id = max([self.next_id, *(v + 1 for v in self.keys.values())])
+
+    def register(self, strong: List[str], title_key: str, jid: int) -> None:
+        # Keys stay with the first id they were seen under, so a temporary merge or rename
+        # cannot move an identifier to another journal.
+        for key in strong:
+            self.keys.setdefault(key, jid)
+        if title_key:
+            self.keys.setdefault(title_key, jid)
+
+    def seed_from_published(self) -> None:
+        # First run: adopt the ids already published in journals.json or the chunk files.
+        if OUT_FILE.is_file():
+            sources = [OUT_FILE]
+        else:
+            sources = sorted(p for p in CHUNK_DIR.glob("*.json") if not p.name.startswith(("lookup.", "history-", "index-")))
+        for path in sources:
+            try:
+                rows = json.loads(path.read_text(encoding="utf-8")).get("journals") or []
+            except (OSError, ValueError, AttributeError):
+                continue
+            for row in rows:
+                try:
+                    jid = int(row.get("id"))
+                except (TypeError, ValueError):
+                    continue
+                strong, title_key, _ = journal_identity_keys(
+                    row.get("issn"), row.get("eissn"), row.get("cn_number"), row.get("title")
+                )
+                self.register(strong, title_key, jid)
+                self.seeded = True
+
+    def assign(self, store) -> Dict[int, int]:
+        # Strong identifiers claim registered ids first; titles only resolve what is left, never for
+        # journals that carry a CN number (as in JournalStore.get_or_create), and never hand a journal
+        # with its own ISSN/CN an id that already belongs to other identifiers.
+        mapping: Dict[int, int] = {}
+        claimed = set()
+        identities = []
+        pending = []
+        for j in store.items.values():
+            strong, title_key, has_cn = journal_identity_keys(j.issn, j.eissn, j.cn_number, j.title)
+            identities.append((j.id, strong, title_key))
+            # When identifiers point at different ids, the oldest one is the journal's original id.
+            candidates = []
+            for key in strong:
+                rid = self.keys.get(key)
+                if rid is not None and rid not in claimed:
+                    candidates.append(rid)
+            if candidates:
+                mapping[j.id] = min(candidates)
+                claimed.add(mapping[j.id])
+            else:
+                pending.append((j.id, title_key, has_cn, bool(strong)))
+
+        strong_ids = {rid for key, rid in self.keys.items() if not key.startswith("title:")} if pending else set()
+        fresh = []
+        for internal_id, title_key, has_cn, has_strong in pending:
+            rid = self.keys.get(title_key) if title_key and not has_cn else None
+            if rid is not None and rid not in claimed and not (has_strong and rid in strong_ids):
+                mapping[internal_id] = rid
+                claimed.add(rid)
+            else:
+                fresh.append(internal_id)
+        for internal_id in fresh:
+            mapping[internal_id] = self.next_id
+            self.next_id += 1
+
+        for internal_id, strong, title_key in identities:
+            self.register(strong, title_key, mapping[internal_id])
+        return mapping
+
+    def save(self) -> None:
+        payload = {"meta": {"next_id": self.next_id}, "keys": self.keys}
+        tmp_file = self.path.with_suffix(".tmp")
+        tmp_file.write_text(json.dumps(payload, ensure_ascii=False, indent=0, sort_keys=True), encoding="utf-8")
+        tmp_file.replace(self.path)
 
 
 def find_showjcr_data_dir() -> Optional[Path]:
@@ -551,20 +914,23 @@ def get_row_value(row, key: str):
         return row.get(key, "")
     if hasattr(row, "keys"):
         try:
-            keys = set(row.keys())
-            if key in keys:
+            if key in row.keys():
                 return row[key]
         except Exception:
             return ""
     return ""
 
 
-def parse_cas_subcategories(row) -> List[Dict[str, str]]:
+CAS_SUBCATEGORY_COLUMNS = [col for idx in range(1, 7) for col in (f"小类{idx}", f"小类{idx}分区")]
+
+
+def build_cas_subcategories(values) -> List[Dict[str, str]]:
+    # values alternates name/rank cells in CAS_SUBCATEGORY_COLUMNS order.
     out: List[Dict[str, str]] = []
     seen: set[Tuple[str, str]] = set()
-    for idx in range(1, 7):
-        name = str(get_row_value(row, f"小类{idx}") or "").strip()
-        rank = parse_rank(get_row_value(row, f"小类{idx}分区"))
+    for pos in range(0, len(values) - 1, 2):
+        name = str(values[pos] or "").strip()
+        rank = parse_rank(values[pos + 1])
         if not name and not rank:
             continue
         key = (name, rank)
@@ -576,18 +942,18 @@ def parse_cas_subcategories(row) -> List[Dict[str, str]]:
     return out
 
 
+def parse_cas_subcategories(row) -> List[Dict[str, str]]:
+    return build_cas_subcategories([get_row_value(row, col) for col in CAS_SUBCATEGORY_COLUMNS])
+
+
 def append_if_history(j: Journal, year: str, if_value: Optional[float], quartile: str, rank: str) -> None:
     y = parse_year_token(year)
     if not y:
         return
-    j.if_history.append(
-        {
-            "year": y,
-            "if_value": if_value if if_value is not None else "",
-            "quartile": quartile.strip(),
-            "rank": str(rank or "").strip(),
-        }
-    )
+    y = sys.intern(y)
+    row = (y, if_value if if_value is not None else "", intern_text(quartile), str(rank or "").strip())
+    j.if_history = growable(j.if_history)
+    j.if_history.append(row)
     if if_value is not None and year_value(y) >= year_value(j.if_year):
         j.if_2023 = if_value
         j.if_year = y
@@ -597,6 +963,14 @@ def append_if_history(j: Journal, year: str, if_value: Optional[float], quartile
         j.jcr_quartile = quartile
 
 
+def freeze_cas_subcategories(subcategories: Optional[List[Dict[str, str]]]) -> Tuple[Tuple[str, str], ...]:
+    values: List[object] = []
+    for sub in subcategories if isinstance(subcategories, list) else []:
+        if isinstance(sub, dict):
+            values.extend((sub.get("name"), sub.get("rank", "")))
+    return tuple((intern_text(x["name"]), sys.intern(x["rank"])) for x in build_cas_subcategories(values))
+
+
 def append_cas_history(
     j: Journal,
     year: str,
@@ -611,19 +985,20 @@ def append_cas_history(
     y = parse_year_token(year)
     if not y:
         return
-    clean_rank = parse_rank(rank)
-    j.cas_history.append(
-        {
-            "year": y,
-            "rank": clean_rank,
-            "top": "是" if top is True else ("否" if top is False else ""),
-            "oa_status": str(oa_status or "").strip(),
-            "review": str(review or "").strip(),
-            "wos": str(wos or "").strip(),
-            "category": str(category or "").strip(),
-            "subcategories": subcategories or [],
-        }
+    y = sys.intern(y)
+    clean_rank = sys.intern(parse_rank(rank))
+    row = (
+        y,
+        clean_rank,
+        "是" if top is True else ("否" if top is False else ""),
+        intern_text(oa_status),
+        intern_text(review),
+        intern_text(wos),
+        intern_text(category),
+        freeze_cas_subcategories(subcategories),
     )
+    j.cas_history = growable(j.cas_history)
+    j.cas_history.append(row)
     if clean_rank and year_value(y) >= year_value(j.cas_year):
         j.cas_2025 = clean_rank
         j.cas_year = y
@@ -637,10 +1012,12 @@ def append_cas_history(
 
 def append_warning_history(j: Journal, year: str, value: str) -> None:
     y = parse_year_token(year)
-    v = str(value or "").strip()
+    v = intern_text(value)
     if not y or not v:
         return
-    j.warning_history.append({"year": y, "value": v})
+    y = sys.intern(y)
+    j.warning_history = growable(j.warning_history)
+    j.warning_history.append((y, v))
     if year_value(y) >= year_value(j.warning_latest_year):
         j.warning_latest_year = y
         j.warning_latest = v
@@ -650,29 +1027,151 @@ def append_ccf_record(j: Journal, year: str, area: str, category: str, level: st
     y = parse_year_token(year)
     if not y:
         return
-    j.ccf_records.append(
-        {
-            "year": y,
-            "area": str(area or "").strip(),
-            "category": str(category or "").strip(),
-            "level": str(level or "").strip(),
-        }
-    )
+    row = (sys.intern(y), intern_text(area), intern_text(category), intern_text(level))
+    j.ccf_records = growable(j.ccf_records)
+    j.ccf_records.append(row)
 
 
 def append_ccft_record(j: Journal, year: str, tier: str, category: str, cn_number: str, zh_title: str) -> None:
     y = parse_year_token(year)
     if not y:
         return
-    j.ccft_records.append(
-        {
-            "year": y,
-            "tier": str(tier or "").strip(),
-            "category": str(category or "").strip(),
-            "cn_number": normalize_cn(cn_number),
-            "zh_title": str(zh_title or "").strip(),
-        }
+    row = (sys.intern(y), intern_text(tier), intern_text(category), normalize_cn(cn_number), str(zh_title or "").strip())
+    j.ccft_records = growable(j.ccft_records)
+    j.ccft_records.append(row)
+
+
+def observation(kind: str, source: str, title: str = "", issn: str = "", eissn: str = "", cn_number: str = "", **values) -> Dict:
+    return {
+        "kind": kind,
+        "source": source,
+        "title": title,
+        "issn": issn,
+        "eissn": eissn,
+        "cn_number": cn_number,
+        **values,
+    }
+
+
+def apply_observation(store: JournalStore, rec: Dict) -> None:
+    title = rec.get("title", "")
+    issn = rec.get("issn", "")
+    eissn = rec.get("eissn", "")
+    cn_number = rec.get("cn_number", "")
+    j = store.get_or_create(title=title, issn=issn, eissn=eissn, cn_number=cn_number)
+    if title and (not j.title or j.title.startswith("Unknown-")):
+        j.title = title
+    if issn and not j.issn:
+        j.issn = issn
+    if eissn and not j.eissn:
+        j.eissn = eissn
+    if cn_number and not j.cn_number:
+        j.cn_number = cn_number
+
+    kind = rec["kind"]
+    if kind == "if":
+        append_if_history(j, rec["year"], rec["if_value"], rec["quartile"], rec["rank"])
+    elif kind == "cas":
+        append_cas_history(
+            j=j,
+            year=rec["year"],
+            rank=rec["rank"],
+            top=rec["top"],
+            oa_status=rec["oa_status"],
+            review=rec["review"],
+            wos=rec["wos"],
+            category=rec["category"],
+            subcategories=rec["subcategories"],
+        )
+    elif kind == "warning":
+        append_warning_history(j, rec["year"], rec["value"])
+    elif kind == "ccf":
+        if rec["publisher"] and not j.publisher:
+            j.publisher = rec["publisher"]
+        if rec["website"] and not j.official_url:
+            j.official_url = rec["website"]
+        append_ccf_record(j=j, year=rec["year"], area=rec["area"], category=rec["category"], level=rec["level"])
+    elif kind == "ccft":
+        if rec["publisher"] and not j.publisher:
+            j.publisher = rec["publisher"]
+        append_ccft_record(
+            j=j,
+            year=rec["year"],
+            tier=rec["tier"],
+            category=rec["category"],
+            cn_number=cn_number,
+            zh_title=rec["zh_title"],
+        )
+    elif kind == "xuankan_tier":
+        if not j.xuankan_2026:
+            j.xuankan_2026 = rec["rank"]
+    elif kind == "xuankan_warning":
+        j.xuankan_warning = True
+    elif kind == "cscd":
+        if rec["cscd_type"]:
+            j.cscd_type = rec["cscd_type"]
+    elif kind == "hq":
+        attach_hq_record(
+            j,
+            field_name=rec["field"],
+            society=rec["society"],
+            level=rec["level"],
+            subfield=rec["subfield"],
+        )
+    else:
+        raise ValueError(f"unknown observation kind: {kind}")
+
+    if rec.get("source"):
+        j.sources.add(rec["source"])
+    store.touch_index(j)
+
+
+def replay_observations(store: JournalStore, records: List[Dict]) -> None:
+    for rec in records:
+        apply_observation(store, rec)
+
+
+def file_digest(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+@lru_cache(maxsize=1)
+def parser_source_digest() -> str:
+    # The parsers live in this module, so any edit to it invalidates cached records.
+    return file_digest(Path(__file__).resolve())
+
+
+def cached_parse(name: str, path: Path, parser: Callable[[Path], Dict], use_cache: bool = True) -> Dict:
+    # Parsed records are replayed from .build_cache while the input file and the parser source are unchanged.
+    if not use_cache:
+        return parser(path)
+    key = {
+        "version": BUILD_CACHE_VERSION,
+        "parser": parser_source_digest(),
+        "path": str(path),
+        "sha256": file_digest(path),
+    }
+    cache_file = BUILD_CACHE_DIR / f"{name}.json"
+    try:
+        cached = json.loads(cache_file.read_text(encoding="utf-8"))
+        if cached.get("key") == key:
+            return cached["result"]
+    except (OSError, ValueError, KeyError, AttributeError):
+        pass
+
+    result = parser(path)
+    BUILD_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_file = cache_file.with_suffix(".tmp")
+    tmp_file.write_text(
+        json.dumps({"key": key, "result": result}, ensure_ascii=False, separators=(",", ":")),
+        encoding="utf-8",
     )
+    tmp_file.replace(cache_file)
+    return result
 
 
 def load_showjcr_jcr(store: JournalStore, csv_path: Path, jcr_year: str) -> None:
@@ -711,7 +1210,7 @@ def load_showjcr_jcr(store: JournalStore, csv_path: Path, jcr_year: str) -> None
                 if q and not j.jcr_quartile:
                     j.jcr_quartile = q
 
-            j.sources.append(f"showjcr:{csv_path.name}")
+            j.sources.add(f"showjcr:{csv_path.name}")
             store.touch_index(j)
 
 
@@ -752,7 +1251,7 @@ def load_showjcr_fqb(store: JournalStore, csv_path: Path, cas_year: str) -> None
                 subcategories=subcategories,
             )
 
-            j.sources.append(f"showjcr:{csv_path.name}")
+            j.sources.add(f"showjcr:{csv_path.name}")
             store.touch_index(j)
 
 
@@ -770,7 +1269,26 @@ def find_showjcr_db_file(data_dir: Optional[Path] = None) -> Optional[Path]:
     return candidates[0]
 
 
-def load_showjcr_db(store: JournalStore, db_path: Path) -> Dict[str, str]:
+def quote_sql_identifier(name: str) -> str:
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def sqlite_table_columns(conn: sqlite3.Connection, table: str) -> List[str]:
+    return [str(r[1]) for r in conn.execute(f"PRAGMA table_info({quote_sql_identifier(table)})")]
+
+
+def present_columns(columns: List[str], *names: str) -> List[str]:
+    available = set(columns)
+    return [name if name in available else "" for name in names]
+
+
+def plan_select_sql(table: str, plan: List[str]) -> str:
+    # Each plan slot becomes one tuple position; missing columns are selected as NULL.
+    exprs = [quote_sql_identifier(col) if col else "NULL" for col in plan]
+    return f"SELECT {', '.join(exprs)} FROM {quote_sql_identifier(table)}"
+
+
+def parse_showjcr_db(db_path: Path) -> Dict[str, object]:
     meta = {
         "showjcr_db_file": db_path.name,
         "showjcr_db_path": str(db_path),
@@ -783,12 +1301,10 @@ def load_showjcr_db(store: JournalStore, db_path: Path) -> Dict[str, str]:
         "showjcr_ccf_file": "",
         "showjcr_ccft_file": "",
     }
+    records: List[Dict] = []
 
     conn = sqlite3.connect(str(db_path))
-    conn.row_factory = sqlite3.Row
-    cur = conn.cursor()
-    cur.execute("SELECT name FROM sqlite_master WHERE type='table'")
-    table_names = sorted([str(r[0]) for r in cur.fetchall()])
+    table_names = sorted([str(r[0]) for r in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")])
     table_set = set(table_names)
 
     jcr_tables = sorted([t for t in table_names if re.fullmatch(r"JCR\d{4}", t)], key=year_value)
@@ -811,150 +1327,170 @@ def load_showjcr_db(store: JournalStore, db_path: Path) -> Dict[str, str]:
 
     for table in jcr_tables:
         year = parse_year_token(table)
-        cur.execute(f'SELECT * FROM "{table}"')
-        for row in cur.fetchall():
-            title = str(row["Journal"] or "").strip() if "Journal" in row.keys() else ""
-            issn = normalize_issn(row["ISSN"]) if "ISSN" in row.keys() else ""
-            eissn = normalize_issn(row["eISSN"]) if "eISSN" in row.keys() else ""
+        columns = sqlite_table_columns(conn, table)
+        if_col = next((k for k in columns if re.fullmatch(r"IF\(\d{4}\)", k, flags=re.I)), "")
+        quartile_col = next((k for k in columns if "quartile" in k.lower()), "")
+        rank_col = next((k for k in columns if "rank" in k.lower()), "")
+        plan = [*present_columns(columns, "Journal", "ISSN", "eISSN"), if_col, quartile_col, rank_col]
+        source = f"showjcr:{table}"
+        for raw_title, raw_issn, raw_eissn, raw_if, raw_quartile, raw_rank in conn.execute(plan_select_sql(table, plan)):
+            title = str(raw_title or "").strip()
+            issn = normalize_issn(raw_issn)
+            eissn = normalize_issn(raw_eissn)
             if not title and not issn and not eissn:
                 continue
-            j = store.get_or_create(title=title, issn=issn, eissn=eissn)
-            if title and (not j.title or j.title.startswith("Unknown-")):
-                j.title = title
-            if issn and not j.issn:
-                j.issn = issn
-            if eissn and not j.eissn:
-                j.eissn = eissn
-
-            if_col = next((k for k in row.keys() if re.fullmatch(r"IF\(\d{4}\)", str(k), flags=re.I)), "")
-            quartile_col = next((k for k in row.keys() if "quartile" in str(k).lower()), "")
-            rank_col = next((k for k in row.keys() if "rank" in str(k).lower()), "")
-            if_value = parse_if_value(row[if_col]) if if_col else None
-            quartile = parse_wos_quartile(row[quartile_col]) if quartile_col else ""
-            rank = str(row[rank_col] or "").strip() if rank_col else ""
-            append_if_history(j, year, if_value, quartile, rank)
-
-            j.sources.append(f"showjcr:{table}")
-            store.touch_index(j)
+            records.append(
+                observation(
+                    "if",
+                    source,
+                    title=title,
+                    issn=issn,
+                    eissn=eissn,
+                    year=year,
+                    if_value=parse_if_value(raw_if),
+                    quartile=parse_wos_quartile(raw_quartile),
+                    rank=str(raw_rank or "").strip(),
+                )
+            )
 
     for table in fqb_tables:
         year = parse_year_token(table)
-        cur.execute(f'SELECT * FROM "{table}"')
-        for row in cur.fetchall():
-            title = str(row["Journal"] or "").strip() if "Journal" in row.keys() else ""
+        columns = sqlite_table_columns(conn, table)
+        has_issn_pair = "ISSN/EISSN" in columns
+        plan = [
+            *present_columns(
+                columns,
+                "Journal",
+                "ISSN/EISSN",
+                "ISSN",
+                "年份",
+                "大类分区",
+                "Top",
+                "Open Access",
+                "Review",
+                "Web of Science",
+                "大类",
+            ),
+            *present_columns(columns, *CAS_SUBCATEGORY_COLUMNS),
+        ]
+        source = f"showjcr:{table}"
+        for row in conn.execute(plan_select_sql(table, plan)):
+            title = str(row[0] or "").strip()
             issn = ""
             eissn = ""
-            if "ISSN/EISSN" in row.keys():
-                issn, eissn = parse_issn_pair(row["ISSN/EISSN"])
-            elif "ISSN" in row.keys():
-                issn = normalize_issn(row["ISSN"])
+            if has_issn_pair:
+                issn, eissn = parse_issn_pair(row[1])
+            else:
+                issn = normalize_issn(row[2])
             if not title and not issn and not eissn:
                 continue
 
-            j = store.get_or_create(title=title, issn=issn, eissn=eissn)
-            if title and (not j.title or j.title.startswith("Unknown-")):
-                j.title = title
-            if issn and not j.issn:
-                j.issn = issn
-            if eissn and not j.eissn:
-                j.eissn = eissn
-
-            raw_year = year or (str(row["年份"]) if "年份" in row.keys() else "")
-            subcategories = parse_cas_subcategories(row)
-            append_cas_history(
-                j=j,
-                year=raw_year,
-                rank=row["大类分区"] if "大类分区" in row.keys() else "",
-                top=parse_bool_zh(row["Top"] if "Top" in row.keys() else ""),
-                oa_status=str(row["Open Access"] or "").strip() if "Open Access" in row.keys() else "",
-                review=str(row["Review"] or "").strip() if "Review" in row.keys() else "",
-                wos=str(row["Web of Science"] or "").strip() if "Web of Science" in row.keys() else "",
-                category=str(row["大类"] or "").strip() if "大类" in row.keys() else "",
-                subcategories=subcategories,
+            raw_year = year or (str(row[3]) if row[3] is not None else "")
+            records.append(
+                observation(
+                    "cas",
+                    source,
+                    title=title,
+                    issn=issn,
+                    eissn=eissn,
+                    year=parse_year_token(raw_year),
+                    rank=parse_rank(row[4]),
+                    top=parse_bool_zh(row[5]),
+                    oa_status=str(row[6] or "").strip(),
+                    review=str(row[7] or "").strip(),
+                    wos=str(row[8] or "").strip(),
+                    category=str(row[9] or "").strip(),
+                    subcategories=build_cas_subcategories(row[10:]),
+                )
             )
 
-            j.sources.append(f"showjcr:{table}")
-            store.touch_index(j)
-
     for table in warn_tables:
         year = parse_year_token(table)
-        cur.execute(f'SELECT * FROM "{table}"')
-        for row in cur.fetchall():
-            if "Journal" not in row.keys():
-                continue
-            title = str(row["Journal"] or "").strip()
+        columns = sqlite_table_columns(conn, table)
+        if "Journal" not in columns:
+            continue
+        value_col = next((k for k in columns if k != "Journal"), "")
+        source = f"showjcr:{table}"
+        for raw_title, raw_value in conn.execute(plan_select_sql(table, ["Journal", value_col])):
+            title = str(raw_title or "").strip()
             if not title:
                 continue
-            value_col = next((k for k in row.keys() if str(k) != "Journal"), "")
-            value = str(row[value_col] or "").strip() if value_col else ""
+            value = str(raw_value or "").strip()
             if not value:
                 continue
-            j = store.get_or_create(title=title)
-            if title and (not j.title or j.title.startswith("Unknown-")):
-                j.title = title
-            append_warning_history(j, year, value)
-            j.sources.append(f"showjcr:{table}")
-            store.touch_index(j)
+            records.append(observation("warning", source, title=title, year=year, value=value))
 
     if "CCF2022" in table_set:
-        cur.execute('SELECT * FROM "CCF2022"')
-        for row in cur.fetchall():
-            title = str(row["Journal"] or "").strip() if "Journal" in row.keys() else ""
+        columns = sqlite_table_columns(conn, "CCF2022")
+        has_year = "年份" in columns
+        plan = present_columns(
+            columns,
+            "Journal",
+            "出版社",
+            "网址",
+            "年份",
+            "领域",
+            "CCF推荐类别（国际学术刊物/会议）",
+            "CCF推荐类型",
+        )
+        for raw_title, publisher, website, raw_year, area, category, level in conn.execute(plan_select_sql("CCF2022", plan)):
+            title = str(raw_title or "").strip()
             if not title:
                 continue
-            j = store.get_or_create(title=title)
-            if title and (not j.title or j.title.startswith("Unknown-")):
-                j.title = title
-            publisher = str(row["出版社"] or "").strip() if "出版社" in row.keys() else ""
-            website = str(row["网址"] or "").strip() if "网址" in row.keys() else ""
-            if publisher and not j.publisher:
-                j.publisher = publisher
-            if website and not j.official_url:
-                j.official_url = website
-            append_ccf_record(
-                j=j,
-                year=row["年份"] if "年份" in row.keys() else "2022",
-                area=row["领域"] if "领域" in row.keys() else "",
-                category=row["CCF推荐类别（国际学术刊物/会议）"] if "CCF推荐类别（国际学术刊物/会议）" in row.keys() else "",
-                level=row["CCF推荐类型"] if "CCF推荐类型" in row.keys() else "",
+            records.append(
+                observation(
+                    "ccf",
+                    "showjcr:CCF2022",
+                    title=title,
+                    publisher=str(publisher or "").strip(),
+                    website=str(website or "").strip(),
+                    year=parse_year_token(raw_year if has_year else "2022"),
+                    area=str(area or "").strip(),
+                    category=str(category or "").strip(),
+                    level=str(level or "").strip(),
+                )
             )
-            j.sources.append("showjcr:CCF2022")
-            store.touch_index(j)
 
     if "CCFT2022" in table_set:
-        cur.execute('SELECT * FROM "CCFT2022"')
-        for row in cur.fetchall():
-            title = str(row["Journal"] or "").strip() if "Journal" in row.keys() else ""
-            zh_title = str(row["中文刊名"] or "").strip() if "中文刊名" in row.keys() else ""
-            cn_number = str(row["CN号"] or "").strip() if "CN号" in row.keys() else ""
-            sponsor = str(row["主办单位"] or "").strip() if "主办单位" in row.keys() else ""
-            cn_norm = normalize_cn(cn_number)
+        columns = sqlite_table_columns(conn, "CCFT2022")
+        plan = present_columns(columns, "Journal", "中文刊名", "CN号", "主办单位", "T分区", "CCF推荐类别")
+        for raw_title, raw_zh_title, raw_cn, raw_sponsor, tier, category in conn.execute(plan_select_sql("CCFT2022", plan)):
+            title = str(raw_title or "").strip()
+            zh_title = str(raw_zh_title or "").strip()
+            cn_norm = normalize_cn(str(raw_cn or "").strip())
             seed_title = title or zh_title
             if not seed_title and not cn_norm:
                 continue
-            j = store.get_or_create(title=seed_title, cn_number=cn_norm)
-            if seed_title and (not j.title or j.title.startswith("Unknown-")):
-                j.title = seed_title
-            if cn_norm and not j.cn_number:
-                j.cn_number = cn_norm
-            if sponsor and not j.publisher:
-                j.publisher = sponsor
-            append_ccft_record(
-                j=j,
-                year="2022",
-                tier=row["T分区"] if "T分区" in row.keys() else "",
-                category=row["CCF推荐类别"] if "CCF推荐类别" in row.keys() else "",
-                cn_number=cn_norm,
-                zh_title=zh_title,
+            records.append(
+                observation(
+                    "ccft",
+                    "showjcr:CCFT2022",
+                    title=seed_title,
+                    cn_number=cn_norm,
+                    publisher=str(raw_sponsor or "").strip(),
+                    year="2022",
+                    tier=str(tier or "").strip(),
+                    category=str(category or "").strip(),
+                    zh_title=zh_title,
+                )
             )
-            j.sources.append("showjcr:CCFT2022")
-            store.touch_index(j)
 
     conn.close()
-    return meta
+    return {"meta": meta, "records": records}
+
 
+def load_showjcr_db(
+    store: JournalStore,
+    db_path: Path,
+    use_cache: bool = True,
+    parsed: Optional[Dict] = None,
+) -> Dict[str, str]:
+    result = parsed if parsed is not None else cached_parse("showjcr_db", db_path, parse_showjcr_db, use_cache=use_cache)
+    replay_observations(store, result["records"])
+    return dict(result["meta"])
 
-def load_showjcr_data(store: JournalStore) -> Dict[str, str]:
+
+def load_showjcr_data(store: JournalStore, use_cache: bool = True, parsed: Optional[Dict] = None) -> Dict[str, str]:
     meta = {
         "showjcr_data_dir": "",
         "showjcr_db_file": "",
@@ -975,7 +1511,7 @@ def load_showjcr_data(store: JournalStore) -> Dict[str, str]:
     meta["showjcr_data_dir"] = str(data_dir)
     db_file = find_showjcr_db_file(data_dir)
     if db_file:
-        meta.update(load_showjcr_db(store, db_file))
+        meta.update(load_showjcr_db(store, db_file, use_cache=use_cache, parsed=parsed))
         return meta
 
     fqb_file, fqb_year = pick_latest_showjcr_file(data_dir, "FQBJCR")
@@ -993,10 +1529,8 @@ def load_showjcr_data(store: JournalStore) -> Dict[str, str]:
     return meta
 
 
-def load_xuankan_tier(store: JournalStore) -> None:
-    xlsx_path = Path(__file__).resolve().parent / "2026新锐期刊分区信息下载.xlsx"
-    if not xlsx_path.exists():
-        return
+def parse_xuankan_tier(xlsx_path: Path) -> Dict[str, object]:
+    records: List[Dict] = []
     wb = openpyxl.load_workbook(xlsx_path, read_only=True, data_only=True)
     ws = wb.active
     header = None
@@ -1011,23 +1545,22 @@ def load_xuankan_tier(store: JournalStore) -> None:
         rank = parse_rank(row_dict.get("分区", ""))
         if not rank:
             continue
-        j = store.get_or_create(title=title, issn=issn, eissn=eissn)
-        if title and (not j.title or j.title.startswith("Unknown-")):
-            j.title = title
-        if issn and not j.issn:
-            j.issn = issn
-        if eissn and not j.eissn:
-            j.eissn = eissn
-        if not j.xuankan_2026:
-            j.xuankan_2026 = rank
-        store.touch_index(j)
+        records.append(observation("xuankan_tier", "", title=title, issn=issn, eissn=eissn, rank=rank))
     wb.close()
+    return {"records": records}
 
 
-def load_xuankan_warning(store: JournalStore) -> None:
-    xlsx_path = Path(__file__).resolve().parent / "2026年新锐分区期刊under review名单下载.xlsx"
-    if not xlsx_path.exists():
+def load_xuankan_tier(store: JournalStore, use_cache: bool = True, parsed: Optional[Dict] = None) -> None:
+    if not XUANKAN_TIER_FILE.exists():
         return
+    result = parsed if parsed is not None else cached_parse(
+        "xuankan_tier", XUANKAN_TIER_FILE, parse_xuankan_tier, use_cache=use_cache
+    )
+    replay_observations(store, result["records"])
+
+
+def parse_xuankan_warning(xlsx_path: Path) -> Dict[str, object]:
+    records: List[Dict] = []
     wb = openpyxl.load_workbook(xlsx_path, read_only=True, data_only=True)
     ws = wb.active
     header = None
@@ -1041,27 +1574,29 @@ def load_xuankan_warning(store: JournalStore) -> None:
         eissn = normalize_issn(row_dict.get("EISSN", ""))
         if not title and not issn and not eissn:
             continue
-        j = store.get_or_create(title=title, issn=issn, eissn=eissn)
-        if title and (not j.title or j.title.startswith("Unknown-")):
-            j.title = title
-        if issn and not j.issn:
-            j.issn = issn
-        if eissn and not j.eissn:
-            j.eissn = eissn
-        j.xuankan_warning = True
-        store.touch_index(j)
+        records.append(observation("xuankan_warning", "", title=title, issn=issn, eissn=eissn))
     wb.close()
+    return {"records": records}
 
 
-def load_cscd_md(store: JournalStore) -> None:
-    file_path = None
+def load_xuankan_warning(store: JournalStore, use_cache: bool = True, parsed: Optional[Dict] = None) -> None:
+    if not XUANKAN_WARNING_FILE.exists():
+        return
+    result = parsed if parsed is not None else cached_parse(
+        "xuankan_warning", XUANKAN_WARNING_FILE, parse_xuankan_warning, use_cache=use_cache
+    )
+    replay_observations(store, result["records"])
+
+
+def find_cscd_md_file() -> Optional[Path]:
     for p in DATA_DIR.glob("*.md"):
         if "CSCD" in p.name:
-            file_path = p
-            break
-    if not file_path:
-        return
+            return p
+    return None
+
 
+def parse_cscd_md(file_path: Path) -> Dict[str, object]:
+    records: List[Dict] = []
     text = file_path.read_text(encoding="utf-8", errors="ignore")
     rows = re.findall(r"<tr><td>(.*?)</td><td>(.*?)</td><td>(.*?)</td><td>(.*?)</td></tr>", text)
     for no, title, issn, cscd_type in rows:
@@ -1070,16 +1605,24 @@ def load_cscd_md(store: JournalStore) -> None:
         issn_norm = normalize_issn(issn)
         if not issn_norm and not title:
             continue
-        j = store.get_or_create(title=title, issn=issn_norm)
-        if title and (not j.title or j.title.startswith("Unknown-")):
-            j.title = title.strip()
-        if issn_norm and not j.issn:
-            j.issn = issn_norm
-        c_type = str(cscd_type).strip()
-        if c_type:
-            j.cscd_type = c_type
-        j.sources.append(f"md:{file_path.name}")
-        store.touch_index(j)
+        records.append(
+            observation(
+                "cscd",
+                f"md:{file_path.name}",
+                title=title.strip(),
+                issn=issn_norm,
+                cscd_type=str(cscd_type).strip(),
+            )
+        )
+    return {"records": records}
+
+
+def load_cscd_md(store: JournalStore, use_cache: bool = True, parsed: Optional[Dict] = None) -> None:
+    file_path = find_cscd_md_file()
+    if not file_path:
+        return
+    result = parsed if parsed is not None else cached_parse("cscd_md", file_path, parse_cscd_md, use_cache=use_cache)
+    replay_observations(store, result["records"])
 
 
 def fetch_json_url(url: str, timeout: int = 30):
@@ -1270,16 +1813,16 @@ def load_cnki_scholar_data(store: JournalStore) -> Dict[str, object]:
 
         for token in ("SCI", "SCIE", "ESCI", "SSCI", "EI"):
             if token in tags and token not in j.tags:
-                j.tags.append(token)
+                j.tags.add(token)
                 changed = True
             if token in wos_tokens and token not in j.tags:
-                j.tags.append(token)
+                j.tags.add(token)
                 changed = True
 
         if changed:
             updated_ids.add(j.id)
 
-        j.sources.append("cnki-scholar")
+        j.sources.add("cnki-scholar")
         store.touch_index(j)
 
     meta["cnki_scholar_updated_journals"] = len(updated_ids)
@@ -1391,11 +1934,11 @@ def load_nature_index_catalog(store: JournalStore) -> Dict[str, object]:
             unique_titles.append(title)
     meta["nature_index_unique_titles"] = len(unique_titles)
 
-    title_map: Dict[str, List[Journal]] = {}
+    title_map: Dict[str, List[int]] = {}
     for j in store.items.values():
         key = normalize_nature_index_title(j.title)
         if key:
-            title_map.setdefault(key, []).append(j)
+            title_map.setdefault(key, []).append(j.id)
 
     marked_ids: set[int] = set()
     unmatched_titles: List[str] = []
@@ -1407,7 +1950,7 @@ def load_nature_index_catalog(store: JournalStore) -> Dict[str, object]:
             key = normalize_nature_index_title(candidate_title)
             if not key:
                 continue
-            matches = title_map.get(key, [])
+            matches = [store.items[jid] for jid in title_map.get(key, [])]
             if not matches:
                 continue
             for journal in matches:
@@ -1426,7 +1969,7 @@ def load_nature_index_catalog(store: JournalStore) -> Dict[str, object]:
         if used_alias:
             alias_matches += 1
         matched_journal.ni_journal = True
-        matched_journal.sources.append("nature-index")
+        matched_journal.sources.add("nature-index")
         marked_ids.add(matched_journal.id)
         store.touch_index(matched_journal)
 
@@ -1811,14 +2354,9 @@ def attach_hq_record(j: Journal, field_name: str, society: str, level: str, subf
     if level:
         if not j.hq_level or level_rank(level) < level_rank(j.hq_level):
             j.hq_level = level
-    j.hq_records.append(
-        {
-            "field": field_name.strip(),
-            "society": society.strip(),
-            "level": level.strip(),
-            "subfield": subfield.strip(),
-        }
-    )
+    row = (intern_text(field_name), intern_text(society), intern_text(level), intern_text(subfield))
+    j.hq_records = growable(j.hq_records)
+    j.hq_records.append(row)
 
 
 def postprocess_hq_records(field_name: str, records: List[Dict], declared_count: int) -> List[Dict]:
@@ -1889,17 +2427,14 @@ def postprocess_hq_records(field_name: str, records: List[Dict], declared_count:
     return out
 
 
-def load_hq_catalog(store: JournalStore) -> List[Dict]:
-    file_path = choose_hq_md_file()
-    if not file_path:
-        return []
-
+def parse_hq_catalog(file_path: Path) -> Dict[str, object]:
     text = file_path.read_text(encoding="utf-8", errors="ignore")
     headings = [(m.start(), m.end(), m.group(1).strip()) for m in re.finditer(r"^#\s*(.+)$", text, flags=re.M)]
     toc_entries = parse_hq_toc_entries(text, headings)
     sections = split_hq_sections(text, headings, toc_entries)
 
     field_stats: List[Dict] = []
+    observations: List[Dict] = []
     for sec in sections:
         field_name = sec["field"]
         declared_count = int(sec["declared_count"])
@@ -1979,135 +2514,883 @@ def load_hq_catalog(store: JournalStore) -> List[Dict]:
             cn = normalize_cn(rec.get("cn_number", ""))
             level = str(rec.get("level") or "").strip()
             subfield = str(rec.get("subfield") or "").strip()
+            observations.append(
+                observation(
+                    "hq",
+                    f"md:{file_path.name}:{field_name}",
+                    title=title,
+                    issn=issn,
+                    cn_number=cn,
+                    field=field_name,
+                    society=society,
+                    level=level,
+                    subfield=subfield,
+                )
+            )
 
-            j = store.get_or_create(title=title, issn=issn, cn_number=cn)
-            if title and (not j.title or j.title.startswith("Unknown-")):
-                j.title = title
-            if issn and not j.issn:
-                j.issn = issn
-            if cn and not j.cn_number:
-                j.cn_number = cn
+    field_stats.sort(key=lambda x: x["index"])
+    return {"field_stats": field_stats, "records": observations}
 
-            attach_hq_record(j, field_name=field_name, society=society, level=level, subfield=subfield)
-            j.sources.append(f"md:{file_path.name}:{field_name}")
-            store.touch_index(j)
 
-    field_stats.sort(key=lambda x: x["index"])
-    return field_stats
+def load_hq_catalog(store: JournalStore, use_cache: bool = True, parsed: Optional[Dict] = None) -> List[Dict]:
+    file_path = choose_hq_md_file()
+    if not file_path:
+        return []
+    result = parsed if parsed is not None else cached_parse("hq_catalog", file_path, parse_hq_catalog, use_cache=use_cache)
+    replay_observations(store, result["records"])
+    return list(result["field_stats"])
 
 
-def build_search_index(data: List[Dict], meta: Dict[str, object]) -> Dict[str, object]:
-    rows: List[Dict[str, object]] = []
-    for row in data:
-        item: Dict[str, object] = {k: row.get(k) for k in SEARCH_INDEX_FIELDS}
-        tags = item.get("tags")
-        item["tags"] = tags if isinstance(tags, list) else []
-        rows.append(item)
+def encode_json_compact(value) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def encode_json_bytes(value) -> bytes:
+    return encode_json_compact(value).encode("utf-8")
+
+
+def append_json_field(encoded: bytes, key: str, value) -> bytes:
+    # Adds "key": value to an already encoded, non-empty JSON object without re-encoding it.
+    return encoded[:-1] + b"," + encode_json_bytes(key) + b":" + encode_json_bytes(value) + b"}"
+
 
+def summary_cas_history(records):
+    # The page header reads the latest CAS record and every record's wos; older records keep only a
+    # non-empty wos (with its year), the rest arrives with the history chunk.
+    if not isinstance(records, list) or not records:
+        return records
+    latest = pick_latest_cas_record({"cas_history": records})
+    return [
+        rec if rec is latest else {"year": rec.get("year"), "wos": rec.get("wos")}
+        for rec in records
+        if rec is latest or (isinstance(rec, dict) and rec.get("wos"))
+    ]
+
+
+def split_chunk_record(row: Dict) -> Tuple[Dict, Dict]:
+    summary: Dict[str, object] = {}
+    for key, value in row.items():
+        if key == "cas_history":
+            summary[key] = summary_cas_history(value)
+        elif key not in CHUNK_HISTORY_FIELDS:
+            summary[key] = value
+    history: Dict[str, object] = {"id": row.get("id")}
+    history.update((key, row[key]) for key in CHUNK_HISTORY_FIELDS if key in row)
+    return summary, history
+
+
+def encode_chunk_records(row: Dict, split_history: bool, related=None) -> Tuple[bytes, Optional[bytes]]:
+    # (summary record, history record) for the chunk sets; without the split the history is None and
+    # the single chunk record carries everything.
+    if not split_history:
+        encoded = encode_json_bytes(row)
+        return (encoded if related is None else append_json_field(encoded, "related", related)), None
+    summary, history = split_chunk_record(row)
+    if related is not None:
+        history["related"] = related
+    return encode_json_bytes(summary), encode_json_bytes(history)
+
+
+class JsonStreamWriter:
+    # Streams {"journals":[...], <trailing fields>} item by item instead of building the document string.
+    def __init__(self, path: Path, array_key: str = "journals", item_sep: bytes = b",") -> None:
+        self.path = path
+        self.item_sep = item_sep
+        self.count = 0
+        self.bytes = 0
+        self.digest = hashlib.sha256()
+        self.handle = path.open("wb")
+        self._emit(b"{" + encode_json_bytes(array_key) + b":[")
+
+    def _emit(self, data: bytes) -> None:
+        self.digest.update(data)
+        self.handle.write(data)
+        self.bytes += len(data)
+
+    def write(self, encoded: bytes) -> int:
+        # Returns the byte offset of the item in the file.
+        if self.count:
+            self._emit(self.item_sep)
+        offset = self.bytes
+        self._emit(encoded)
+        self.count += 1
+        return offset
+
+    def close(self, trailing: Optional[Dict[str, object]] = None) -> None:
+        self._emit(b"]")
+        for key, value in (trailing or {}).items():
+            self._emit(b"," + encode_json_bytes(key) + b":" + encode_json_bytes(value))
+        self._emit(b"}")
+        self.handle.close()
+
+
+def search_index_row(row: Dict) -> Dict[str, object]:
+    item: Dict[str, object] = {k: row.get(k) for k in SEARCH_INDEX_FIELDS}
+    # The latest CAS 大类/小类, so related journals rank the same from the search index as from full records.
+    category, subcategories = latest_cas_fields(row)
+    item["cas_category"] = category or None
+    item["cas_subcategories"] = [name for name in subcategories if name]
+    tags = item.get("tags")
+    item["tags"] = tags if isinstance(tags, list) else []
+    return item
+
+
+def search_index_meta(meta: Dict[str, object], total: int) -> Dict[str, object]:
     return {
-        "meta": {
-            "generated_at": meta.get("generated_at"),
-            "total_journals": len(rows),
-            "source_file": OUT_FILE.name,
-            "index_fields": SEARCH_INDEX_FIELDS,
-        },
+        "generated_at": meta.get("generated_at"),
+        "revision": meta.get("revision"),
+        "total_journals": total,
+        "source_file": OUT_FILE.name,
+        "index_fields": SEARCH_INDEX_FIELDS,
+    }
+
+
+def build_search_index(data: List[Dict], meta: Dict[str, object], fmt: str = "rows") -> Dict[str, object]:
+    rows = [search_index_row(row) for row in data]
+    if fmt == "columnar":
+        return encode_search_index(rows, SEARCH_INDEX_FIELDS, search_index_meta(meta, len(rows)))
+    return {
+        "meta": search_index_meta(meta, len(rows)),
         "journals": rows,
     }
 
 
-def build_journal_chunks(data: List[Dict], meta: Dict[str, object]) -> Dict[str, object]:
-    CHUNK_DIR.mkdir(parents=True, exist_ok=True)
-    for old in CHUNK_DIR.glob("chunk-*.json"):
+class SearchIndexWriter:
+    # rows streams one object per journal; columnar collects the (small) projection per field and
+    # dictionary-encodes it on close, see search_index_codec.
+    def __init__(self, fmt: str = "columnar") -> None:
+        if fmt not in SEARCH_INDEX_FORMATS:
+            raise ValueError(f"unknown search index format: {fmt}")
+        self.format = fmt
+        self.count = 0
+        self.stream = JsonStreamWriter(SEARCH_INDEX_FILE) if fmt == "rows" else None
+        self.columns: Dict[str, List] = {name: [] for name in SEARCH_INDEX_FIELDS}
+
+    def add(self, row: Dict) -> Dict[str, object]:
+        item = search_index_row(row)
+        self.count += 1
+        if self.stream is not None:
+            self.stream.write(encode_json_bytes(item))
+            return item
+        for name in SEARCH_INDEX_FIELDS:
+            self.columns[name].append(item[name])
+        return item
+
+    def close(self, meta: Dict[str, object]) -> None:
+        index_meta = {**search_index_meta(meta, self.count), "format": self.format}
+        if self.stream is not None:
+            self.stream.close({"meta": index_meta})
+            return
+        SEARCH_INDEX_FILE.write_text(
+            encode_json_compact(encode_columns(self.columns, index_meta)),
+            encoding="utf-8",
+        )
+
+
+class SearchShardWriter:
+    # Publishes the prefix shards content-addressed (shard-<hex key>.<hash>.json); shards whose rows did
+    # not change keep their file, and files the new manifest no longer references are removed.
+    def __init__(self) -> None:
+        SEARCH_SHARD_DIR.mkdir(parents=True, exist_ok=True)
+        self.keep = set()
+        self.written = 0
+
+    def publish(self, stem: str, payload: Dict[str, object]) -> str:
+        data = encode_json_compact(payload).encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()[:CHUNK_HASH_LENGTH]
+        target = SEARCH_SHARD_DIR / f"{stem}.{digest}.json"
+        if not (target.is_file() and target.stat().st_size == len(data)):
+            target.write_bytes(data)
+            self.written += 1
+        self.keep.add(target.name)
+        return digest
+
+    def write(self, builder: SearchShardBuilder, meta: Dict[str, object]) -> Dict[str, object]:
+        shards: Dict[str, List[object]] = {}
+        for key, rows, split, floor in builder.shards():
+            digest = self.publish(shard_file_stem(key), builder.payload(rows, SEARCH_INDEX_FIELDS, {"prefix": key}))
+            shards[key] = [digest, len(rows), floor] if split else [digest, len(rows)]
+        popular_rows, popular_floor = builder.popular()
+        popular_digest = self.publish("popular", builder.payload(popular_rows, SEARCH_INDEX_FIELDS, {"prefix": ""}))
+        for old in SEARCH_SHARD_DIR.glob("*.json"):
+            if old.name not in self.keep:
+                old.unlink(missing_ok=True)
+        return {
+            "format": SHARD_FORMAT,
+            "meta": {
+                "generated_at": meta.get("generated_at"),
+                "revision": meta.get("revision"),
+                "total_journals": len(builder.rows),
+                "source_file": SEARCH_INDEX_FILE.name,
+                "row_budget": builder.row_budget,
+                "top_count": builder.top_count,
+                "order_field": ORDER_FIELD,
+            },
+            "dir": f"{SEARCH_SHARD_DIR.name}/",
+            "popular": {
+                "file": f"{SEARCH_SHARD_DIR.name}/popular.{popular_digest}.json",
+                "count": len(popular_rows),
+                "floor": popular_floor,
+            },
+            "shards": shards,
+        }
+
+
+def remove_search_shards() -> None:
+    SEARCH_SHARD_MANIFEST_FILE.unlink(missing_ok=True)
+    for old in SEARCH_SHARD_DIR.glob("*.json*"):
         old.unlink(missing_ok=True)
 
-    buckets: List[List[Dict[str, object]]] = [[] for _ in range(CHUNK_COUNT)]
-    for row in data:
-        raw_id = row.get("id")
-        idx = None
+
+def chunk_bucket(row: Dict, chunk_count: int = CHUNK_COUNT) -> int:
+    raw_id = row.get("id")
+    try:
+        rid = int(raw_id)
+        if rid >= 0:
+            return rid % chunk_count
+    except (TypeError, ValueError):
+        pass
+    fallback_key = normalize_title(str(row.get("title") or ""))
+    return (sum(ord(ch) for ch in fallback_key) or 0) % chunk_count
+
+
+def journal_category_key(row: Dict) -> str:
+    latest_year = -1
+    category = ""
+    for rec in row.get("cas_history") or []:
+        year = year_value(rec.get("year"))
+        if year > latest_year and rec.get("category"):
+            latest_year = year
+            category = str(rec.get("category")).strip()
+    return category
+
+
+class ChunkSetWriter:
+    # Chunks are content-addressed: an unchanged bucket keeps its existing file (and mtime) untouched.
+    # Strategies: id_mod (fixed id % chunk_count), bytes (fill chunks up to chunk_bytes in build order),
+    # category (bytes-bounded chunks per latest CAS 大类) and single (one file per journal).
+    # With split_history, each bucket also gets a history-NN file holding CHUNK_HISTORY_FIELDS for the
+    # same journals, so the page header only waits for the small summary chunk. With record_offsets, an
+    # index-NN file lists each record's byte offset and length in both files for single ranged GETs.
+    def __init__(
+        self,
+        strategy: str = "id_mod",
+        chunk_count: int = CHUNK_COUNT,
+        chunk_bytes: int = CHUNK_TARGET_BYTES,
+        split_history: bool = True,
+        record_offsets: bool = True,
+    ) -> None:
+        if strategy not in CHUNK_STRATEGIES:
+            raise ValueError(f"unknown chunk strategy: {strategy}")
+        CHUNK_DIR.mkdir(parents=True, exist_ok=True)
+        for stale in CHUNK_DIR.glob("*.json.tmp"):
+            stale.unlink(missing_ok=True)
+        self.strategy = strategy
+        self.chunk_count = chunk_count
+        self.chunk_bytes = chunk_bytes
+        self.split_history = split_history
+        self.record_offsets = record_offsets and strategy != "single"
+        self.total = 0
+        self.written = 0
+        self.keep = set()
+        self.revision = hashlib.sha256()
+        self.chunks_meta: List[Dict[str, object]] = []
+        self.history_meta: List[Dict[str, object]] = []
+        self.lookup: Dict[str, int] = {}
+        self.offsets: Dict[int, Dict[str, List]] = {}
+        self.open_writers: Dict[object, Tuple[int, JsonStreamWriter, Optional[JsonStreamWriter]]] = {}
+        self.groups: List[str] = []
+        if strategy == "id_mod":
+            for i in range(chunk_count):
+                self.open_writers[i] = self.new_writers(i)
+
+    def new_writers(self, bucket: int) -> Tuple[int, JsonStreamWriter, Optional[JsonStreamWriter]]:
+        history = JsonStreamWriter(CHUNK_DIR / f"history-{bucket:02d}.json.tmp") if self.split_history else None
+        return bucket, JsonStreamWriter(CHUNK_DIR / f"chunk-{bucket:02d}.json.tmp"), history
+
+    def group_key(self, row: Dict) -> object:
+        if self.strategy == "id_mod":
+            return chunk_bucket(row, self.chunk_count)
+        if self.strategy == "category":
+            return journal_category_key(row)
+        return ""
+
+    def add(self, row: Dict, encoded: bytes, history: Optional[bytes] = None) -> Optional[int]:
+        self.total += 1
+        if self.strategy == "single":
+            self.write_single(CHUNK_SINGLE_TEMPLATE.format(id=row.get("id")), encoded)
+            if history is not None:
+                self.write_single(CHUNK_HISTORY_TEMPLATE.format(id=row.get("id")), history)
+            return None
+        key = self.group_key(row)
+        entry = self.open_writers.get(key)
+        if entry is None:
+            entry = self.new_writers(len(self.chunks_meta) + len(self.open_writers))
+            self.open_writers[key] = entry
+        bucket, writer, history_writer = entry
+        offset = writer.write(encoded)
+        history_offset = history_writer.write(history) if history_writer is not None and history is not None else None
+        if self.record_offsets:
+            positions = self.offsets.setdefault(bucket, {"ids": [], "chunk": [], "history": []})
+            positions["ids"].append(row.get("id"))
+            positions["chunk"].append((offset, len(encoded)))
+            if history_offset is not None:
+                positions["history"].append((history_offset, len(history)))
+        if self.strategy == "id_mod":
+            return bucket
+        self.lookup[str(row.get("id"))] = bucket
+        if max(writer.bytes, history_writer.bytes if history_writer is not None else 0) >= self.chunk_bytes:
+            self.finish(key)
+        return bucket
+
+    def write_single(self, name: str, encoded: bytes) -> None:
+        data = b'{"journals":[' + encoded + b"]}"
+        sha256 = hashlib.sha256(data).hexdigest()
+        target = CHUNK_DIR / name
+        if not (target.is_file() and target.stat().st_size == len(data) and target.read_bytes() == data):
+            target.write_bytes(data)
+            self.written += 1
+        self.keep.add(target.name)
+        self.revision.update(sha256.encode("ascii"))
+
+    def publish(self, writer: JsonStreamWriter, stem: str) -> Tuple[Path, str, bool]:
+        sha256 = writer.digest.hexdigest()
+        target = CHUNK_DIR / f"{stem}.{sha256[:CHUNK_HASH_LENGTH]}.json"
+        if target.is_file() and target.stat().st_size == writer.bytes:
+            writer.path.unlink()
+            return target, sha256, False
+        writer.path.replace(target)
+        return target, sha256, True
+
+    def finish_writer(self, bucket: int, writer: JsonStreamWriter, stem: str, key: object) -> Dict[str, object]:
+        writer.close()
+        target, sha256, changed = self.publish(writer, f"{stem}-{bucket:02d}")
+        self.keep.add(target.name)
+        self.written += int(changed)
+        item: Dict[str, object] = {
+            "bucket": bucket,
+            "file": f"journal_chunks/{target.name}",
+            "count": writer.count,
+            "bytes": writer.bytes,
+            "sha256": sha256,
+        }
+        if self.strategy == "category":
+            item["category"] = key
+        return item
+
+    def finish(self, key: object) -> None:
+        bucket, writer, history_writer = self.open_writers.pop(key)
+        item = self.finish_writer(bucket, writer, "chunk", key)
+        self.chunks_meta.append(item)
+        history_item = None
+        if history_writer is not None:
+            history_item = self.finish_writer(bucket, history_writer, "history", key)
+            self.history_meta.append(history_item)
+        if self.record_offsets:
+            item["index"] = self.write_index(bucket, item, history_item)
+
+    def write_index(self, bucket: int, item: Dict[str, object], history_item: Optional[Dict[str, object]]) -> str:
+        positions = self.offsets.pop(bucket, {"ids": [], "chunk": [], "history": []})
+        trailing: Dict[str, object] = {}
+        for name, file_item in (("chunk", item), ("history", history_item)):
+            if file_item is not None and len(positions[name]) == len(positions["ids"]):
+                trailing[name] = {
+                    "file": file_item["file"],
+                    "offsets": [offset for offset, _ in positions[name]],
+                    "lengths": [length for _, length in positions[name]],
+                }
+        writer = JsonStreamWriter(CHUNK_DIR / f"index-{bucket:02d}.json.tmp", array_key="ids")
+        for jid in positions["ids"]:
+            writer.write(encode_json_bytes(jid))
+        writer.close(trailing)
+        target, _, changed = self.publish(writer, f"index-{bucket:02d}")
+        self.keep.add(target.name)
+        self.written += int(changed)
+        return f"journal_chunks/{target.name}"
+
+    def write_lookup(self) -> str:
+        writer = JsonStreamWriter(CHUNK_DIR / "lookup.json.tmp", array_key="buckets")
+        by_bucket: List[List[int]] = [[] for _ in self.chunks_meta]
+        for jid, bucket in self.lookup.items():
+            by_bucket[bucket].append(int(jid))
+        for ids in by_bucket:
+            writer.write(encode_json_bytes(ids))
+        writer.close()
+        target, _, changed = self.publish(writer, "lookup")
+        self.keep.add(target.name)
+        self.written += int(changed)
+        return f"journal_chunks/{target.name}"
+
+    def close(self, meta: Dict[str, object]) -> Dict[str, object]:
+        for key, _ in sorted(self.open_writers.items(), key=lambda kv: kv[1][0]):
+            self.finish(key)
+        self.chunks_meta.sort(key=lambda item: int(item["bucket"]))
+        self.history_meta.sort(key=lambda item: int(item["bucket"]))
+        for item in self.chunks_meta + self.history_meta:
+            self.revision.update(str(item["sha256"]).encode("ascii"))
+        manifest_meta: Dict[str, object] = {
+            "generated_at": meta.get("generated_at"),
+            "revision": self.revision.hexdigest()[:CHUNK_HASH_LENGTH],
+            "total_journals": self.total,
+            "chunk_count": len(self.chunks_meta),
+            "strategy": self.strategy,
+            "source_file": OUT_FILE.name,
+        }
+        if self.strategy == "single":
+            manifest_meta["file_template"] = f"journal_chunks/{CHUNK_SINGLE_TEMPLATE}"
+            if self.split_history:
+                manifest_meta["history_file_template"] = f"journal_chunks/{CHUNK_HISTORY_TEMPLATE}"
+        elif self.strategy != "id_mod":
+            manifest_meta["chunk_bytes"] = self.chunk_bytes
+            manifest_meta["lookup_file"] = self.write_lookup()
+        if self.split_history:
+            manifest_meta["history_fields"] = list(CHUNK_HISTORY_FIELDS)
+        for pattern in ("chunk-*.json", "history-*.json", "index-*.json", "lookup.*.json", "journal-*.json"):
+            for old in CHUNK_DIR.glob(pattern):
+                if old.name not in self.keep:
+                    old.unlink(missing_ok=True)
+        payload: Dict[str, object] = {"meta": manifest_meta, "chunks": self.chunks_meta}
+        if self.split_history:
+            payload["history_chunks"] = self.history_meta
+        return payload
+
+
+class JournalDeltaTracker:
+    # Compares each encoded record against the previous build's fingerprints and reports
+    # added/changed/removed ids, optionally streaming the added and changed records to a patch file.
+    def __init__(self, patch: bool = False) -> None:
+        self.previous: Dict[str, List] = {}
+        self.base_revision = None
         try:
-            rid = int(raw_id)
-            if rid >= 0:
-                idx = rid % CHUNK_COUNT
-        except (TypeError, ValueError):
-            idx = None
-        if idx is None:
-            fallback_key = normalize_title(str(row.get("title") or ""))
-            idx = (sum(ord(ch) for ch in fallback_key) or 0) % CHUNK_COUNT
-        buckets[idx].append(row)
-
-    chunks_meta: List[Dict[str, object]] = []
-    for i, rows in enumerate(buckets):
-        rel = f"journal_chunks/chunk-{i:02d}.json"
-        (OUT_DIR / rel).write_text(
-            json.dumps({"journals": rows}, ensure_ascii=False, separators=(",", ":")),
+            payload = json.loads(FINGERPRINT_FILE.read_text(encoding="utf-8"))
+            self.previous = dict(payload.get("journals") or {})
+            self.base_revision = (payload.get("meta") or {}).get("revision")
+        except (OSError, ValueError, TypeError, AttributeError):
+            pass
+        self.current: Dict[str, List] = {}
+        self.added: List[Dict[str, object]] = []
+        self.changed: List[Dict[str, object]] = []
+        self.patch_writer = JsonStreamWriter(DELTA_PATCH_FILE.with_suffix(".json.tmp")) if patch else None
+
+    def add(self, row: Dict, encoded: bytes, bucket: Optional[int], published: Tuple[Optional[bytes], ...] = ()) -> None:
+        # The fingerprint covers the chunk (and history) records actually published, related journals
+        # included; encoded, the journals.json record, is what goes into the patch.
+        jid = str(row.get("id"))
+        digest = hashlib.sha256()
+        for part in [item for item in published if item is not None] or [encoded]:
+            digest.update(part)
+            digest.update(b"\n")
+        fingerprint = digest.hexdigest()[:FINGERPRINT_LENGTH]
+        self.current[jid] = [fingerprint, bucket]
+        previous = self.previous.get(jid)
+        if previous is not None and previous[0] == fingerprint:
+            return
+        entry = {"id": row.get("id"), "bucket": bucket}
+        (self.added if previous is None else self.changed).append(entry)
+        if self.patch_writer is not None:
+            self.patch_writer.write(encoded)
+
+    def removed(self) -> List[Dict[str, object]]:
+        rows = []
+        for jid, (_, bucket) in self.previous.items():
+            if jid not in self.current:
+                rows.append({"id": int(jid), "bucket": bucket})
+        rows.sort(key=lambda item: item["id"])
+        return rows
+
+    def close(self, meta: Dict[str, object]) -> Dict[str, object]:
+        removed = self.removed()
+        delta_meta = {
+            "generated_at": meta.get("generated_at"),
+            "revision": meta.get("revision"),
+            "base_revision": self.base_revision,
+            "chunk_strategy": meta.get("chunk_strategy"),
+            "added": len(self.added),
+            "changed": len(self.changed),
+            "removed": len(removed),
+            "patch_file": DELTA_PATCH_FILE.name if self.patch_writer is not None else None,
+        }
+        if self.patch_writer is not None:
+            self.patch_writer.close({"removed": [item["id"] for item in removed], "meta": delta_meta})
+            self.patch_writer.path.replace(DELTA_PATCH_FILE)
+        else:
+            DELTA_PATCH_FILE.unlink(missing_ok=True)
+        DELTA_FILE.write_text(
+            encode_json_compact({"meta": delta_meta, "added": self.added, "changed": self.changed, "removed": removed}),
             encoding="utf-8",
         )
-        chunks_meta.append(
-            {
-                "bucket": i,
-                "file": rel,
-                "count": len(rows),
-            }
+        tmp_file = FINGERPRINT_FILE.with_suffix(".tmp")
+        tmp_file.write_text(
+            json.dumps(
+                {"meta": {"revision": meta.get("revision")}, "journals": self.current},
+                ensure_ascii=False,
+                indent=0,
+                sort_keys=True,
+            ),
+            encoding="utf-8",
         )
+        tmp_file.replace(FINGERPRINT_FILE)
+        return delta_meta
 
-    return {
-        "meta": {
-            "generated_at": meta.get("generated_at"),
-            "total_journals": len(data),
-            "chunk_count": CHUNK_COUNT,
-            "strategy": "id_mod",
-            "source_file": OUT_FILE.name,
-        },
-        "chunks": chunks_meta,
-    }
+
+def write_chunk_record(
+    chunk_writer: ChunkSetWriter,
+    delta: JournalDeltaTracker,
+    row: Dict,
+    encoded: bytes,
+    split_history: bool,
+    related_rows=None,
+) -> None:
+    if split_history:
+        chunk_records = encode_chunk_records(row, True, related_rows)
+    elif related_rows is not None:
+        chunk_records = (append_json_field(encoded, "related", related_rows), None)
+    else:
+        chunk_records = (encoded, None)
+    delta.add(row, encoded, chunk_writer.add(row, *chunk_records), chunk_records)
+
+
+def build_journal_chunks(
+    data: List[Dict],
+    meta: Dict[str, object],
+    strategy: str = "id_mod",
+    chunk_count: int = CHUNK_COUNT,
+    chunk_bytes: int = CHUNK_TARGET_BYTES,
+    split_history: bool = True,
+) -> Dict[str, object]:
+    writer = ChunkSetWriter(strategy, chunk_count=chunk_count, chunk_bytes=chunk_bytes, split_history=split_history)
+    for row in data:
+        writer.add(row, *encode_chunk_records(row, split_history))
+    return writer.close(meta)
 
 
-def build() -> None:
+def precompressors() -> List[Tuple[str, Callable[[bytes], bytes]]]:
+    variants: List[Tuple[str, Callable[[bytes], bytes]]] = [
+        (".gz", lambda data: gzip.compress(data, compresslevel=9, mtime=0)),
+    ]
+    if _HAS_BROTLI:
+        variants.append((".br", lambda data: brotli.compress(data, quality=BROTLI_QUALITY)))
+    return variants
+
+
+def precompress_outputs(paths: List[Path]) -> Dict[str, int]:
+    # Writes .gz (and .br when brotli is importable) next to each published JSON file. A variant
+    # newer than its source is kept, so content-addressed chunks are only compressed once.
+    stats = {"compressed": 0, "skipped": 0, "removed": 0}
+    variants = precompressors()
+    for path in paths:
+        if not path.is_file():
+            continue
+        source_mtime = path.stat().st_mtime_ns
+        data = None
+        for suffix, compress in variants:
+            target = path.with_name(path.name + suffix)
+            if target.is_file() and target.stat().st_mtime_ns >= source_mtime:
+                stats["skipped"] += 1
+                continue
+            if data is None:
+                data = path.read_bytes()
+            tmp_file = target.with_name(target.name + ".tmp")
+            tmp_file.write_bytes(compress(data))
+            tmp_file.replace(target)
+            stats["compressed"] += 1
+    for folder in (OUT_DIR, CHUNK_DIR, SEARCH_SHARD_DIR):
+        for suffix in (".gz", ".br"):
+            for variant in folder.glob(f"*.json{suffix}"):
+                if not variant.with_name(variant.name[: -len(suffix)]).is_file():
+                    variant.unlink(missing_ok=True)
+                    stats["removed"] += 1
+    return stats
+
+
+def published_json_files() -> List[Path]:
+    paths = [OUT_FILE, SEARCH_INDEX_FILE, SUGGEST_INDEX_FILE, FACET_INDEX_FILE, SEARCH_SHARD_MANIFEST_FILE, CHUNK_MANIFEST_FILE]
+    paths.extend([DELTA_FILE, DELTA_PATCH_FILE])
+    paths.extend(sorted(CHUNK_DIR.glob("*.json")))
+    paths.extend(sorted(SEARCH_SHARD_DIR.glob("*.json")))
+    return paths
+
+
+def locate_source_inputs() -> List[Tuple[str, Path, Callable[[Path], Dict]]]:
+    inputs: List[Tuple[str, Path, Callable[[Path], Dict]]] = []
+    showjcr_dir = find_showjcr_data_dir()
+    db_file = find_showjcr_db_file(showjcr_dir) if showjcr_dir else None
+    if db_file:
+        inputs.append(("showjcr_db", db_file, parse_showjcr_db))
+    if XUANKAN_TIER_FILE.exists():
+        inputs.append(("xuankan_tier", XUANKAN_TIER_FILE, parse_xuankan_tier))
+    if XUANKAN_WARNING_FILE.exists():
+        inputs.append(("xuankan_warning", XUANKAN_WARNING_FILE, parse_xuankan_warning))
+    cscd_file = find_cscd_md_file()
+    if cscd_file:
+        inputs.append(("cscd_md", cscd_file, parse_cscd_md))
+    hq_file = choose_hq_md_file()
+    if hq_file:
+        inputs.append(("hq_catalog", hq_file, parse_hq_catalog))
+    return inputs
+
+
+def parse_sources_in_parallel(jobs: int, use_cache: bool = True) -> Dict[str, Dict]:
+    # Workers only parse; the merge into JournalStore stays single-threaded and in load order.
+    inputs = locate_source_inputs()
+    if jobs <= 1 or not inputs:
+        return {}
+    with ProcessPoolExecutor(max_workers=min(jobs, len(inputs))) as pool:
+        futures = {name: pool.submit(cached_parse, name, path, parser, use_cache) for name, path, parser in inputs}
+        return {name: future.result() for name, future in futures.items()}
+
+
+def build(
+    use_cache: bool = True,
+    jobs: int = 1,
+    store_backend: str = "memory",
+    chunk_strategy: str = "id_mod",
+    chunk_count: int = CHUNK_COUNT,
+    chunk_bytes: int = CHUNK_TARGET_BYTES,
+    delta_patch: bool = False,
+    search_index_format: str = "columnar",
+    precompress: bool = True,
+    related_limit: int = RELATED_LIMIT,
+    split_history: bool = True,
+    search_shard_rows: int = SHARD_ROW_BUDGET,
+    record_offsets: bool = True,
+) -> None:
     OUT_DIR.mkdir(parents=True, exist_ok=True)
-    store = JournalStore()
-    showjcr_meta = load_showjcr_data(store)
-    load_xuankan_tier(store)
-    load_xuankan_warning(store)
-    load_cscd_md(store)
-    hq_field_stats = load_hq_catalog(store)
-    cnki_meta = load_cnki_scholar_data(store)
-    nature_index_meta = load_nature_index_catalog(store)
-
-    data = store.finalize()
-    hq_catalog_journals = sum(1 for row in data if row.get("hq_catalog"))
+    generated_at = __import__("datetime").datetime.now().isoformat(timespec="seconds")
+    with create_journal_store(store_backend) as store:
+        parsed = parse_sources_in_parallel(jobs, use_cache=use_cache)
+        showjcr_meta = load_showjcr_data(store, use_cache=use_cache, parsed=parsed.get("showjcr_db"))
+        load_xuankan_tier(store, use_cache=use_cache, parsed=parsed.get("xuankan_tier"))
+        load_xuankan_warning(store, use_cache=use_cache, parsed=parsed.get("xuankan_warning"))
+        load_cscd_md(store, use_cache=use_cache, parsed=parsed.get("cscd_md"))
+        hq_field_stats = load_hq_catalog(store, use_cache=use_cache, parsed=parsed.get("hq_catalog"))
+        cnki_meta = load_cnki_scholar_data(store)
+        nature_index_meta = load_nature_index_catalog(store)
+
+        id_registry = JournalIdRegistry()
+        stable_ids = id_registry.assign(store)
+
+        related = None
+        if related_limit > 0 and _HAS_NUMPY:
+            related = RelatedJournals(limit=related_limit)
+        elif related_limit > 0:
+            print("numpy is not installed; detail pages will rank related journals in the browser.")
+
+        # Each finalized journal is encoded once and streamed to journals.json, its chunk and the search index.
+        journals_writer = JsonStreamWriter(OUT_FILE, item_sep=b",\n")
+        search_writer = SearchIndexWriter(search_index_format)
+        suggest_builder = SuggestIndexBuilder()
+        facet_builder = FacetIndexBuilder()
+        shard_builder = SearchShardBuilder(row_budget=search_shard_rows) if search_shard_rows > 0 else None
+        chunk_writer = ChunkSetWriter(
+            chunk_strategy,
+            chunk_count=chunk_count,
+            chunk_bytes=chunk_bytes,
+            split_history=split_history,
+            record_offsets=record_offsets,
+        )
+        delta = JournalDeltaTracker(patch=delta_patch)
+        # Related journals need the whole catalogue before any chunk record can be written, so with them on
+        # the encoded rows are spooled to a temporary file and chunked after ranking, not finalized twice.
+        spool = tempfile.TemporaryFile() if related is not None else None
+        hq_catalog_journals = 0
+        for row in store.iter_finalized():
+            row["id"] = stable_ids[row["id"]]
+            encoded = encode_json_bytes(row)
+            journals_writer.write(encoded)
+            search_row = search_writer.add(row)
+            if spool is not None:
+                related.add(search_row)
+                spool.write(encoded + b"\n")
+            else:
+                write_chunk_record(chunk_writer, delta, row, encoded, split_history)
+            suggest_builder.add(search_row)
+            facet_builder.add(search_row)
+            if shard_builder is not None:
+                shard_builder.add(search_row)
+            if row.get("hq_catalog"):
+                hq_catalog_journals += 1
+
+    if spool is not None:
+        related.compute()
+        spool.seek(0)
+        # Compact JSON escapes newlines inside strings, so every spooled line is one record.
+        for line in spool:
+            encoded = line.rstrip(b"\n")
+            row = json.loads(encoded)
+            write_chunk_record(chunk_writer, delta, row, encoded, split_history, related.related_rows(row["id"]))
+        spool.close()
+
+    chunk_manifest_payload = chunk_writer.close({"generated_at": generated_at})
+    total_journals = journals_writer.count
     hq_match_count = sum(1 for row in hq_field_stats if row.get("match_declared"))
-    payload = {
-        "meta": {
-            "generated_at": __import__("datetime").datetime.now().isoformat(timespec="seconds"),
-            "root_data_dir": str(DATA_DIR),
-            "cas_if_source": "showjcr_db" if showjcr_meta.get("showjcr_db_file") else "showjcr_csv",
-            **showjcr_meta,
-            **cnki_meta,
-            **nature_index_meta,
-            "total_journals": len(data),
-            "hq_catalog_journals": hq_catalog_journals,
-            "hq_field_count": len(hq_field_stats),
-            "hq_field_match_count": hq_match_count,
-            "hq_field_stats": hq_field_stats,
-        },
-        "journals": data,
+    meta = {
+        "generated_at": generated_at,
+        "revision": chunk_manifest_payload["meta"]["revision"],
+        "root_data_dir": str(DATA_DIR),
+        "cas_if_source": "showjcr_db" if showjcr_meta.get("showjcr_db_file") else "showjcr_csv",
+        **showjcr_meta,
+        **cnki_meta,
+        **nature_index_meta,
+        "total_journals": total_journals,
+        "hq_catalog_journals": hq_catalog_journals,
+        "hq_field_count": len(hq_field_stats),
+        "hq_field_match_count": hq_match_count,
+        "hq_field_stats": hq_field_stats,
     }
-    search_index_payload = build_search_index(data, payload["meta"])
-    chunk_manifest_payload = build_journal_chunks(data, payload["meta"])
-    OUT_FILE.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
-    SEARCH_INDEX_FILE.write_text(
-        json.dumps(search_index_payload, ensure_ascii=False, separators=(",", ":")),
+    journals_writer.close({"meta": meta})
+    search_writer.close(meta)
+    SUGGEST_INDEX_FILE.write_text(
+        encode_json_compact(
+            suggest_builder.to_payload(
+                {
+                    "generated_at": generated_at,
+                    "revision": meta["revision"],
+                    "source_file": SEARCH_INDEX_FILE.name,
+                }
+            )
+        ),
         encoding="utf-8",
     )
-    CHUNK_MANIFEST_FILE.write_text(
-        json.dumps(chunk_manifest_payload, ensure_ascii=False, separators=(",", ":")),
+    FACET_INDEX_FILE.write_text(
+        encode_json_compact(
+            facet_builder.to_payload(
+                {
+                    "generated_at": generated_at,
+                    "revision": meta["revision"],
+                    "source_file": SEARCH_INDEX_FILE.name,
+                }
+            )
+        ),
         encoding="utf-8",
     )
+    if shard_builder is not None:
+        shard_writer = SearchShardWriter()
+        shard_manifest_payload = shard_writer.write(shard_builder, meta)
+        SEARCH_SHARD_MANIFEST_FILE.write_text(encode_json_compact(shard_manifest_payload), encoding="utf-8")
+    else:
+        remove_search_shards()
+    CHUNK_MANIFEST_FILE.write_text(encode_json_compact(chunk_manifest_payload), encoding="utf-8")
+    id_registry.save()
+    delta_meta = delta.close({**chunk_manifest_payload["meta"], "chunk_strategy": chunk_strategy})
     HQ_STATS_FILE.write_text(json.dumps(hq_field_stats, ensure_ascii=False, indent=2), encoding="utf-8")
-    print(f"Generated {OUT_FILE} with {len(data)} journals.")
-    print(f"Generated {SEARCH_INDEX_FILE} with {len(search_index_payload['journals'])} journals.")
-    print(f"Generated {CHUNK_MANIFEST_FILE} with {CHUNK_COUNT} chunks.")
+    print(f"Generated {OUT_FILE} with {total_journals} journals.")
+    print(f"Generated {SEARCH_INDEX_FILE} ({search_index_format}) with {search_writer.count} journals.")
+    print(f"Generated {SUGGEST_INDEX_FILE} with {len(suggest_builder.grams)} trigrams.")
+    print(f"Generated {FACET_INDEX_FILE} with {len(facet_builder.tags)} tag bitmaps.")
+    if shard_builder is not None:
+        print(
+            f"Generated {SEARCH_SHARD_MANIFEST_FILE} with {len(shard_manifest_payload['shards'])} prefix shards "
+            f"({shard_writer.written} rewritten, at most {search_shard_rows} rows each)."
+        )
+    print(
+        f"Generated {CHUNK_MANIFEST_FILE} with {chunk_manifest_payload['meta']['chunk_count']} "
+        f"{chunk_strategy} chunks "
+        f"({chunk_writer.written} rewritten, revision {meta['revision']})."
+    )
+    if related is not None:
+        print(f"Embedded the top {related_limit} related journals in each chunk record.")
+    if split_history:
+        print(f"Moved {', '.join(CHUNK_HISTORY_FIELDS)} into the history chunk set.")
+    print(
+        f"Generated {DELTA_FILE} against {delta_meta['base_revision'] or 'no previous build'}: "
+        f"{delta_meta['added']} added, {delta_meta['changed']} changed, {delta_meta['removed']} removed."
+    )
+    if precompress:
+        stats = precompress_outputs(published_json_files())
+        print(
+            f"Precompressed {stats['compressed']} variants ({'gzip+brotli' if _HAS_BROTLI else 'gzip only'}), "
+            f"{stats['skipped']} unchanged, {stats['removed']} stale removed."
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build Journal Scout site data")
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help=f"re-parse every source instead of replaying records cached in {BUILD_CACHE_DIR.name}/",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="parse local sources in N worker processes (merge order is unchanged)",
+    )
+    parser.add_argument(
+        "--store",
+        choices=["memory", "sqlite"],
+        default="memory",
+        help="journal store backend; sqlite stages journals in a temporary database to bound memory",
+    )
+    parser.add_argument(
+        "--chunk-strategy",
+        choices=CHUNK_STRATEGIES,
+        default="id_mod",
+        help="detail chunk layout: id_mod, bytes (size budget), category (latest CAS 大类) or single (one file per journal)",
+    )
+    parser.add_argument("--chunk-count", type=int, default=CHUNK_COUNT, help="number of buckets for id_mod")
+    parser.add_argument(
+        "--chunk-bytes",
+        type=int,
+        default=CHUNK_TARGET_BYTES,
+        help="target chunk size in bytes for the bytes and category strategies",
+    )
+    parser.add_argument(
+        "--delta-patch",
+        action="store_true",
+        help=f"also write {DELTA_PATCH_FILE.name} with the added and changed records since the previous build",
+    )
+    parser.add_argument(
+        "--search-index-format",
+        choices=SEARCH_INDEX_FORMATS,
+        default="columnar",
+        help="search_index.json layout: columnar (dictionary-encoded columns) or rows (one object per journal)",
+    )
+    parser.add_argument(
+        "--no-precompress",
+        action="store_true",
+        help="skip writing .gz/.br variants next to the published JSON files",
+    )
+    parser.add_argument(
+        "--related-limit",
+        type=int,
+        default=RELATED_LIMIT,
+        help="related journals precomputed into each chunk record (needs numpy; 0 leaves ranking to the detail page)",
+    )
+    parser.add_argument(
+        "--no-history-split",
+        action="store_true",
+        help="keep history/catalogue fields in the chunk records instead of separate history-NN chunks",
+    )
+    parser.add_argument(
+        "--search-shard-rows",
+        type=int,
+        default=SHARD_ROW_BUDGET,
+        help="row budget per prefix shard of the search index (0 skips the shards and removes old ones)",
+    )
+    parser.add_argument(
+        "--no-chunk-index",
+        action="store_true",
+        help="skip the per-chunk index-NN files with each record's byte offset and length",
+    )
+    args = parser.parse_args()
+    build(
+        use_cache=not args.no_cache,
+        jobs=args.jobs,
+        store_backend=args.store,
+        chunk_strategy=args.chunk_strategy,
+        chunk_count=args.chunk_count,
+        chunk_bytes=args.chunk_bytes,
+        delta_patch=args.delta_patch,
+        search_index_format=args.search_index_format,
+        precompress=not args.no_precompress,
+        related_limit=args.related_limit,
+        split_history=not args.no_history_split,
+        search_shard_rows=args.search_shard_rows,
+        record_offsets=not args.no_chunk_index,
+    )
 
 
 if __name__ == "__main__":
-    build()
+    main()
@@ -100,13 +100,13 @@ const pageState = {
   submissionStats: null,
   submissionNotice: null,
   submissionLoading: false,
+  dataRevision: "",
 };
 
 const API_BASE = ["127.0.0.1", "localhost"].includes(window.location.hostname)
   ? "http://127.0.0.1:8000/api"
   : "https://www.scansci.com/api";
 const ELSEVIER_API_TIMEOUT_MS = 2200;
-const DETAIL_PAGE_REV = "20260327-ni-v1";
 
 const CHUNK_MANIFEST_PATHS = [
   "./data/journal_chunks_manifest.json",
@@ -281,10 +281,11 @@ function getParams() {
   };
 }
 
-function ensureDetailPageRevision() {
+function ensureDetailPageRevision(revision) {
+  if (!revision) return;
   const u = new URL(window.location.href);
-  if (u.searchParams.get("v") === DETAIL_PAGE_REV) return;
-  u.searchParams.set("v", DETAIL_PAGE_REV);
+  if (u.searchParams.get("v") === revision) return;
+  u.searchParams.set("v", revision);
   window.history.replaceState(null, "", u.toString());
 }
 
@@ -1961,9 +1962,14 @@ function renderShowJCRHistory(j) {
 
   els.ifTrendChart.innerHTML = buildIFTrend(ifRows);
   els.casTrendChart.innerHTML = buildCASTrend(casRows);
-  if (els.annualTrendChart) {
-    els.annualTrendChart.innerHTML = "<p class='placeholder'>正在加载年发文量数据…</p>";
-  }
+}
+
+function renderHistoryUnavailable() {
+  const message = "<p class='placeholder'>历年数据加载失败，请刷新重试</p>";
+  els.ifTrendChart.innerHTML = message;
+  els.casTrendChart.innerHTML = message;
+  els.hqMetaGrid.innerHTML = "";
+  els.hqRecordList.innerHTML = message;
 }
 
 function renderHQ(j) {
@@ -2409,14 +2415,17 @@ function pickLatestCASRecord(row) {
 }
 
 function buildCASProfile(row) {
+  // Full records carry cas_history; search-index rows only the latest cas_category/cas_subcategories.
   const latest = pickLatestCASRecord(row);
-  const majorRaw = String(latest?.category || "").trim();
+  const majorRaw = String((latest ? latest.category : row?.cas_category) || "").trim();
   const majorKey = normalizeCASKey(majorRaw);
-  const subRows = Array.isArray(latest?.subcategories) ? latest.subcategories : [];
+  const subNames = latest
+    ? (Array.isArray(latest.subcategories) ? latest.subcategories : []).map((item) => item?.name)
+    : Array.isArray(row?.cas_subcategories) ? row.cas_subcategories : [];
   const subKeys = new Set();
   const subNameMap = new Map();
-  for (const item of subRows) {
-    const name = String(item?.name || "").trim();
+  for (const rawName of subNames) {
+    const name = String(rawName || "").trim();
     if (!name) continue;
     const key = normalizeCASKey(name);
     if (!key) continue;
@@ -2486,6 +2495,44 @@ function computeRelatedSimilarity(base, candidate, baseCAS = null, candidateCAS
   return { score, reasons, ifDiff, casPriority, majorMatch, subMatchCount };
 }
 
+// Precomputed by build_data.py (related_journals.RELATED_COLUMNS); keep the column order in step.
+const RELATED_COLUMNS = [
+  "id",
+  "title",
+  "issn",
+  "cn_number",
+  "if_2023",
+  "jcr_quartile",
+  "cas_2025",
+  "is_top",
+  "score",
+  "sub_label",
+  "reason_flags",
+];
+const RELATED_REASON_FLAGS = [
+  [1, "同中科院大类"],
+  [2, "同中科院分区"],
+  [4, "同JCR分区"],
+  [8, "同科协等级"],
+  [16, "均为Top"],
+];
+
+function decodePrecomputedRelated(rows) {
+  if (!Array.isArray(rows)) return null;
+  return rows.map((values) => {
+    const item = {};
+    RELATED_COLUMNS.forEach((name, idx) => {
+      item[name] = values[idx] === undefined ? null : values[idx];
+    });
+    const { score, sub_label: subLabel, reason_flags: flags, ...journal } = item;
+    const reasons = subLabel === null ? [] : [subLabel ? `同中科院小类（${subLabel}）` : "同中科院小类"];
+    for (const [bit, reason] of RELATED_REASON_FLAGS) {
+      if (flags & bit) reasons.push(reason);
+    }
+    return { ...journal, _relatedScore: score, _relatedReasons: reasons };
+  });
+}
+
 function findRelated(all, current, limit = 24) {
   const baseCAS = buildCASProfile(current);
   const candidates = all
@@ -2513,7 +2560,7 @@ function findRelated(all, current, limit = 24) {
 }
 
 function renderRelated(all, current, q) {
-  const rel = findRelated(all, current);
+  const rel = decodePrecomputedRelated(current.related) || findRelated(all, current);
   if (!rel.length) {
     els.relatedList.innerHTML = "<p class='placeholder'>暂无相近期刊建议</p>";
     return;
@@ -2524,7 +2571,7 @@ function renderRelated(all, current, q) {
       const u = new URL("./journal.html", window.location.href);
       u.searchParams.set("id", String(r.id));
       if (q) u.searchParams.set("q", q);
-      u.searchParams.set("v", DETAIL_PAGE_REV);
+      if (pageState.dataRevision) u.searchParams.set("v", pageState.dataRevision);
       const casTag = r.is_top === true ? `${safe(r.cas_2025)} (Top)` : safe(r.cas_2025);
       return `
         <a class="related-item" href="${u.toString()}">
@@ -2699,23 +2746,154 @@ function toSafeBucket(id, chunkCount) {
   return Math.abs(Math.trunc(n)) % chunkCount;
 }
 
-async function loadJournalFromChunks(id) {
-  const manifest = await fetchJsonWithFallback(CHUNK_MANIFEST_PATHS, "default");
+const chunkLookupCache = new Map();
+
+async function loadChunkLookup(rel) {
+  if (!chunkLookupCache.has(rel)) {
+    const promise = fetchJsonWithFallback(resolveDataPathCandidates(rel), "default").then((payload) => {
+      const lookup = new Map();
+      const buckets = Array.isArray(payload?.buckets) ? payload.buckets : [];
+      buckets.forEach((ids, bucket) => {
+        for (const jid of Array.isArray(ids) ? ids : []) lookup.set(Number(jid), bucket);
+      });
+      return lookup;
+    });
+    promise.catch(() => chunkLookupCache.delete(rel));
+    chunkLookupCache.set(rel, promise);
+  }
+  return chunkLookupCache.get(rel);
+}
+
+async function resolveChunkBucket(manifest, id) {
   const meta = manifest?.meta || {};
-  const chunkCountRaw = Number(meta.chunk_count);
-  const chunkCount = Number.isFinite(chunkCountRaw) && chunkCountRaw > 0 ? chunkCountRaw : 64;
-  const bucket = toSafeBucket(id, chunkCount);
+  const strategy = String(meta.strategy || "id_mod");
+  if (strategy === "id_mod") {
+    const chunkCountRaw = Number(meta.chunk_count);
+    const chunkCount = Number.isFinite(chunkCountRaw) && chunkCountRaw > 0 ? chunkCountRaw : 64;
+    return toSafeBucket(id, chunkCount);
+  }
+  if (strategy !== "single" && meta.lookup_file) {
+    const lookup = await loadChunkLookup(String(meta.lookup_file));
+    return lookup.has(Number(id)) ? lookup.get(Number(id)) : null;
+  }
+  return null;
+}
+
+async function resolveChunkFile(manifest, id, chunkSet = "chunks") {
+  // chunkSet "history_chunks" resolves the parallel history file (same bucket, history-NN stem).
+  const meta = manifest?.meta || {};
+  const isHistory = chunkSet === "history_chunks";
+  if (String(meta.strategy || "id_mod") === "single") {
+    const template = isHistory ? meta.history_file_template : meta.file_template;
+    return String(template || "").replace("{id}", String(Math.trunc(Number(id))));
+  }
+
+  const bucket = await resolveChunkBucket(manifest, id);
+  if (bucket === null) return "";
 
-  const chunkMeta = Array.isArray(manifest?.chunks)
-    ? manifest.chunks.find((x) => Number(x?.bucket) === bucket)
+  const chunkMeta = Array.isArray(manifest?.[chunkSet])
+    ? manifest[chunkSet].find((x) => Number(x?.bucket) === bucket)
     : null;
-  const defaultRel = `journal_chunks/chunk-${String(bucket).padStart(2, "0")}.json`;
-  const rel = String(chunkMeta?.file || defaultRel);
+  const defaultRel = `journal_chunks/${isHistory ? "history" : "chunk"}-${String(bucket).padStart(2, "0")}.json`;
+  return String(chunkMeta?.file || defaultRel);
+}
+
+const chunkIndexCache = new Map();
+
+async function loadChunkIndex(rel) {
+  if (!chunkIndexCache.has(rel)) {
+    const promise = fetchJsonWithFallback(resolveDataPathCandidates(rel), "default").then((payload) => {
+      const positions = new Map();
+      (Array.isArray(payload?.ids) ? payload.ids : []).forEach((jid, pos) => positions.set(Number(jid), pos));
+      return { positions, chunk: payload?.chunk || null, history: payload?.history || null };
+    });
+    promise.catch(() => chunkIndexCache.delete(rel));
+    chunkIndexCache.set(rel, promise);
+  }
+  return chunkIndexCache.get(rel);
+}
+
+async function fetchRecordRange(path, start, length) {
+  const res = await fetch(path, {
+    cache: "default",
+    headers: { Accept: "application/json", Range: `bytes=${start}-${start + length - 1}` },
+  });
+  if (!res.ok) throw new Error(`HTTP ${res.status} @ ${path}`);
+  if (res.status === 206) return JSON.parse(await res.text());
+  // Servers without Range support answer 200 with the whole file; the offsets still apply to it.
+  const bytes = new Uint8Array(await res.arrayBuffer());
+  return JSON.parse(new TextDecoder().decode(bytes.subarray(start, start + length)));
+}
+
+async function loadRecordByRange(manifest, id, chunkSet = "chunks") {
+  // index-NN lists each record's byte offset and length, so one ranged GET replaces the whole chunk.
+  // Returns null whenever the index is missing or disagrees, and the caller falls back to the chunk.
+  try {
+    const bucket = await resolveChunkBucket(manifest, id);
+    if (bucket === null) return null;
+    const chunkMeta = Array.isArray(manifest?.chunks)
+      ? manifest.chunks.find((x) => Number(x?.bucket) === bucket)
+      : null;
+    if (!chunkMeta?.index) return null;
+    const index = await loadChunkIndex(String(chunkMeta.index));
+    const part = chunkSet === "history_chunks" ? index.history : index.chunk;
+    const pos = index.positions.get(Number(id));
+    if (!part?.file || pos === undefined) return null;
+    const start = Number(part.offsets?.[pos]);
+    const length = Number(part.lengths?.[pos]);
+    if (!Number.isFinite(start) || !(length > 0)) return null;
+    for (const path of resolveDataPathCandidates(String(part.file))) {
+      try {
+        const row = await fetchRecordRange(path, start, length);
+        return Number(row?.id) === Number(id) ? row : null;
+      } catch (err) {
+        // try the next candidate path
+      }
+    }
+  } catch (err) {
+    console.warn("Ranged record loading failed, fallback to chunk:", err);
+  }
+  return null;
+}
+
+async function loadJournalFromChunks(id) {
+  // The manifest is the only unhashed entry point; chunk files are content-addressed and immutable.
+  const manifest = await fetchJsonWithFallback(CHUNK_MANIFEST_PATHS, "no-cache");
+  const meta = manifest?.meta || {};
+  const ranged = await loadRecordByRange(manifest, id);
+  if (ranged) return { row: ranged, meta, rows: [], manifest };
+  const rel = await resolveChunkFile(manifest, id);
+  if (!rel) return { row: null, meta, rows: [], manifest };
 
   const chunkPayload = await fetchJsonWithFallback(resolveDataPathCandidates(rel), "default");
   const rows = Array.isArray(chunkPayload?.journals) ? chunkPayload.journals : [];
   const row = rows.find((r) => Number(r?.id) === Number(id)) || null;
-  return { row, meta, rows };
+  return { row, meta, rows, manifest };
+}
+
+async function loadJournalHistory(detailPayload, id) {
+  // Chunk records leave meta.history_fields (trend charts, HQ catalogue, related) to the history chunk.
+  try {
+    const ranged = await loadRecordByRange(detailPayload.manifest, id, "history_chunks");
+    if (ranged) return ranged;
+    const rel = await resolveChunkFile(detailPayload.manifest, id, "history_chunks");
+    if (rel) {
+      const payload = await fetchJsonWithFallback(resolveDataPathCandidates(rel), "default");
+      const rows = Array.isArray(payload?.journals) ? payload.journals : [];
+      const history = rows.find((r) => Number(r?.id) === Number(id));
+      if (history) return history;
+    }
+  } catch (err) {
+    console.warn("History chunk loading failed, fallback to full data:", err);
+  }
+  try {
+    const fullPayload = await loadJournalFromFullData(id);
+    if (fullPayload.row) return fullPayload.row;
+  } catch (err) {
+    console.warn("Full data loading failed:", err);
+  }
+  // Callers must not render the summary record's trimmed cas_history as if it were the full history.
+  return null;
 }
 
 async function loadJournalFromFullData(id) {
@@ -2737,7 +2915,7 @@ async function loadJournalById(id) {
 }
 
 async function loadRelatedRows() {
-  const payload = await fetchJsonWithFallback(SEARCH_INDEX_PATHS, "default");
+  const payload = decodeSearchIndexPayload(await fetchJsonWithFallback(SEARCH_INDEX_PATHS, "default"));
   return {
     rows: Array.isArray(payload?.journals) ? payload.journals : [],
     meta: payload?.meta || {},
@@ -2745,7 +2923,6 @@ async function loadRelatedRows() {
 }
 
 async function bootstrap() {
-  ensureDetailPageRevision();
   bindSourceModalEvents();
   bindChartModalEvents();
   bindSubmissionEvents();
@@ -2758,10 +2935,11 @@ async function bootstrap() {
     els.submissionPanel.innerHTML = "<p class='placeholder'>正在加载投稿参考...</p>";
   }
 
-  const relatedPromise = loadRelatedRows().catch(() => ({ rows: [], meta: {} }));
   const detailPayload = await loadJournalById(id);
   const row = detailPayload.row;
   const meta = detailPayload.meta || {};
+  pageState.dataRevision = String(meta.revision || "");
+  ensureDetailPageRevision(pageState.dataRevision);
 
   els.genInfo.textContent = `数据更新时间：${meta.generated_at || "-"}`;
 
@@ -2788,19 +2966,47 @@ async function bootstrap() {
   pageState.submissionStats = null;
   pageState.submissionNotice = null;
   renderRow(row, meta);
-  renderShowJCRHistory(row);
-  renderHQ(row);
+  if (els.annualTrendChart) {
+    els.annualTrendChart.innerHTML = "<p class='placeholder'>正在加载年发文量数据…</p>";
+  }
   loadAndRenderSubmissionStats(row);
+  let historyMissing = false;
+  if (detailPayload.manifest && Array.isArray(meta.history_fields)) {
+    els.ifTrendChart.innerHTML = "<p class='placeholder'>正在加载历年数据...</p>";
+    els.casTrendChart.innerHTML = "<p class='placeholder'>正在加载历年数据...</p>";
+    els.hqMetaGrid.innerHTML = "";
+    els.hqRecordList.innerHTML = "<p class='placeholder'>正在加载...</p>";
+    els.relatedList.innerHTML = "<p class='placeholder'>正在加载相近期刊...</p>";
+    const history = await loadJournalHistory(detailPayload, id);
+    if (history) {
+      Object.assign(row, history);
+    } else {
+      historyMissing = true;
+    }
+  }
+  if (historyMissing) {
+    renderHistoryUnavailable();
+  } else {
+    renderShowJCRHistory(row);
+    renderHQ(row);
+  }
+  if (Array.isArray(row.related)) {
+    // Chunk records carry the build-time ranking; no search index download or scoring needed.
+    renderRelated([], row, q);
+    return;
+  }
   els.relatedList.innerHTML = "<p class='placeholder'>正在加载相近期刊...</p>";
-  relatedPromise.then((relatedPayload) => {
-    const relatedRows =
-      Array.isArray(relatedPayload.rows) && relatedPayload.rows.length
-        ? relatedPayload.rows
-        : Array.isArray(detailPayload.rows)
-        ? detailPayload.rows
-        : [];
-    renderRelated(relatedRows, row, q);
-  });
+  loadRelatedRows()
+    .catch(() => ({ rows: [], meta: {} }))
+    .then((relatedPayload) => {
+      const relatedRows =
+        Array.isArray(relatedPayload.rows) && relatedPayload.rows.length
+          ? relatedPayload.rows
+          : Array.isArray(detailPayload.rows)
+          ? detailPayload.rows
+          : [];
+      renderRelated(relatedRows, row, q);
+    });
 }
 
 bootstrap().catch((err) => {
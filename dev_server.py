@@ -1,27 +1,56 @@
 from __future__ import annotations
 
 import argparse
-import copy
+import datetime
+import email.utils
+import io
 import ipaddress
 import json
+import math
 import os
+import queue
 import re
+import threading
 import time
 from collections import OrderedDict
 from html.parser import HTMLParser
 from http import HTTPStatus
 from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
-from typing import Any, Dict, List, Tuple
+from typing import Any, Callable, Dict, List, Tuple
 from urllib import error, parse, request
 
+from response_cache import InFlightTimeout, PreparedJson, SingleFlight, SqliteResponseStore, StripedLRUCache
+from search_query import SuggestIndex
+
 
 BASE_DIR = Path(__file__).resolve().parent
 ELSEVIER_URL = "https://api.elsevier.com/content/serial/title"
+# CiteScore/SJR/SNIP change once a year; unknown ISSNs are re-checked daily.
+ELSEVIER_CACHE_TTL_SECONDS = 7 * 24 * 60 * 60
+ELSEVIER_NOT_FOUND_TTL_SECONDS = 24 * 60 * 60
+ELSEVIER_CACHE_MAX_ITEMS = 4096
+# Browser-side lifetimes of API answers; ETags let expired copies revalidate with a 304.
+ELSEVIER_CACHE_CONTROL = "public, max-age=86400"
+ELSEVIER_NOT_FOUND_CACHE_CONTROL = "public, max-age=3600"
+PREVIEW_CACHE_CONTROL = "public, max-age=3600"
+STALE_CACHE_CONTROL = "no-cache"
+ERROR_CACHE_CONTROL = "no-store"
+SERVER_CACHE_DIR = BASE_DIR / ".server_cache"
+ISSN_VALUE_RE = re.compile(r"^(\d{4})-?(\d{3}[\dX])$")
 MAX_PREVIEW_HTML_BYTES = 1_500_000
 PREVIEW_TIMEOUT_SECONDS = 9.0
+# How long a request waits on another thread's fetch of the same page before giving up with 504.
+PREVIEW_WAIT_SECONDS = 15.0
 PREVIEW_CACHE_TTL_SECONDS = 6 * 60 * 60
 PREVIEW_CACHE_MAX_ITEMS = 512
+# Expired previews are served as-is for this long while a background worker refetches them; the disk
+# copy is kept longer still, as the last good answer when the site is down.
+PREVIEW_STALE_SECONDS = 30 * 24 * 60 * 60
+PREVIEW_KEEP_SECONDS = 90 * 24 * 60 * 60
+PREVIEW_RETRY_SECONDS = 10 * 60
+PREVIEW_REFRESH_WORKERS = 2
+PREVIEW_REFRESH_QUEUE_SIZE = 256
 PREVIEW_MIN_COVER_SCORE = 90
 WEB_PREVIEW_HEADERS = {
     "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
@@ -41,16 +70,247 @@ PREVIEW_IMAGE_KEYS = {
     "thumbnail",
     "thumbnailurl",
 }
-_preview_cache: OrderedDict[str, Tuple[float, Dict[str, Any]]] = OrderedDict()
+PRECOMPRESSED_VARIANTS = (("br", ".br"), ("gzip", ".gz"))
+BYTE_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+IMMUTABLE_CHUNK_RE = re.compile(
+    r"/data/(?:journal_chunks/(?:chunk-\d+|history-\d+|index-\d+|lookup)|search_shards/(?:shard-[0-9a-f]+|popular))"
+    r"\.[0-9a-f]{12}\.json$"
+)
+# Only real content is cached for a year; a 404 for a hash the client raced ahead to must stay retryable.
+IMMUTABLE_STATUSES = {HTTPStatus.OK, HTTPStatus.PARTIAL_CONTENT, HTTPStatus.NOT_MODIFIED}
+SEARCH_INDEX_FILE = BASE_DIR / "data" / "search_index.json"
+SUGGEST_INDEX_FILE = BASE_DIR / "data" / "suggest_index.json"
+SEARCH_DEFAULT_LIMIT = 12
+SEARCH_MAX_LIMIT = 50
+SEARCH_CACHE_MAX_ITEMS = 2048
+# Cached payloads are shared between threads and never mutated; responses add their flags to a shallow copy.
+_preview_cache = StripedLRUCache(PREVIEW_CACHE_MAX_ITEMS)
+PreviewEntry = Tuple[float, float, Dict[str, Any], PreparedJson]
+_preview_store: SqliteResponseStore | None = None
+_preview_flight = SingleFlight()
+_search_index: SuggestIndex | None = None
+_search_cache: OrderedDict[Tuple[str, int, float | None], List[int]] = OrderedDict()
+_search_cache_lock = threading.Lock()
+
+
+def normalize_issn(raw: Any) -> str:
+    match = ISSN_VALUE_RE.match(str(raw or "").strip().upper())
+    return f"{match.group(1)}-{match.group(2)}" if match else ""
+
+
+class ElsevierCache:
+    # Serial-title responses in an LRU in memory over an optional SQLite store. A 200 is stored under the
+    # canonical ISSN (the print ISSN when the catalogue or a response pairs it with an eISSN) and answers
+    # both ISSNs; a 404 only answers the ISSN that was asked, since Elsevier sometimes knows a journal by
+    # one of them alone. Concurrent misses for the same ISSN share one upstream call; only 200 and 404
+    # answers are cached, and an expired entry is still served when the upstream call fails.
+    def __init__(
+        self,
+        store: SqliteResponseStore | None = None,
+        ttl: float = ELSEVIER_CACHE_TTL_SECONDS,
+        not_found_ttl: float = ELSEVIER_NOT_FOUND_TTL_SECONDS,
+        max_items: int = ELSEVIER_CACHE_MAX_ITEMS,
+    ) -> None:
+        self.store = store
+        self.ttl = ttl
+        self.not_found_ttl = not_found_ttl
+        self.memory = StripedLRUCache(max_items)
+        self.aliases: Dict[str, str] = {}
+        self.flight = SingleFlight()
+        if store is not None:
+            for _, value, _, _ in store.items():
+                self.learn_from_payload(value.get("payload"))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.memory.stats(),
+            "stored": self.store.count() if self.store is not None else None,
+            "aliases": len(self.aliases),
+            "in_flight": self.flight.in_flight(),
+        }
 
+    def canonical(self, issn: Any) -> str:
+        normalized = normalize_issn(issn)
+        return self.aliases.get(normalized, normalized)
 
-def json_response(handler: SimpleHTTPRequestHandler, status: int, payload: Dict) -> None:
-    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
-    handler.send_response(status)
-    handler.send_header("Content-Type", "application/json; charset=utf-8")
-    handler.send_header("Content-Length", str(len(body)))
+    def link(self, issn: Any, eissn: Any, override: bool = True) -> None:
+        print_issn, e_issn = normalize_issn(issn), normalize_issn(eissn)
+        if not print_issn or not e_issn or print_issn == e_issn:
+            return
+        target = self.aliases.get(print_issn, print_issn)
+        if override or e_issn not in self.aliases:
+            self.aliases[e_issn] = target
+
+    def learn_aliases(self, rows: List[Dict]) -> None:
+        for row in rows:
+            self.link(row.get("issn"), row.get("eissn"))
+
+    def learn_from_payload(self, payload: Any) -> None:
+        # Pairs reported by Elsevier never override the catalogue's.
+        response = payload.get("serial-metadata-response") if isinstance(payload, dict) else None
+        entries = response.get("entry") if isinstance(response, dict) else None
+        for entry in entries if isinstance(entries, list) else []:
+            if isinstance(entry, dict):
+                self.link(entry.get("prism:issn"), entry.get("prism:eIssn"), override=False)
+
+    def lookup(self, key: str) -> Tuple[float, float, int, PreparedJson] | None:
+        entry = self.memory.get(key)
+        if entry is not None:
+            return entry
+        if self.store is None:
+            return None
+        stored = self.store.get(key)
+        if stored is None:
+            return None
+        value, fetched_at, expires_at = stored
+        entry = (fetched_at, expires_at, int(value.get("status") or 0), PreparedJson(value.get("payload") or {}))
+        self.remember(key, entry)
+        return entry
+
+    def remember(self, key: str, entry: Tuple[float, float, int, PreparedJson]) -> None:
+        self.memory.set(key, entry)
+
+    def usable_entry(self, issn: str, now: float) -> Tuple[float, float, int, PreparedJson] | None:
+        # The ISSN's own entry, or a 200 shared through its canonical ISSN; fresh beats expired, 200 beats 404.
+        own = self.lookup(issn)
+        key = self.canonical(issn)
+        shared = self.lookup(key) if key != issn else None
+        if shared is not None and shared[2] != HTTPStatus.OK:
+            shared = None
+        entries = [entry for entry in (own, shared) if entry is not None]
+        if not entries:
+            return None
+        return max(entries, key=lambda entry: (entry[1] > now, entry[2] == HTTPStatus.OK, entry[0]))
+
+    def fetch_and_store(
+        self, issn: str, fetch: Callable[[str], Tuple[int, Dict]]
+    ) -> Tuple[int, Dict | PreparedJson, bool]:
+        status, payload = fetch(issn)
+        now = time.time()
+        if status == HTTPStatus.OK:
+            self.learn_from_payload(payload)
+            key, ttl = self.canonical(issn), self.ttl
+        elif status == HTTPStatus.NOT_FOUND:
+            key, ttl = normalize_issn(issn), self.not_found_ttl
+            current = self.lookup(key)
+            if current is not None and current[2] == HTTPStatus.OK and current[1] > now:
+                # The other ISSN found this journal while we were fetching; answer with the cached 200.
+                return current[2], current[3], True
+        else:
+            return status, payload, False
+        prepared = PreparedJson(payload)
+        self.remember(key, (now, now + ttl, status, prepared))
+        if self.store is not None:
+            self.store.put(key, {"status": status, "payload": payload}, now + ttl, fetched_at=now)
+        return status, prepared, True
+
+    def get(self, issn: str, fetch: Callable[[str], Tuple[int, Dict]]) -> Tuple[int, Dict | PreparedJson, str, float]:
+        # (status, response, cache status, age in seconds); cached answers come back as PreparedJson.
+        # Cache status is HIT, MISS, COALESCED (answered by
+        # another request's upstream call), STALE (upstream failed, expired entry served) or BYPASS.
+        requested = normalize_issn(issn)
+        if not requested:
+            status, payload = fetch(issn)
+            return status, payload, "BYPASS", 0.0
+        now = time.time()
+        entry = self.usable_entry(requested, now)
+        if entry is not None and entry[1] > now:
+            return entry[2], entry[3], "HIT", now - entry[0]
+        (status, payload, cached), shared = self.flight.do(requested, lambda: self.fetch_and_store(issn, fetch))
+        if not cached and entry is not None:
+            return entry[2], entry[3], "STALE", now - entry[0]
+        return status, payload, "COALESCED" if shared else "MISS", 0.0
+
+
+_elsevier_cache = ElsevierCache()
+
+
+def json_response(
+    handler: SimpleHTTPRequestHandler,
+    status: int,
+    payload: Dict | PreparedJson,
+    headers: Dict[str, str] | None = None,
+) -> None:
+    # Cached results arrive as PreparedJson and are sent without serializing again, with an ETag and a
+    # gzip body when one was prepared; a matching If-None-Match on a 200 gets a bodyless 304. Live
+    # payloads (searches, errors, stats) are serialized once and sent as they are.
+    if not isinstance(payload, PreparedJson):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        handler.send_response(status)
+        handler.send_header("Content-Type", "application/json; charset=utf-8")
+        handler.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            handler.send_header(name, value)
+        handler.end_headers()
+        handler.wfile.write(body)
+        return
+    prepared = payload
+    use_gzip = prepared.gzipped is not None and accepts_encoding(
+        parse_accept_encoding(handler.headers.get("Accept-Encoding", "")), "gzip"
+    )
+    etag = prepared.gzip_etag if use_gzip else prepared.etag
+    not_modified = status == HTTPStatus.OK and prepared.matches(handler.headers.get("If-None-Match", ""))
+    body = b"" if not_modified else prepared.gzipped if use_gzip else prepared.body
+    handler.send_response(HTTPStatus.NOT_MODIFIED if not_modified else status)
+    if not not_modified:
+        handler.send_header("Content-Type", "application/json; charset=utf-8")
+        handler.send_header("Content-Length", str(len(body)))
+        if use_gzip:
+            handler.send_header("Content-Encoding", "gzip")
+    if prepared.gzipped is not None:
+        handler.send_header("Vary", "Accept-Encoding")
+    handler.send_header("ETag", etag)
+    for name, value in (headers or {}).items():
+        handler.send_header(name, value)
     handler.end_headers()
-    handler.wfile.write(body)
+    if body:
+        handler.wfile.write(body)
+
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    weights: Dict[str, float] = {}
+    for part in str(header or "").split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[token] = q
+    return weights
+
+
+def accepts_encoding(weights: Dict[str, float], encoding: str) -> bool:
+    if encoding in weights:
+        return weights[encoding] > 0
+    return weights.get("*", 0) > 0
+
+
+def parse_byte_range(header: str, size: int) -> Tuple[int, int] | None:
+    # Single "bytes=a-b", "bytes=a-" or "bytes=-n" range as (first, last) inclusive. Multiple or malformed
+    # ranges return None (the whole file is served); unsatisfiable ones raise ValueError (416).
+    match = BYTE_RANGE_RE.match(header.strip())
+    if not match or not (match.group(1) or match.group(2)):
+        return None
+    first_raw, last_raw = match.groups()
+    if not first_raw:
+        suffix = int(last_raw)
+        if suffix == 0 or size == 0:
+            raise ValueError("unsatisfiable_range")
+        return max(0, size - suffix), size - 1
+    first = int(first_raw)
+    last = int(last_raw) if last_raw else size - 1
+    if last_raw and last < first:
+        return None
+    if first >= size:
+        raise ValueError("unsatisfiable_range")
+    return first, min(last, size - 1)
 
 
 def resolve_api_key(handler: SimpleHTTPRequestHandler) -> str:
@@ -431,32 +691,167 @@ def parse_web_preview_candidates(html_text: str, base_url: str) -> List[Dict[str
     return rank_preview_candidates(deduped)
 
 
-def get_cached_preview(url: str) -> Dict[str, Any] | None:
+def get_cached_preview(url: str) -> PreviewEntry | None:
+    # (fetched_at, expires_at, payload, prepared "cached" response) from memory, else from the disk store;
+    # expired entries included.
     key = str(url or "")
     if not key:
         return None
-    now = time.time()
     item = _preview_cache.get(key)
-    if not item:
+    if item:
+        return item
+    if _preview_store is None:
         return None
-    expires_at, payload = item
-    if expires_at <= now:
-        _preview_cache.pop(key, None)
+    stored = _preview_store.get(key)
+    if stored is None:
         return None
-    _preview_cache.move_to_end(key)
-    cached_payload = copy.deepcopy(payload)
-    cached_payload["cached"] = True
-    return cached_payload
+    payload, fetched_at, expires_at = stored
+    return remember_preview(key, fetched_at, expires_at, payload)
+
 
+def remember_preview(key: str, fetched_at: float, expires_at: float, payload: Dict[str, Any]) -> PreviewEntry:
+    # Cache hits are the common repeat view, so their response body is serialized here, once.
+    item = (fetched_at, expires_at, payload, PreparedJson({**payload, "cached": True}))
+    _preview_cache.set(key, item)
+    return item
 
-def set_cached_preview(url: str, payload: Dict[str, Any]) -> None:
+
+def set_cached_preview(url: str, payload: Dict[str, Any], expires_at: float | None = None) -> None:
     key = str(url or "")
     if not key:
         return
-    _preview_cache[key] = (time.time() + PREVIEW_CACHE_TTL_SECONDS, copy.deepcopy(payload))
-    _preview_cache.move_to_end(key)
-    while len(_preview_cache) > PREVIEW_CACHE_MAX_ITEMS:
-        _preview_cache.popitem(last=False)
+    now = time.time()
+    expires_at = now + PREVIEW_CACHE_TTL_SECONDS if expires_at is None else expires_at
+    remember_preview(key, now, expires_at, payload)
+    if _preview_store is not None:
+        _preview_store.put(key, payload, expires_at, fetched_at=now)
+
+
+def postpone_preview_refresh(url: str) -> None:
+    # A failed refresh keeps the old payload but is not retried for PREVIEW_RETRY_SECONDS.
+    item = get_cached_preview(url)
+    if item is None:
+        return
+    fetched_at, _, payload, prepared = item
+    expires_at = time.time() + PREVIEW_RETRY_SECONDS
+    _preview_cache.set(url, (fetched_at, expires_at, payload, prepared))
+    if _preview_store is not None:
+        _preview_store.put(url, payload, expires_at, fetched_at=fetched_at)
+
+
+def cached_preview_payload(item: PreviewEntry, stale: bool = False) -> Dict[str, Any] | PreparedJson:
+    if not stale:
+        return item[3]
+    return {**item[2], "cached": True, "stale": True}
+
+
+class PreviewRefresher:
+    # Refetches stale previews off the request path: a bounded queue, a few daemon workers, and each URL
+    # queued at most once. Refreshes share the in-flight fetch with any request that misses meanwhile.
+    def __init__(self, workers: int = PREVIEW_REFRESH_WORKERS, maxsize: int = PREVIEW_REFRESH_QUEUE_SIZE) -> None:
+        self.workers = workers
+        self.queue: queue.Queue[str] = queue.Queue(maxsize)
+        self.pending: set[str] = set()
+        self.lock = threading.Lock()
+        self.threads: List[threading.Thread] = []
+
+    def submit(self, url: str) -> bool:
+        with self.lock:
+            if url in self.pending:
+                return False
+            try:
+                self.queue.put_nowait(url)
+            except queue.Full:
+                return False
+            self.pending.add(url)
+            if not self.threads:
+                for i in range(self.workers):
+                    thread = threading.Thread(target=self.run, name=f"preview-refresh-{i}", daemon=True)
+                    thread.start()
+                    self.threads.append(thread)
+        return True
+
+    def run(self) -> None:
+        while True:
+            url = self.queue.get()
+            try:
+                _preview_flight.do(url, lambda: download_web_preview(url))
+            except Exception as e:
+                print(f"Preview refresh failed for {url}: {e}")
+                postpone_preview_refresh(url)
+            finally:
+                with self.lock:
+                    self.pending.discard(url)
+                self.queue.task_done()
+
+
+_preview_refresher = PreviewRefresher()
+
+
+def cache_stats() -> Dict[str, Any]:
+    with _preview_refresher.lock:
+        refresh_pending = len(_preview_refresher.pending)
+    return {
+        "elsevier": _elsevier_cache.stats(),
+        "preview": {
+            **_preview_cache.stats(),
+            "stored": _preview_store.count() if _preview_store is not None else None,
+            "in_flight": _preview_flight.in_flight(),
+            "refresh_pending": refresh_pending,
+        },
+    }
+
+
+def load_search_state(search_path: Path = SEARCH_INDEX_FILE, suggest_path: Path = SUGGEST_INDEX_FILE) -> int:
+    global _search_index
+    try:
+        index = SuggestIndex.load(search_path, suggest_path)
+    except (OSError, ValueError) as e:
+        print(f"Search index unavailable ({search_path}): {e}")
+        return 0
+    with _search_cache_lock:
+        _search_index = index
+        _search_cache.clear()
+    _elsevier_cache.learn_aliases(index.rows)
+    return len(index.rows)
+
+
+def parse_search_params(query: Dict[str, List[str]]) -> Tuple[str, int, float | None]:
+    q = str((query.get("q") or [""])[0])
+    raw_limit = str((query.get("limit") or [""])[0]).strip()
+    raw_min_if = str((query.get("min_if") or [""])[0]).strip()
+    try:
+        limit = int(raw_limit) if raw_limit else SEARCH_DEFAULT_LIMIT
+    except ValueError:
+        raise ValueError("invalid_limit")
+    min_if = None
+    if raw_min_if:
+        try:
+            min_if = float(raw_min_if)
+        except ValueError:
+            raise ValueError("invalid_min_if")
+        if not math.isfinite(min_if):
+            raise ValueError("invalid_min_if")
+    return q, max(1, min(limit, SEARCH_MAX_LIMIT)), min_if
+
+
+def search_journals(q: str, limit: int, min_if: float | None) -> List[Dict[str, Any]]:
+    index = _search_index
+    if index is None:
+        return []
+    # Ranking only looks at the trimmed, lowercased query, so that is the cache key.
+    key = (q.strip().lower(), limit, min_if)
+    with _search_cache_lock:
+        ids = _search_cache.get(key)
+        if ids is not None:
+            _search_cache.move_to_end(key)
+    if ids is None:
+        ids = index.suggest_ids(q, limit=limit, min_if=min_if)
+        with _search_cache_lock:
+            _search_cache[key] = ids
+            while len(_search_cache) > SEARCH_CACHE_MAX_ITEMS:
+                _search_cache.popitem(last=False)
+    return [index.rows[i] for i in ids]
 
 
 def decode_response_bytes(resp: Any, raw: bytes) -> str:
@@ -478,17 +873,40 @@ def decode_response_bytes(resp: Any, raw: bytes) -> str:
         return raw.decode("utf-8", errors="replace")
 
 
-def fetch_web_preview(url: str, timeout: float = PREVIEW_TIMEOUT_SECONDS) -> Dict[str, Any]:
+def fetch_web_preview(
+    url: str, timeout: float = PREVIEW_TIMEOUT_SECONDS, refresh: bool = False
+) -> Dict[str, Any] | PreparedJson:
     normalized_url = normalize_remote_url(url)
     if not normalized_url:
         raise ValueError("invalid_url")
     if not is_safe_remote_url(normalized_url):
         raise ValueError("unsafe_url")
 
-    cached = get_cached_preview(normalized_url)
-    if cached:
-        return cached
+    item = get_cached_preview(normalized_url)
+    now = time.time()
+    if item is not None and not refresh:
+        if item[1] > now:
+            # Postponed after a failed refresh, an old payload is not fresh again.
+            return cached_preview_payload(item, stale=now - item[0] >= PREVIEW_CACHE_TTL_SECONDS)
+        if now - item[0] < PREVIEW_STALE_SECONDS:
+            _preview_refresher.submit(normalized_url)
+            return cached_preview_payload(item, stale=True)
+
+    # Threads that miss the cache for the same page wait for one download and parse instead of repeating it.
+    try:
+        payload, shared = _preview_flight.do(
+            normalized_url,
+            lambda: download_web_preview(normalized_url, timeout),
+            timeout=PREVIEW_WAIT_SECONDS,
+        )
+    except Exception:
+        if item is None:
+            raise
+        return cached_preview_payload(item, stale=True)
+    return {**payload, "coalesced": True} if shared else payload
+
 
+def download_web_preview(normalized_url: str, timeout: float = PREVIEW_TIMEOUT_SECONDS) -> Dict[str, Any]:
     req = request.Request(normalized_url, headers=WEB_PREVIEW_HEADERS, method="GET")
     with request.urlopen(req, timeout=timeout) as resp:
         final_url = normalize_remote_url(resp.geturl() or normalized_url) or normalized_url
@@ -534,9 +952,9 @@ def fetch_web_preview(url: str, timeout: float = PREVIEW_TIMEOUT_SECONDS) -> Dic
     return payload
 
 
-def proxy_web_preview(url: str) -> Tuple[int, Dict[str, Any]]:
+def proxy_web_preview(url: str, refresh: bool = False) -> Tuple[int, Dict[str, Any] | PreparedJson]:
     try:
-        return HTTPStatus.OK, fetch_web_preview(url)
+        return HTTPStatus.OK, fetch_web_preview(url, refresh=refresh)
     except ValueError as e:
         reason = str(e)
         if reason == "unsafe_url":
@@ -545,6 +963,11 @@ def proxy_web_preview(url: str) -> Tuple[int, Dict[str, Any]]:
                 "message": "Only public http/https URLs are allowed.",
             }
         return HTTPStatus.BAD_REQUEST, {"error": "invalid_url", "message": "url is invalid"}
+    except InFlightTimeout:
+        return HTTPStatus.GATEWAY_TIMEOUT, {
+            "error": "preview_pending",
+            "message": "The page is still being fetched for another request; retry shortly.",
+        }
     except error.HTTPError as e:
         return HTTPStatus.BAD_GATEWAY, {
             "error": "upstream_http_error",
@@ -556,10 +979,16 @@ def proxy_web_preview(url: str) -> Tuple[int, Dict[str, Any]]:
 
 
 class DevHandler(SimpleHTTPRequestHandler):
+    _vary_encoding = False
+    _accept_ranges = False
+    _status = 0
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, directory=str(BASE_DIR), **kwargs)
 
     def do_GET(self) -> None:  # noqa: N802
+        self._vary_encoding = False
+        self._accept_ranges = False
         parsed = parse.urlparse(self.path)
         if parsed.path == "/api/elsevier/serial-title":
             self.handle_elsevier_proxy(parsed)
@@ -567,29 +996,154 @@ class DevHandler(SimpleHTTPRequestHandler):
         if parsed.path == "/api/web/preview-image":
             self.handle_web_preview(parsed)
             return
+        if parsed.path == "/api/search":
+            self.handle_search(parsed)
+            return
+        if parsed.path == "/api/cache/stats":
+            json_response(self, HTTPStatus.OK, cache_stats(), {"Cache-Control": "no-store"})
+            return
         super().do_GET()
 
-    def handle_elsevier_proxy(self, parsed: parse.ParseResult) -> None:
-        api_key = resolve_api_key(self)
-        if not api_key:
-            json_response(
-                self,
-                HTTPStatus.UNAUTHORIZED,
-                {
-                    "error": "missing_api_key",
-                    "message": "Set ELSEVIER_API_KEY env var or pass X-Proxy-Elsevier-Key header.",
-                },
-            )
-            return
+    def find_precompressed(self, path: str) -> Tuple[str, str] | None:
+        # Serve build-time .br/.gz siblings (see build_data.precompress_outputs) when the client accepts them.
+        if not path.endswith(".json") or not os.path.isfile(path):
+            return None
+        self._vary_encoding = False
+        weights = parse_accept_encoding(self.headers.get("Accept-Encoding", ""))
+        source_mtime = os.stat(path).st_mtime_ns
+        for encoding, suffix in PRECOMPRESSED_VARIANTS:
+            variant = path + suffix
+            if not os.path.isfile(variant) or os.stat(variant).st_mtime_ns < source_mtime:
+                continue
+            self._vary_encoding = True
+            if accepts_encoding(weights, encoding):
+                return encoding, variant
+        return None
 
+    def send_range(self, path: str, range_header: str) -> Tuple[bool, Any]:
+        # (handled, body): 206 with the slice, 416 without a body, or not handled (serve the whole file).
+        # Ranged reads always use the identity file, since chunk index offsets refer to its bytes.
+        with open(path, "rb") as f:
+            fs = os.fstat(f.fileno())
+            last_modified = self.date_time_string(fs.st_mtime)
+            if_range = self.headers.get("If-Range")
+            if if_range and if_range.strip() != last_modified:
+                return False, None
+            try:
+                byte_range = parse_byte_range(range_header, fs.st_size)
+            except ValueError:
+                self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+                self.send_header("Content-Range", f"bytes */{fs.st_size}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return True, None
+            if byte_range is None:
+                return False, None
+            first, last = byte_range
+            f.seek(first)
+            body = f.read(last - first + 1)
+        self.send_response(HTTPStatus.PARTIAL_CONTENT)
+        self.send_header("Content-Type", self.guess_type(path))
+        self.send_header("Content-Range", f"bytes {first}-{last}/{fs.st_size}")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Last-Modified", last_modified)
+        self.end_headers()
+        return True, io.BytesIO(body)
+
+    def not_modified_since(self, mtime: float) -> bool:
+        # SimpleHTTPRequestHandler.send_head's If-Modified-Since check, for files it does not open itself.
+        if "If-Modified-Since" not in self.headers or "If-None-Match" in self.headers:
+            return False
+        try:
+            ims = email.utils.parsedate_to_datetime(self.headers["If-Modified-Since"])
+        except (TypeError, IndexError, OverflowError, ValueError):
+            return False
+        if ims.tzinfo is None:
+            ims = ims.replace(tzinfo=datetime.timezone.utc)
+        if ims.tzinfo is not datetime.timezone.utc:
+            return False
+        last_modified = datetime.datetime.fromtimestamp(mtime, datetime.timezone.utc).replace(microsecond=0)
+        return last_modified <= ims
+
+    def send_head(self):
+        self._vary_encoding = False
+        path = self.translate_path(parse.urlparse(self.path).path)
+        self._accept_ranges = os.path.isfile(path)
+        range_header = self.headers.get("Range")
+        if range_header and self._accept_ranges:
+            handled, body = self.send_range(path, range_header)
+            if handled:
+                return body
+        picked = self.find_precompressed(path)
+        if picked is None:
+            return super().send_head()
+        encoding, variant = picked
+        f = open(variant, "rb")
+        try:
+            fs = os.fstat(f.fileno())
+            if self.not_modified_since(fs.st_mtime):
+                self.send_response(HTTPStatus.NOT_MODIFIED)
+                self.end_headers()
+                f.close()
+                return None
+            self.send_response(HTTPStatus.OK)
+            self.send_header("Content-Type", self.guess_type(path))
+            self.send_header("Content-Encoding", encoding)
+            self.send_header("Content-Length", str(fs.st_size))
+            self.send_header("Last-Modified", self.date_time_string(fs.st_mtime))
+            self.end_headers()
+            return f
+        except Exception:
+            f.close()
+            raise
+
+    def send_response(self, code, message=None) -> None:
+        self._status = int(code)
+        super().send_response(code, message)
+
+    def end_headers(self) -> None:
+        if getattr(self, "_vary_encoding", False):
+            self.send_header("Vary", "Accept-Encoding")
+        if getattr(self, "_accept_ranges", False):
+            self.send_header("Accept-Ranges", "bytes")
+        # Content-addressed chunk and search shard files never change under the same name.
+        if self._status in IMMUTABLE_STATUSES and IMMUTABLE_CHUNK_RE.search(parse.urlparse(self.path).path):
+            self.send_header("Cache-Control", "public, max-age=31536000, immutable")
+        super().end_headers()
+
+    def handle_elsevier_proxy(self, parsed: parse.ParseResult) -> None:
         query = parse.parse_qs(parsed.query)
         issn = str((query.get("issn") or [""])[0]).strip()
         if not issn:
             json_response(self, HTTPStatus.BAD_REQUEST, {"error": "missing_issn", "message": "issn is required"})
             return
 
-        status, payload = proxy_elsevier(issn=issn, api_key=api_key)
-        json_response(self, status, payload)
+        api_key = resolve_api_key(self)
+
+        def fetch(value: str) -> Tuple[int, Dict]:
+            # Cached answers are served without a key; only upstream calls need one.
+            if not api_key:
+                return HTTPStatus.UNAUTHORIZED, {
+                    "error": "missing_api_key",
+                    "message": "Set ELSEVIER_API_KEY env var or pass X-Proxy-Elsevier-Key header.",
+                }
+            return proxy_elsevier(issn=value, api_key=api_key)
+
+        status, payload, cache_status, age = _elsevier_cache.get(issn, fetch)
+        if cache_status == "STALE":
+            cache_control = STALE_CACHE_CONTROL
+        elif not isinstance(payload, PreparedJson):
+            cache_control = ERROR_CACHE_CONTROL
+        elif status == HTTPStatus.OK:
+            cache_control = ELSEVIER_CACHE_CONTROL
+        else:
+            cache_control = ELSEVIER_NOT_FOUND_CACHE_CONTROL
+        json_response(
+            self,
+            status,
+            payload,
+            {"X-Cache": cache_status, "Age": str(int(age)), "Cache-Control": cache_control},
+        )
 
     def handle_web_preview(self, parsed: parse.ParseResult) -> None:
         query = parse.parse_qs(parsed.query)
@@ -598,31 +1152,88 @@ class DevHandler(SimpleHTTPRequestHandler):
             json_response(self, HTTPStatus.BAD_REQUEST, {"error": "missing_url", "message": "url is required"})
             return
 
-        refresh = str((query.get("refresh") or [""])[0]).strip().lower()
-        normalized = normalize_remote_url(url)
-        if refresh in {"1", "true", "yes"} and normalized:
-            _preview_cache.pop(normalized, None)
+        refresh = str((query.get("refresh") or [""])[0]).strip().lower() in {"1", "true", "yes"}
+        status, payload = proxy_web_preview(url, refresh=refresh)
+        fields = payload.payload if isinstance(payload, PreparedJson) else payload
+        if status != HTTPStatus.OK:
+            cache_control = ERROR_CACHE_CONTROL
+        elif fields.get("stale"):
+            cache_control = STALE_CACHE_CONTROL
+        else:
+            cache_control = PREVIEW_CACHE_CONTROL
+        json_response(self, status, payload, {"Cache-Control": cache_control})
 
-        status, payload = proxy_web_preview(url)
-        json_response(self, status, payload)
+    def handle_search(self, parsed: parse.ParseResult) -> None:
+        index = _search_index
+        if index is None:
+            json_response(
+                self,
+                HTTPStatus.SERVICE_UNAVAILABLE,
+                {"error": "search_index_unavailable", "message": "Run build_data.py to generate data/search_index.json."},
+            )
+            return
+        try:
+            q, limit, min_if = parse_search_params(parse.parse_qs(parsed.query))
+        except ValueError as e:
+            json_response(self, HTTPStatus.BAD_REQUEST, {"error": str(e), "message": "limit and min_if must be numbers"})
+            return
+
+        started = time.perf_counter()
+        results = search_journals(q, limit, min_if)
+        json_response(
+            self,
+            HTTPStatus.OK,
+            {
+                "query": q,
+                "min_if": min_if,
+                "limit": limit,
+                "count": len(results),
+                "revision": index.meta.get("revision"),
+                "took_ms": round((time.perf_counter() - started) * 1000, 3),
+                "results": results,
+            },
+        )
 
     def log_message(self, format: str, *args) -> None:  # noqa: A003
         # Keep output concise.
         print(format % args)
 
 
+class DevServer(ThreadingHTTPServer):
+    # The default backlog of 5 drops connections under concurrent /api/search traffic (1s SYN retry).
+    daemon_threads = True
+    request_queue_size = 128
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(
         description="Journal Scout local server with Elsevier proxy and webpage preview extraction"
     )
     parser.add_argument("--host", default="127.0.0.1", help="bind host")
     parser.add_argument("--port", type=int, default=8000, help="bind port")
+    parser.add_argument("--cache-dir", default=str(SERVER_CACHE_DIR), help="directory for the persistent API caches")
+    parser.add_argument(
+        "--no-disk-cache",
+        action="store_true",
+        help="keep Elsevier responses and page previews in memory only (nothing survives a restart)",
+    )
     args = parser.parse_args()
 
-    server = ThreadingHTTPServer((args.host, args.port), DevHandler)
+    global _elsevier_cache, _preview_store
+    if not args.no_disk_cache:
+        cache_file = Path(args.cache_dir) / "api_cache.sqlite3"
+        store = SqliteResponseStore(cache_file, "elsevier_serial_title")
+        _elsevier_cache = ElsevierCache(store)
+        _preview_store = SqliteResponseStore(cache_file, "web_preview")
+        _preview_store.prune(time.time() - PREVIEW_KEEP_SECONDS)
+        print(f"API cache: {cache_file} ({store.count()} Elsevier responses, {_preview_store.count()} previews)")
+    loaded = load_search_state()
+    server = DevServer((args.host, args.port), DevHandler)
     print(f"Serving on http://{args.host}:{args.port}")
     print("Elsevier proxy endpoint: /api/elsevier/serial-title?issn=xxxx-xxxx")
     print("Preview image endpoint: /api/web/preview-image?url=https://example.com")
+    print("Cache counters: /api/cache/stats")
+    print(f"Search endpoint: /api/search?q=nature&min_if=&limit={SEARCH_DEFAULT_LIMIT} ({loaded} journals indexed)")
     server.serve_forever()
 
 
@@ -0,0 +1,256 @@
+from __future__ import annotations
+
+import base64
+import bisect
+import json
+import math
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from search_index_codec import IF_SCALE, encode_scaled_column, load_search_index
+from search_query import _delta_decode, _delta_encode, js_number
+
+
+FACET_FORMAT = "facets-v1"
+# The low-cardinality columns of the search index; tags get their own bitmaps, if_2023 the sorted permutation.
+FACET_FIELDS = (
+    "if_year",
+    "jcr_quartile",
+    "cas_2025",
+    "is_top",
+    "hq_level",
+    "pku_core",
+    "cssci_type",
+    "cscd_type",
+    "warning_latest",
+    "xuankan_2026",
+    "xuankan_warning",
+    "ni_journal",
+)
+IF_FIELD = "if_2023"
+
+
+def encode_bitmap(ids: List[int], count: int) -> object:
+    # Sparse values stay a delta-encoded id list, dense ones become a base64 bitset (bit i = row i,
+    # little-endian); whichever is shorter as JSON.
+    postings = _delta_encode(ids)
+    bits = bytearray((count + 7) // 8)
+    for idx in ids:
+        bits[idx >> 3] |= 1 << (idx & 7)
+    packed = base64.b64encode(bytes(bits)).decode("ascii")
+    if len(json.dumps(postings, separators=(",", ":"))) <= len(packed) + 2:
+        return postings
+    return packed
+
+
+def decode_bitmap(encoded: object) -> int:
+    if isinstance(encoded, str):
+        return int.from_bytes(base64.b64decode(encoded), "little")
+    return bitmap_from_ids(_delta_decode(encoded or []))
+
+
+def bitmap_from_ids(ids: Iterable[int]) -> int:
+    bits = bytearray()
+    for idx in ids:
+        if (idx >> 3) >= len(bits):
+            bits.extend(bytes((idx >> 3) + 1 - len(bits)))
+        bits[idx >> 3] |= 1 << (idx & 7)
+    return int.from_bytes(bits, "little")
+
+
+def bitmap_ids(bitmap: int) -> List[int]:
+    out = []
+    for pos, byte in enumerate(bitmap.to_bytes((bitmap.bit_length() + 7) // 8, "little")):
+        while byte:
+            low = byte & -byte
+            out.append((pos << 3) + low.bit_length() - 1)
+            byte ^= low
+    return out
+
+
+def bitmap_count(bitmap: int) -> int:
+    return bin(bitmap).count("1")
+
+
+def facet_key(value) -> Optional[Tuple[type, object]]:
+    # None and "" mean "no value" and get no bitmap; False stays a value of its own.
+    if value is None or value == "":
+        return None
+    return (type(value), value)
+
+
+class FacetIndexBuilder:
+    # Fed the search-index rows in order; row numbers are positions in search_index.json.
+    def __init__(self, fields: Sequence[str] = FACET_FIELDS) -> None:
+        self.fields = tuple(fields)
+        self.count = 0
+        self.values: Dict[str, Dict[Tuple[type, object], Tuple[object, List[int]]]] = {name: {} for name in self.fields}
+        self.tags: Dict[str, List[int]] = {}
+        self.if_rows: List[Tuple[float, int]] = []
+
+    def add(self, row: Dict) -> None:
+        idx = self.count
+        self.count += 1
+        for name in self.fields:
+            key = facet_key(row.get(name))
+            if key is not None:
+                self.values[name].setdefault(key, (row.get(name), []))[1].append(idx)
+        for tag in row.get("tags") or []:
+            if str(tag or "").strip():
+                self.tags.setdefault(str(tag), []).append(idx)
+        # Number() semantics, like the min-IF filter: a missing IF counts as 0, unparsable ones are left out.
+        v = js_number(row.get(IF_FIELD))
+        if math.isfinite(v):
+            self.if_rows.append((v, idx))
+
+    def to_payload(self, meta: Dict[str, object]) -> Dict[str, object]:
+        self.if_rows.sort()
+        values = [v for v, _ in self.if_rows]
+        scaled = encode_scaled_column(values, IF_SCALE)
+        if scaled is not None:
+            if_values = {"scale": IF_SCALE, "values": _delta_encode(scaled["values"])}
+        else:
+            if_values = {"scale": None, "values": values}
+        return {
+            "format": FACET_FORMAT,
+            "count": self.count,
+            "meta": {**meta, "facet_fields": list(self.fields), "if_field": IF_FIELD},
+            "fields": {
+                name: [
+                    [value, encode_bitmap(ids, self.count)]
+                    for value, ids in sorted(self.values[name].values(), key=lambda x: (-len(x[1]), str(x[0])))
+                ]
+                for name in self.fields
+            },
+            "tags": [
+                [tag, encode_bitmap(self.tags[tag], self.count)]
+                for tag in sorted(self.tags, key=lambda t: (-len(self.tags[t]), t))
+            ],
+            "if": {"order": [idx for _, idx in self.if_rows], **if_values},
+        }
+
+
+def build_facet_index(rows: Iterable[Dict], meta: Optional[Dict[str, object]] = None) -> Dict[str, object]:
+    builder = FacetIndexBuilder()
+    for row in rows:
+        builder.add(row)
+    return builder.to_payload(meta or {})
+
+
+# --- Query side ---
+
+
+class FacetIndex:
+    # Bitmaps are Python ints (bit i = search-index row i), so AND/OR/popcount run over machine words.
+    def __init__(self, rows: List[Dict], payload: Optional[Dict] = None) -> None:
+        if payload is None:
+            payload = build_facet_index(rows)
+        if payload.get("format") != FACET_FORMAT or int(payload.get("count") or 0) != len(rows):
+            raise ValueError("facet index does not match the search index rows")
+        self.rows = rows
+        self.count = len(rows)
+        self.meta = payload.get("meta") or {}
+        self.all = (1 << self.count) - 1
+        self.fields: Dict[str, Dict[Tuple[type, object], int]] = {}
+        self.field_values: Dict[str, List[object]] = {}
+        for name, entries in (payload.get("fields") or {}).items():
+            self.fields[name] = {facet_key(value): decode_bitmap(encoded) for value, encoded in entries}
+            self.field_values[name] = [value for value, _ in entries]
+        self.tags = {tag: decode_bitmap(encoded) for tag, encoded in payload.get("tags") or []}
+        if_payload = payload.get("if") or {}
+        self.if_order: List[int] = list(if_payload.get("order") or [])
+        scale = if_payload.get("scale")
+        raw = if_payload.get("values") or []
+        self.if_values: List[float] = [v / scale for v in _delta_decode(raw)] if scale else list(raw)
+
+    @classmethod
+    def load(cls, search_index_path: Path, facet_index_path: Optional[Path] = None) -> "FacetIndex":
+        # Falls back to building the facet index in memory when the published one is missing or stale.
+        search = load_search_index(search_index_path)
+        rows = search["journals"]
+        payload = None
+        if facet_index_path is not None and Path(facet_index_path).is_file():
+            payload = json.loads(Path(facet_index_path).read_text(encoding="utf-8"))
+            stale = payload.get("format") != FACET_FORMAT or int(payload.get("count") or 0) != len(rows)
+            if stale or (payload.get("meta") or {}).get("revision") != search["meta"].get("revision"):
+                payload = None
+        if payload is None:
+            payload = build_facet_index(rows, search["meta"])
+        return cls(rows, payload)
+
+    def value(self, name: str, value) -> int:
+        if name not in self.fields:
+            raise KeyError(f"not a facet field: {name}")
+        key = facet_key(value)
+        return 0 if key is None else self.fields[name].get(key, 0)
+
+    def tag(self, tag: str) -> int:
+        return self.tags.get(tag, 0)
+
+    def if_slice(self, min_if: Optional[float] = None, max_if: Optional[float] = None) -> Tuple[int, int]:
+        lo = 0 if min_if is None else bisect.bisect_left(self.if_values, min_if)
+        hi = len(self.if_values) if max_if is None else bisect.bisect_right(self.if_values, max_if)
+        return lo, max(lo, hi)
+
+    def if_range(self, min_if: Optional[float] = None, max_if: Optional[float] = None) -> int:
+        # min_if <= IF <= max_if; min_if alone selects exactly what passes_min_if() keeps.
+        if min_if is None and max_if is None:
+            return self.all
+        lo, hi = self.if_slice(min_if, max_if)
+        return bitmap_from_ids(self.if_order[lo:hi])
+
+    def select(
+        self,
+        min_if: Optional[float] = None,
+        max_if: Optional[float] = None,
+        tags: Iterable[str] = (),
+        **fields,
+    ) -> int:
+        # Every tag is required; a field given a list matches any of its values. Cheapest bitmaps go first
+        # so an empty intersection stops early, and the IF range is only materialized when still needed.
+        parts = [self.tag(tag) for tag in tags]
+        for name, wanted in fields.items():
+            values = wanted if isinstance(wanted, (list, tuple, set, frozenset)) else [wanted]
+            union = 0
+            for value in values:
+                union |= self.value(name, value)
+            parts.append(union)
+        bitmap = self.all
+        for part in sorted(parts, key=bitmap_count):
+            bitmap &= part
+            if not bitmap:
+                return 0
+        if min_if is not None or max_if is not None:
+            bitmap &= self.if_range(min_if, max_if)
+        return bitmap
+
+    def ids(self, bitmap: int) -> List[int]:
+        return bitmap_ids(bitmap)
+
+    def ids_by_if(self, bitmap: int, limit: Optional[int] = None, descending: bool = True) -> List[int]:
+        # Walks the IF permutation and keeps the selected rows; rows without a usable IF are not listed.
+        order = reversed(self.if_order) if descending else iter(self.if_order)
+        bits = bitmap.to_bytes((self.count + 7) // 8, "little")
+        out = []
+        for idx in order:
+            if bits[idx >> 3] >> (idx & 7) & 1:
+                out.append(idx)
+                if limit is not None and len(out) >= limit:
+                    break
+        return out
+
+    def filter(self, limit: Optional[int] = None, sort_by_if: bool = False, **criteria) -> List[Dict]:
+        bitmap = self.select(**criteria)
+        ids = self.ids_by_if(bitmap, limit) if sort_by_if else self.ids(bitmap)[:limit]
+        return [self.rows[i] for i in ids]
+
+    def counts(self, bitmap: Optional[int] = None) -> Dict[str, object]:
+        # Per-value hit counts within a selection, for facet sidebars.
+        base = self.all if bitmap is None else bitmap
+        return {
+            "fields": {
+                name: [[value, bitmap_count(base & self.fields[name][facet_key(value)])] for value in values]
+                for name, values in self.field_values.items()
+            },
+            "tags": [[tag, bitmap_count(base & bits)] for tag, bits in self.tags.items()],
+        }
@@ -0,0 +1,418 @@
+from __future__ import annotations
+
+import math
+import re
+import unicodedata
+from typing import Dict, List, Optional, Tuple
+
+from search_query import js_number
+
+try:
+    import numpy as np
+
+    _HAS_NUMPY = True
+except ImportError:
+    np = None
+    _HAS_NUMPY = False
+
+
+RELATED_LIMIT = 24
+# What renderRelated in detail.js shows for each related journal.
+RELATED_FIELDS = ("id", "title", "issn", "cn_number", "if_2023", "jcr_quartile", "cas_2025", "is_top")
+# Chunk records carry related journals as positional rows (same order as RELATED_COLUMNS in detail.js):
+# the display fields, the score, the matched 小类 label (None without a 小类 match) and a bit per reason.
+RELATED_COLUMNS = RELATED_FIELDS + ("score", "sub_label", "reason_flags")
+RELATED_REASON_FLAGS = (
+    (1, "同中科院大类"),
+    (2, "同中科院分区"),
+    (4, "同JCR分区"),
+    (8, "同科协等级"),
+    (16, "均为Top"),
+)
+NON_DIGIT_RE = re.compile(r"[^0-9]")
+
+
+# --- Python ports of the detail.js helpers; keep them in step with computeRelatedSimilarity/findRelated. ---
+
+
+def normalize_cas_key(value) -> str:
+    return "".join(ch for ch in str(value or "").lower() if unicodedata.category(ch)[0] in "LN")
+
+
+def year_num(value) -> int:
+    digits = NON_DIGIT_RE.sub("", str(value or ""))
+    return int(digits) if digits else 0
+
+
+def number_or_null(value) -> Optional[float]:
+    n = js_number(value)
+    return n if math.isfinite(n) else None
+
+
+def pick_latest_cas_record(row: Dict) -> Optional[Dict]:
+    records = row.get("cas_history")
+    if not isinstance(records, list) or not records:
+        return None
+    latest = records[0]
+    latest_year = year_num((latest or {}).get("year"))
+    for rec in records[1:]:
+        y = year_num((rec or {}).get("year"))
+        if y > latest_year:
+            latest = rec
+            latest_year = y
+    return latest or None
+
+
+def latest_cas_fields(row: Dict) -> Tuple[str, List[str]]:
+    # 大类 and 小类 names of the latest CAS record; search-index rows carry them as cas_category/cas_subcategories.
+    latest = pick_latest_cas_record(row)
+    if latest is None:
+        subs = row.get("cas_subcategories")
+        names = [str(name or "").strip() for name in subs] if isinstance(subs, list) else []
+        return str(row.get("cas_category") or "").strip(), names
+    subs = latest.get("subcategories")
+    items = subs if isinstance(subs, list) else []
+    names = [str((item.get("name") if isinstance(item, dict) else "") or "").strip() for item in items]
+    return str(latest.get("category") or "").strip(), names
+
+
+def cas_profile(row: Dict) -> Tuple[str, Dict[str, str]]:
+    # (大类 key, {小类 key: display name}) from the latest CAS record; dict order is insertion order like the JS Set.
+    major, names = latest_cas_fields(row)
+    major_key = normalize_cas_key(major)
+    sub_names: Dict[str, str] = {}
+    for name in names:
+        key = normalize_cas_key(name)
+        if name and key and key not in sub_names:
+            sub_names[key] = name
+    return major_key, sub_names
+
+
+def related_similarity(base: Dict, candidate: Dict, base_profile=None, candidate_profile=None) -> Dict[str, object]:
+    base_major, base_subs = base_profile or cas_profile(base)
+    cand_major, cand_subs = candidate_profile or cas_profile(candidate)
+    major_match = bool(base_major and cand_major and base_major == cand_major)
+    matched = [name for key, name in base_subs.items() if key in cand_subs]
+
+    score = 0.0
+    reasons: List[str] = []
+    if matched:
+        score += 240 + min(len(matched), 3) * 36
+        label = " / ".join(matched[:2])
+        reasons.append(f"同中科院小类（{label}）" if label else "同中科院小类")
+    if major_match:
+        score += 150
+        reasons.append("同中科院大类")
+    if base.get("cas_2025") and candidate.get("cas_2025") and base.get("cas_2025") == candidate.get("cas_2025"):
+        score += 56
+        reasons.append("同中科院分区")
+    if (
+        base.get("jcr_quartile")
+        and candidate.get("jcr_quartile")
+        and base.get("jcr_quartile") == candidate.get("jcr_quartile")
+    ):
+        score += 34
+        reasons.append("同JCR分区")
+    if base.get("hq_level") and candidate.get("hq_level") and base.get("hq_level") == candidate.get("hq_level"):
+        score += 10
+        reasons.append("同科协等级")
+    if base.get("is_top") is True and candidate.get("is_top") is True:
+        score += 8
+        reasons.append("均为Top")
+
+    base_if = number_or_null(base.get("if_2023"))
+    cand_if = number_or_null(candidate.get("if_2023"))
+    if_diff = math.inf
+    if base_if is not None and cand_if is not None:
+        if_diff = abs(base_if - cand_if)
+        score += max(0, 18 - if_diff * 1.8)
+
+    cas_priority = 3 if matched and major_match else 2 if matched else 1 if major_match else 0
+    return {
+        "score": score,
+        "reasons": reasons,
+        "if_diff": if_diff,
+        "cas_priority": cas_priority,
+        "major_match": major_match,
+        "sub_match_count": len(matched),
+    }
+
+
+def related_sort_key(sim: Dict[str, object], candidate: Dict, position: int) -> Tuple:
+    return (
+        -sim["cas_priority"],
+        -sim["sub_match_count"],
+        -int(sim["major_match"]),
+        -sim["score"],
+        sim["if_diff"],
+        -(number_or_null(candidate.get("if_2023")) or -1),
+        position,
+    )
+
+
+def find_related(rows: List[Dict], current: Dict, limit: int = RELATED_LIMIT) -> List[Dict]:
+    # Linear reference implementation, line for line with findRelated in detail.js.
+    base_profile = cas_profile(current)
+    scored = []
+    for position, row in enumerate(rows):
+        if row.get("id") == current.get("id"):
+            continue
+        sim = related_similarity(current, row, base_profile, cas_profile(row))
+        if sim["score"] > 0:
+            scored.append((related_sort_key(sim, row, position), row, sim))
+    scored.sort(key=lambda x: x[0])
+    return [related_entry(row, sim) for _, row, sim in scored[:limit]]
+
+
+def related_entry(row: Dict, sim: Dict[str, object]) -> Dict[str, object]:
+    entry = {k: row.get(k) for k in RELATED_FIELDS}
+    entry["score"] = round(sim["score"], 2)
+    entry["reasons"] = sim["reasons"]
+    return entry
+
+
+def related_reasons(sub_label: Optional[str], flags: int) -> List[str]:
+    reasons = [] if sub_label is None else [f"同中科院小类（{sub_label}）" if sub_label else "同中科院小类"]
+    return reasons + [reason for bit, reason in RELATED_REASON_FLAGS if flags & bit]
+
+
+def decode_related_row(values: List) -> Dict[str, object]:
+    item = dict(zip(RELATED_COLUMNS, values))
+    entry = {k: item.get(k) for k in RELATED_FIELDS}
+    entry["score"] = item.get("score")
+    entry["reasons"] = related_reasons(item.get("sub_label"), int(item.get("reason_flags") or 0))
+    return entry
+
+
+# --- Build-time table ---
+
+
+class RelatedJournals:
+    # Fed the search-index rows in build order (a row's position breaks ties like its place in search_index.json),
+    # then compute() ranks every journal's neighbours with NumPy. Only journals that share a CAS 大类 or
+    # 小类 can reach casPriority >= 1, so those blocks are scored first; the rest of the catalogue is only
+    # scanned, grouped by its (分区, JCR, 科协等级, Top) signature, when a block has fewer than `limit` rows.
+    def __init__(self, limit: int = RELATED_LIMIT) -> None:
+        if not _HAS_NUMPY:
+            raise RuntimeError("numpy is required to precompute related journals")
+        self.limit = limit
+        self.rows: List[Dict] = []
+        self.profiles: List[Tuple[str, Dict[str, str]]] = []
+        self.position_by_id: Dict[object, int] = {}
+        self.table: List[List[int]] = []
+
+    def add(self, row: Dict) -> None:
+        self.position_by_id[row.get("id")] = len(self.rows)
+        keep = {k: row.get(k) for k in RELATED_FIELDS}
+        keep["hq_level"] = row.get("hq_level")
+        self.rows.append(keep)
+        self.profiles.append(cas_profile(row))
+
+    def _codes(self, values: List) -> "np.ndarray":
+        # Truthy values get a code per distinct value (bools apart from equal numbers, as with ===); falsy ones -1.
+        codes: Dict[Tuple[bool, object], int] = {}
+        out = np.full(len(values), -1, dtype=np.int32)
+        for i, value in enumerate(values):
+            if value:
+                out[i] = codes.setdefault((isinstance(value, bool), value), len(codes))
+        return out
+
+    def compute(self) -> None:
+        n = len(self.rows)
+        self.major = self._codes([major for major, _ in self.profiles])
+        sub_codes: Dict[str, int] = {}
+        self.subs = [[sub_codes.setdefault(k, len(sub_codes)) for k in subs] for _, subs in self.profiles]
+        self.cas = self._codes([r.get("cas_2025") for r in self.rows])
+        self.jcr = self._codes([r.get("jcr_quartile") for r in self.rows])
+        self.hq = self._codes([r.get("hq_level") for r in self.rows])
+        self.top = np.array([r.get("is_top") is True for r in self.rows], dtype=bool)
+        if_values = [number_or_null(r.get("if_2023")) for r in self.rows]
+        self.if_value = np.array([math.nan if v is None else v for v in if_values], dtype=np.float64)
+        self.if_rank = np.array([v or -1 for v in if_values], dtype=np.float64)
+
+        self.major_blocks = self._blocks((code, i) for i, code in enumerate(self.major.tolist()) if code >= 0)
+        self.sub_blocks = self._blocks((code, i) for i, codes in enumerate(self.subs) for code in codes)
+        signatures: Dict[Tuple[int, int, int, bool], List[int]] = {}
+        for i, sig in enumerate(zip(self.cas.tolist(), self.jcr.tolist(), self.hq.tolist(), self.top.tolist())):
+            signatures.setdefault(sig, []).append(i)
+        self.sig_rows = [np.array(v, dtype=np.int64) for v in signatures.values()]
+        sig_keys = np.array(list(signatures), dtype=np.int64).reshape(-1, 4)
+        self.sig_cas, self.sig_jcr, self.sig_hq, self.sig_top = (sig_keys[:, c] for c in range(4))
+        self._sub_hits = np.zeros(n, dtype=np.int32)
+        self._taken = np.zeros(n, dtype=bool)
+        self._block_cache: Dict[Tuple[int, Tuple[int, ...]], Tuple] = {}
+        self._level_cache: Dict[Tuple[int, int, int, bool], List[Tuple[int, "np.ndarray"]]] = {}
+        self.table = [self._rank(i) for i in range(n)]
+        self._block_cache.clear()
+        self._level_cache.clear()
+
+    @staticmethod
+    def _blocks(pairs) -> Dict[int, "np.ndarray"]:
+        blocks: Dict[int, List[int]] = {}
+        for code, i in pairs:
+            blocks.setdefault(code, []).append(i)
+        return {code: np.array(v, dtype=np.int64) for code, v in blocks.items()}
+
+    def _discrete(self, i: int, cand: "np.ndarray") -> "np.ndarray":
+        score = np.zeros(len(cand), dtype=np.int64)
+        if self.cas[i] >= 0:
+            score += 56 * (self.cas[cand] == self.cas[i])
+        if self.jcr[i] >= 0:
+            score += 34 * (self.jcr[cand] == self.jcr[i])
+        if self.hq[i] >= 0:
+            score += 10 * (self.hq[cand] == self.hq[i])
+        if self.top[i]:
+            score += 8 * self.top[cand]
+        return score
+
+    def _if_terms(self, i: int, cand: "np.ndarray") -> Tuple["np.ndarray", "np.ndarray"]:
+        # ifDiff is Infinity and adds nothing unless both IFs are known.
+        base = self.if_value[i]
+        if math.isnan(base):
+            return np.full(len(cand), np.inf), np.zeros(len(cand))
+        other = self.if_value[cand]
+        known = ~np.isnan(other)
+        diff = np.where(known, np.abs(base - np.where(known, other, 0.0)), np.inf)
+        bonus = np.where(known, np.maximum(0.0, 18 - np.where(known, diff, 0.0) * 1.8), 0.0)
+        return diff, bonus
+
+    def _block(self, i: int) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray", "np.ndarray"]:
+        # Journals sharing i's 大类 or a 小类, with their 小类 overlap and casPriority. Journals with the same
+        # CAS profile share the block; it is trimmed to the rows whose (casPriority, overlap) can still make
+        # the top `limit` once i itself is dropped.
+        key = (int(self.major[i]), tuple(sorted(self.subs[i])))
+        cached = self._block_cache.get(key)
+        if cached is not None:
+            return cached
+        major_code, subs = key
+        for c in subs:
+            self._sub_hits[self.sub_blocks[c]] += 1
+        if major_code >= 0:
+            self._taken[self.major_blocks[major_code]] = True
+        cand = np.flatnonzero(self._taken | (self._sub_hits > 0))
+        sub = self._sub_hits[cand]
+        self._sub_hits[:] = 0
+        self._taken[:] = False
+        major = (self.major[cand] == major_code) & (major_code >= 0)
+        priority = np.where(sub > 0, np.where(major, 3, 2), np.where(major, 1, 0))
+        if len(cand) > self.limit + 1:
+            tier = priority * (len(subs) + 1) + sub
+            keep = tier >= np.partition(tier, len(cand) - self.limit - 1)[len(cand) - self.limit - 1]
+            cand, sub, major, priority = cand[keep], sub[keep], major[keep], priority[keep]
+        cached = (cand, sub, major.astype(np.int64), priority)
+        self._block_cache[key] = cached
+        return cached
+
+    def _cas_block(self, i: int) -> List[int]:
+        if self.major[i] < 0 and not self.subs[i]:
+            return []
+        cand, sub, major, priority = self._block(i)
+        others = cand != i
+        cand, sub, major, priority = cand[others], sub[others], major[others], priority[others]
+        if not len(cand):
+            return []
+        diff, bonus = self._if_terms(i, cand)
+        score = (np.where(sub > 0, 240 + np.minimum(sub, 3) * 36, 0) + 150 * major + self._discrete(i, cand)) + bonus
+        # casPriority already implies majorMatch, so it needs no key of its own.
+        order = np.lexsort((cand, -self.if_rank[cand], diff, -score, -sub, -priority))
+        return cand[order[: self.limit]].tolist()
+
+    def _levels(self, i: int) -> List[Tuple[int, "np.ndarray"]]:
+        # Signature groups merged by the fixed points they earn against i, highest first.
+        key = (int(self.cas[i]), int(self.jcr[i]), int(self.hq[i]), bool(self.top[i]))
+        cached = self._level_cache.get(key)
+        if cached is not None:
+            return cached
+        fixed = np.zeros(len(self.sig_rows), dtype=np.int64)
+        if self.cas[i] >= 0:
+            fixed += 56 * (self.sig_cas == self.cas[i])
+        if self.jcr[i] >= 0:
+            fixed += 34 * (self.sig_jcr == self.jcr[i])
+        if self.hq[i] >= 0:
+            fixed += 10 * (self.sig_hq == self.hq[i])
+        if self.top[i]:
+            fixed += 8 * self.sig_top
+        cached = [
+            (level, np.sort(np.concatenate([self.sig_rows[s] for s in np.flatnonzero(fixed == level)])))
+            for level in np.unique(fixed)[::-1].tolist()
+        ]
+        self._level_cache[key] = cached
+        return cached
+
+    def _rest(self, i: int, need: int, exclude: List[int]) -> List[int]:
+        # Journals outside the CAS block only earn the 分区/JCR/科协/Top points plus the IF term (<= 18), so
+        # the levels are visited from the top and the scan stops once nothing further down can place.
+        levels = self._levels(i)
+        self._taken[exclude] = True
+        self._taken[i] = True
+        pool_cand, pool_diff, pool_score = [], [], []
+        kept = 0
+        for k, (level, cand) in enumerate(levels):
+            cand = cand[~self._taken[cand]]
+            diff, bonus = self._if_terms(i, cand)
+            score = level + bonus
+            keep = score > 0
+            pool_cand.append(cand[keep])
+            pool_diff.append(diff[keep])
+            pool_score.append(score[keep])
+            kept += int(keep.sum())
+            if kept >= need and k + 1 < len(levels):
+                scores = np.concatenate(pool_score)
+                if np.partition(scores, kept - need)[kept - need] > levels[k + 1][0] + 18:
+                    break
+        self._taken[exclude] = False
+        self._taken[i] = False
+        if not kept:
+            return []
+        cand, diff, score = np.concatenate(pool_cand), np.concatenate(pool_diff), np.concatenate(pool_score)
+        if kept > need:
+            keep = score >= np.partition(score, kept - need)[kept - need]
+            cand, diff, score = cand[keep], diff[keep], score[keep]
+        order = np.lexsort((cand, -self.if_rank[cand], diff, -score))
+        return cand[order[:need]].tolist()
+
+    def _rank(self, i: int) -> List[int]:
+        ranked = self._cas_block(i)
+        if len(ranked) < self.limit:
+            ranked += self._rest(i, self.limit - len(ranked), ranked)
+        return ranked
+
+    def related_rows(self, journal_id) -> List[List]:
+        # Positional RELATED_COLUMNS rows; decode_related_row() turns one back into a related_entry() dict.
+        i = self.position_by_id.get(journal_id)
+        if i is None or i >= len(self.table):
+            return []
+        base_major, base_subs = self.profiles[i]
+        base_if = self.if_value[i]
+        out = []
+        for j in self.table[i]:
+            row = self.rows[j]
+            major, subs = self.profiles[j]
+            matched = [name for key, name in base_subs.items() if key in subs]
+            score = 0.0
+            flags = 0
+            if matched:
+                score += 240 + min(len(matched), 3) * 36
+            if base_major and base_major == major:
+                score += 150
+                flags |= 1
+            if self.cas[i] >= 0 and self.cas[i] == self.cas[j]:
+                score += 56
+                flags |= 2
+            if self.jcr[i] >= 0 and self.jcr[i] == self.jcr[j]:
+                score += 34
+                flags |= 4
+            if self.hq[i] >= 0 and self.hq[i] == self.hq[j]:
+                score += 10
+                flags |= 8
+            if self.top[i] and self.top[j]:
+                score += 8
+                flags |= 16
+            if not (math.isnan(base_if) or math.isnan(self.if_value[j])):
+                score += max(0, 18 - abs(float(base_if) - float(self.if_value[j])) * 1.8)
+            sub_label = " / ".join(matched[:2]) if matched else None
+            out.append([row.get(k) for k in RELATED_FIELDS] + [round(score, 2), sub_label, flags])
+        return out
+
+    def related(self, journal_id) -> List[Dict[str, object]]:
+        return [decode_related_row(values) for values in self.related_rows(journal_id)]
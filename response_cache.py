@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Optional, Tuple
+
+DEFAULT_STRIPES = 16
+GZIP_MIN_BYTES = 1024
+
+
+class PreparedJson:
+    # A JSON payload serialized once: UTF-8 body, strong ETag, and a gzip body when it is worth sending.
+    __slots__ = ("payload", "body", "etag", "gzipped", "gzip_etag")
+
+    def __init__(self, payload: Any, gzip_min_bytes: int = GZIP_MIN_BYTES) -> None:
+        self.payload = payload
+        self.body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        digest = hashlib.sha256(self.body).hexdigest()[:32]
+        self.etag = f'"{digest}"'
+        # Strong validators differ per content coding, so the gzip body gets its own tag.
+        self.gzipped = gzip.compress(self.body, compresslevel=6, mtime=0) if len(self.body) >= gzip_min_bytes else None
+        self.gzip_etag = f'"{digest}-gz"'
+
+    def matches(self, if_none_match: str) -> bool:
+        tags = {tag.strip().removeprefix("W/") for tag in str(if_none_match or "").split(",")}
+        return "*" in tags or self.etag in tags or (self.gzipped is not None and self.gzip_etag in tags)
+
+
+class InFlightTimeout(TimeoutError):
+    # Raised to a waiter that gave up on another caller's in-flight run (the run itself goes on).
+    pass
+
+
+class _Call:
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    # Concurrent do() calls with the same key share one run of fn: the first caller runs it, the others
+    # block until it finishes and get its result (or its exception).
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], Any], timeout: Optional[float] = None) -> Tuple[Any, bool]:
+        # (value, shared); a waiter that gives up after timeout seconds gets InFlightTimeout.
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            if not call.done.wait(timeout):
+                raise InFlightTimeout(f"in-flight call for {key!r} did not finish in {timeout}s")
+            if call.error is not None:
+                raise call.error
+            return call.value, True
+        try:
+            call.value = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.value, False
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+
+class _Stripe:
+    __slots__ = ("lock", "items", "hits", "misses", "evictions")
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.items: OrderedDict[Hashable, Any] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+
+class StripedLRUCache:
+    # LRU map split into independently locked stripes by key hash, so threads touching different keys
+    # rarely contend. Each stripe holds max_items / stripes entries and evicts its own least recently used.
+    # Values are stored and returned as-is: callers treat them as immutable and copy what they change.
+    def __init__(self, max_items: int, stripes: int = DEFAULT_STRIPES) -> None:
+        self.stripes: List[_Stripe] = [_Stripe() for _ in range(max(1, stripes))]
+        self.stripe_capacity = max(1, -(-max_items // len(self.stripes)))
+
+    def _stripe(self, key: Hashable) -> _Stripe:
+        return self.stripes[hash(key) % len(self.stripes)]
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        stripe = self._stripe(key)
+        with stripe.lock:
+            try:
+                value = stripe.items[key]
+            except KeyError:
+                stripe.misses += 1
+                return default
+            stripe.items.move_to_end(key)
+            stripe.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        stripe = self._stripe(key)
+        with stripe.lock:
+            stripe.items[key] = value
+            stripe.items.move_to_end(key)
+            while len(stripe.items) > self.stripe_capacity:
+                stripe.items.popitem(last=False)
+                stripe.evictions += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        stripe = self._stripe(key)
+        with stripe.lock:
+            return stripe.items.pop(key, default)
+
+    def clear(self) -> None:
+        for stripe in self.stripes:
+            with stripe.lock:
+                stripe.items.clear()
+
+    def __len__(self) -> int:
+        return sum(len(stripe.items) for stripe in self.stripes)
+
+    def stats(self) -> Dict[str, int]:
+        out = {"items": 0, "capacity": self.stripe_capacity * len(self.stripes), "stripes": len(self.stripes)}
+        for name in ("hits", "misses", "evictions"):
+            out[name] = 0
+        for stripe in self.stripes:
+            with stripe.lock:
+                out["items"] += len(stripe.items)
+                out["hits"] += stripe.hits
+                out["misses"] += stripe.misses
+                out["evictions"] += stripe.evictions
+        return out
+
+
+class SqliteResponseStore:
+    # Durable key -> JSON value table with fetch/expiry times; one connection shared behind a lock, since
+    # reads happen only on memory misses and writes only after an upstream call.
+    def __init__(self, path: Path, table: str) -> None:
+        if not table.isidentifier():
+            raise ValueError(f"invalid table name: {table}")
+        self.path = Path(path)
+        self.table = table
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, fetched_at REAL NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    def get(self, key: str) -> Optional[Tuple[Any, float, float]]:
+        # (value, fetched_at, expires_at), expired rows included; callers decide what stale means.
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, fetched_at, expires_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1], row[2]
+
+    def put(self, key: str, value: Any, expires_at: float, fetched_at: Optional[float] = None) -> None:
+        encoded = json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, fetched_at, expires_at) VALUES (?, ?, ?, ?)",
+                (key, encoded, time.time() if fetched_at is None else fetched_at, expires_at),
+            )
+
+    def delete(self, key: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def prune(self, fetched_before: float) -> int:
+        with self._lock, self._conn:
+            return self._conn.execute(f"DELETE FROM {self.table} WHERE fetched_at < ?", (fetched_before,)).rowcount
+
+    def items(self) -> Iterator[Tuple[str, Any, float, float]]:
+        with self._lock:
+            rows = self._conn.execute(f"SELECT key, value, fetched_at, expires_at FROM {self.table}").fetchall()
+        for key, value, fetched_at, expires_at in rows:
+            yield key, json.loads(value), fetched_at, expires_at
+
+    def count(self) -> int:
+        with self._lock:
+            return int(self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0])
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,35 @@
+// Browser decoder for the columnar search_index.json written by search_index_codec.py.
+// Loaded by index.html and journal.html ahead of app.js / detail.js; keep it in step with decode_search_index.
+
+function decodeSearchColumn(column, count) {
+  if (!column) return new Array(count).fill(null);
+  if (column.enc === "dict") {
+    const dict = Array.isArray(column.dict) ? column.dict : [];
+    return (column.codes || []).map((code) => (code in dict ? dict[code] : null));
+  }
+  if (column.enc === "scaled") {
+    const scale = Number(column.scale) || 1;
+    return (column.values || []).map((v) => (v === null || v === undefined ? null : v / scale));
+  }
+  return Array.isArray(column.values) ? column.values : [];
+}
+
+function decodeSearchIndexPayload(payload) {
+  // search_index.json may be columnar; expand it to row objects.
+  if (!payload || payload.format !== "columnar-v1") return payload;
+  const count = Number(payload.count) || 0;
+  const columns = payload.columns || {};
+  const fields = Array.isArray(payload.meta?.index_fields) ? payload.meta.index_fields : Object.keys(columns);
+  const decoded = fields.map((field) => [field, decodeSearchColumn(columns[field], count)]);
+  const journals = new Array(count);
+  for (let i = 0; i < count; i += 1) {
+    const row = {};
+    for (const [field, values] of decoded) {
+      const value = values[i] === undefined ? null : values[i];
+      // Dictionary entries (tag lists) are shared between rows; each row gets its own copy.
+      row[field] = Array.isArray(value) ? value.slice() : value;
+    }
+    journals[i] = row;
+  }
+  return { meta: payload.meta || {}, journals };
+}
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import json
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+
+COLUMNAR_FORMAT = "columnar-v1"
+IF_SCALE = 1000
+# Free-text identifiers stay raw; IF is stored as scaled integers; everything else in the
+# search projection is low-cardinality and dictionary-encoded (tag lists as whole combinations).
+RAW_COLUMNS = {"id", "title", "issn", "eissn", "cn_number"}
+SCALED_COLUMNS = {"if_2023": IF_SCALE}
+
+
+def _dict_key(value):
+    # Hashable stand-in for the JSON value: typed so that 1, 1.0 and true stay distinct codes.
+    if isinstance(value, list):
+        return (list, tuple(_dict_key(v) for v in value))
+    if isinstance(value, dict):
+        return (dict, json.dumps(value, ensure_ascii=False, separators=(",", ":")))
+    return (type(value), value)
+
+
+def encode_dict_column(values: List) -> Dict[str, object]:
+    # Most frequent values get the smallest codes; ties keep first-seen order.
+    keys = [_dict_key(v) for v in values]
+    counts = Counter(keys)
+    first_seen: Dict[object, object] = {}
+    for k, v in zip(keys, values):
+        first_seen.setdefault(k, v)
+    order = sorted(first_seen, key=lambda k: -counts[k])
+    codes_by_key = {k: i for i, k in enumerate(order)}
+    return {
+        "enc": "dict",
+        "dict": [first_seen[k] for k in order],
+        "codes": [codes_by_key[k] for k in keys],
+    }
+
+
+def encode_scaled_column(values: List, scale: int) -> Optional[Dict[str, object]]:
+    scaled: List[Optional[int]] = []
+    for v in values:
+        if v is None:
+            scaled.append(None)
+            continue
+        if isinstance(v, bool) or not isinstance(v, (int, float)):
+            return None
+        n = round(v * scale)
+        if n / scale != v:
+            return None
+        scaled.append(n)
+    return {"enc": "scaled", "scale": scale, "values": scaled}
+
+
+def encode_column(name: str, values: List) -> Dict[str, object]:
+    if name in SCALED_COLUMNS:
+        column = encode_scaled_column(values, SCALED_COLUMNS[name])
+        if column is not None:
+            return column
+        return {"enc": "raw", "values": values}
+    if name in RAW_COLUMNS:
+        return {"enc": "raw", "values": values}
+    return encode_dict_column(values)
+
+
+def encode_columns(columns: Dict[str, List], meta: Dict[str, object]) -> Dict[str, object]:
+    counts = {len(values) for values in columns.values()}
+    if len(counts) > 1:
+        raise ValueError("search index columns have different lengths")
+    return {
+        "format": COLUMNAR_FORMAT,
+        "count": counts.pop() if counts else 0,
+        "meta": meta,
+        "columns": {name: encode_column(name, values) for name, values in columns.items()},
+    }
+
+
+def encode_search_index(rows: Iterable[Dict], fields: List[str], meta: Dict[str, object]) -> Dict[str, object]:
+    columns: Dict[str, List] = {name: [] for name in fields}
+    for row in rows:
+        for name in fields:
+            columns[name].append(row.get(name))
+    return encode_columns(columns, meta)
+
+
+def decode_column(column: Optional[Dict], count: int) -> List:
+    if not column:
+        return [None] * count
+    enc = column.get("enc")
+    if enc == "dict":
+        dictionary = column.get("dict") or []
+        return [dictionary[code] for code in column.get("codes") or []]
+    if enc == "scaled":
+        scale = column.get("scale") or 1
+        return [None if v is None else v / scale for v in column.get("values") or []]
+    if enc == "raw":
+        return list(column.get("values") or [])
+    raise ValueError(f"unknown column encoding: {enc}")
+
+
+def decode_search_index(payload: Dict) -> Dict[str, object]:
+    # Accepts both layouts and always returns {"meta": ..., "journals": [row, ...]}.
+    if payload.get("format") != COLUMNAR_FORMAT:
+        return {"meta": payload.get("meta") or {}, "journals": list(payload.get("journals") or [])}
+    count = int(payload.get("count") or 0)
+    meta = payload.get("meta") or {}
+    columns = payload.get("columns") or {}
+    fields = list(meta.get("index_fields") or columns.keys())
+    decoded = [(name, decode_column(columns.get(name), count)) for name in fields]
+    journals = []
+    for i in range(count):
+        row = {}
+        for name, values in decoded:
+            value = values[i]
+            row[name] = list(value) if isinstance(value, list) else value
+        journals.append(row)
+    return {"meta": meta, "journals": journals}
+
+
+def load_search_index(path: Path) -> Dict[str, object]:
+    return decode_search_index(json.loads(Path(path).read_text(encoding="utf-8")))
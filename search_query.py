@@ -0,0 +1,426 @@
+from __future__ import annotations
+
+import bisect
+import heapq
+import json
+import math
+import re
+from itertools import accumulate
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+from search_index_codec import load_search_index
+
+
+SUGGEST_FORMAT = "suggest-v1"
+GRAM_SIZE = 3
+PREFIX_FIELDS = ("title", "issn", "eissn", "cn_number")
+# Same list as ABBR_STOPWORDS in app.js.
+ABBR_STOPWORDS = {
+    "a",
+    "an",
+    "and",
+    "as",
+    "at",
+    "by",
+    "for",
+    "from",
+    "in",
+    "of",
+    "on",
+    "or",
+    "the",
+    "to",
+    "with",
+}
+ABBR_QUERY_RE = re.compile(r"^[a-z0-9]{2,10}$")
+ABBR_STRIP_RE = re.compile(r"[^a-z0-9]+")
+ABBR_WORD_SPLIT_RE = re.compile(r"[^A-Za-z0-9]+")
+
+
+# --- Python ports of the app.js helpers; keep them in step with scoreRow/findSuggestions. ---
+
+
+def normalize_abbr_query(query: str) -> str:
+    return ABBR_STRIP_RE.sub("", str(query or "").lower())
+
+
+def is_abbr_query(query: str) -> bool:
+    return bool(ABBR_QUERY_RE.match(query))
+
+
+def build_title_abbr_variants(title: str) -> List[str]:
+    words = [w for w in ABBR_WORD_SPLIT_RE.split(str(title or "")) if w]
+    if not words:
+        return []
+    variants: Dict[str, None] = {}
+    all_initials = "".join(w[0] for w in words).lower()
+    if len(all_initials) >= 2:
+        variants[all_initials] = None
+    core_words = [w for w in words if w.lower() not in ABBR_STOPWORDS]
+    core_initials = "".join(w[0] for w in core_words).lower()
+    if len(core_initials) >= 2:
+        variants[core_initials] = None
+    if len(core_words) >= 2:
+        variants[(core_words[0][0] + core_words[1][0]).lower()] = None
+    return list(variants)
+
+
+def row_haystack(row: Dict) -> str:
+    return " ".join(str(row.get(k) or "") for k in PREFIX_FIELDS).lower()
+
+
+def js_number(value) -> float:
+    # Number(value) semantics for the JSON values that can appear in if_2023.
+    if value is None or value == "":
+        return 0.0
+    if isinstance(value, bool):
+        return 1.0 if value else 0.0
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def quality_score(row: Dict) -> float:
+    # The query-independent tail of scoreRow.
+    score = 0.0
+    if row.get("if_2023") is not None:
+        score += min(80, js_number(row.get("if_2023")) / 8)
+    if row.get("jcr_quartile") == "Q1":
+        score += 40
+    if str(row.get("cas_2025") or "").strip() == "1区":
+        score += 30
+    return score
+
+
+def score_row(row: Dict, query: str, abbr_variants: Optional[List[str]] = None) -> float:
+    q = query.lower()
+    q_abbr = normalize_abbr_query(query)
+    title = str(row.get("title") or "").lower()
+    issn = str(row.get("issn") or "").lower()
+    eissn = str(row.get("eissn") or "").lower()
+    cn = str(row.get("cn_number") or "").lower()
+    if is_abbr_query(q_abbr):
+        variants = abbr_variants if abbr_variants is not None else build_title_abbr_variants(row.get("title"))
+    else:
+        variants = []
+    abbr_exact = any(abbr == q_abbr for abbr in variants)
+    abbr_prefix = any(abbr.startswith(q_abbr) for abbr in variants)
+
+    score = 0.0
+    if title == q:
+        score += 1000
+    if issn == q or eissn == q or cn == q:
+        score += 950
+    if title.startswith(q):
+        score += 450
+    if issn.startswith(q) or eissn.startswith(q) or cn.startswith(q):
+        score += 330
+    if abbr_exact:
+        score += 280
+    elif abbr_prefix:
+        score += 220
+    if len(q) >= 3 and q in title:
+        score += 180
+    if len(q) >= 3 and q in row_haystack(row):
+        score += 70
+    if row.get("if_2023") is not None:
+        score += min(80, js_number(row.get("if_2023")) / 8)
+    if row.get("jcr_quartile") == "Q1":
+        score += 40
+    if str(row.get("cas_2025") or "").strip() == "1区":
+        score += 30
+    return score
+
+
+def passes_min_if(row: Dict, min_if: Optional[float]) -> bool:
+    if min_if is None:
+        return True
+    v = js_number(row.get("if_2023"))
+    return math.isfinite(v) and v >= min_if
+
+
+def find_suggestions(rows: List[Dict], query: str, limit: int = 12, min_if: Optional[float] = None) -> List[Dict]:
+    # Linear reference implementation, line for line with findSuggestions in app.js.
+    q = query.strip()
+    if not q:
+        return []
+    q_lower = q.lower()
+    q_abbr = normalize_abbr_query(q)
+    use_abbr = is_abbr_query(q_abbr)
+    short_abbr = use_abbr and len(q_abbr) <= 4
+    scored = []
+    for row in rows:
+        if short_abbr:
+            fields = [str(row.get(k) or "").lower() for k in PREFIX_FIELDS]
+            hit = any(f.startswith(q_lower) for f in fields) or any(
+                abbr.startswith(q_abbr) for abbr in build_title_abbr_variants(row.get("title"))
+            )
+        elif q_lower in row_haystack(row):
+            hit = True
+        else:
+            hit = use_abbr and any(abbr.startswith(q_abbr) for abbr in build_title_abbr_variants(row.get("title")))
+        if not hit or not passes_min_if(row, min_if):
+            continue
+        score = score_row(row, q)
+        if score > 0:
+            scored.append((score, len(scored), row))
+    scored.sort(key=lambda x: (-x[0], x[1]))
+    return [row for _, _, row in scored[:limit]]
+
+
+# --- Build-time index ---
+
+
+def _delta_encode(values: List[int]) -> List[int]:
+    out = []
+    prev = 0
+    for v in values:
+        out.append(v - prev)
+        prev = v
+    return out
+
+
+def _delta_decode(values: List[int]) -> List[int]:
+    out = []
+    total = 0
+    for v in values:
+        total += v
+        out.append(total)
+    return out
+
+
+def row_grams(haystack: str) -> Set[str]:
+    return {haystack[i : i + GRAM_SIZE] for i in range(len(haystack) - GRAM_SIZE + 1)}
+
+
+class SuggestIndexBuilder:
+    # Fed the search-index rows in order; row numbers in the payload are positions in search_index.json.
+    def __init__(self) -> None:
+        self.count = 0
+        self.prefix_keys: Dict[str, List] = {name: [] for name in PREFIX_FIELDS}
+        self.abbr: Dict[str, List[int]] = {}
+        self.grams: Dict[str, List[int]] = {}
+
+    def add(self, row: Dict) -> None:
+        idx = self.count
+        self.count += 1
+        for name in PREFIX_FIELDS:
+            value = str(row.get(name) or "").lower()
+            if value:
+                self.prefix_keys[name].append((value, idx))
+        for abbr in build_title_abbr_variants(row.get("title")):
+            self.abbr.setdefault(abbr, []).append(idx)
+        for gram in row_grams(row_haystack(row)):
+            self.grams.setdefault(gram, []).append(idx)
+
+    def to_payload(self, meta: Dict[str, object]) -> Dict[str, object]:
+        abbr_keys = sorted(self.abbr)
+        return {
+            "format": SUGGEST_FORMAT,
+            "count": self.count,
+            "meta": {**meta, "gram_size": GRAM_SIZE, "prefix_fields": list(PREFIX_FIELDS)},
+            "prefix": {name: [idx for _, idx in sorted(keys)] for name, keys in self.prefix_keys.items()},
+            "abbr": {
+                "keys": abbr_keys,
+                "postings": [_delta_encode(self.abbr[k]) for k in abbr_keys],
+            },
+            "grams": {gram: _delta_encode(self.grams[gram]) for gram in sorted(self.grams)},
+        }
+
+
+def build_suggest_index(rows: Iterable[Dict], meta: Optional[Dict[str, object]] = None) -> Dict[str, object]:
+    builder = SuggestIndexBuilder()
+    for row in rows:
+        builder.add(row)
+    return builder.to_payload(meta or {})
+
+
+# --- Query side ---
+
+
+class SuggestIndex:
+    def __init__(self, rows: List[Dict], payload: Optional[Dict] = None) -> None:
+        if payload is None:
+            payload = build_suggest_index(rows)
+        if payload.get("format") != SUGGEST_FORMAT or int(payload.get("count") or 0) != len(rows):
+            raise ValueError("suggest index does not match the search index rows")
+        self.rows = rows
+        self.meta = payload.get("meta") or {}
+        # Per-row values scoreRow would recompute on every keystroke.
+        self.fields = {name: [str(row.get(name) or "").lower() for row in rows] for name in PREFIX_FIELDS}
+        self.haystacks = [row_haystack(row) for row in rows]
+        self.if_boost = [
+            None if row.get("if_2023") is None else min(80, js_number(row.get("if_2023")) / 8) for row in rows
+        ]
+        self.is_q1 = [row.get("jcr_quartile") == "Q1" for row in rows]
+        self.is_cas1 = [str(row.get("cas_2025") or "").strip() == "1区" for row in rows]
+        self.if_values = [js_number(row.get("if_2023")) for row in rows]
+        self._tails: Dict[int, List[float]] = {}
+        self.prefix_order = {name: list(payload["prefix"][name]) for name in PREFIX_FIELDS}
+        self.prefix_values = {
+            name: [self.fields[name][i] for i in order] for name, order in self.prefix_order.items()
+        }
+        self.abbr_keys = list(payload["abbr"]["keys"])
+        self.abbr_postings = payload["abbr"]["postings"]
+        self.grams = payload["grams"]
+        qualities = [quality_score(row) for row in rows]
+        self.quality_order = sorted((i for i, q in enumerate(qualities) if q > 0), key=lambda i: (-qualities[i], i))
+
+    @classmethod
+    def load(cls, search_index_path: Path, suggest_index_path: Optional[Path] = None) -> "SuggestIndex":
+        # Falls back to building the suggest index in memory when the published one is missing or stale.
+        search = load_search_index(search_index_path)
+        rows = search["journals"]
+        payload = None
+        if suggest_index_path is not None and Path(suggest_index_path).is_file():
+            payload = json.loads(Path(suggest_index_path).read_text(encoding="utf-8"))
+            stale = payload.get("format") != SUGGEST_FORMAT or int(payload.get("count") or 0) != len(rows)
+            if stale or (payload.get("meta") or {}).get("revision") != search["meta"].get("revision"):
+                payload = None
+        if payload is None:
+            payload = build_suggest_index(rows, search["meta"])
+        return cls(rows, payload)
+
+    def prefix_matches(self, name: str, prefix: str) -> List[int]:
+        values = self.prefix_values[name]
+        lo = bisect.bisect_left(values, prefix)
+        hi = bisect.bisect_left(values, prefix + "\U0010ffff", lo)
+        return self.prefix_order[name][lo:hi]
+
+    def exact_matches(self, name: str, value: str) -> List[int]:
+        values = self.prefix_values[name]
+        lo = bisect.bisect_left(values, value)
+        hi = bisect.bisect_right(values, value, lo)
+        return self.prefix_order[name][lo:hi]
+
+    def abbr_prefix_matches(self, prefix: str) -> Set[int]:
+        out: Set[int] = set()
+        lo = bisect.bisect_left(self.abbr_keys, prefix)
+        for k in range(lo, len(self.abbr_keys)):
+            if not self.abbr_keys[k].startswith(prefix):
+                break
+            out.update(_delta_decode(self.abbr_postings[k]))
+        return out
+
+    def abbr_exact_matches(self, abbr: str) -> List[int]:
+        k = bisect.bisect_left(self.abbr_keys, abbr)
+        if k < len(self.abbr_keys) and self.abbr_keys[k] == abbr:
+            return _delta_decode(self.abbr_postings[k])
+        return []
+
+    def tail_scores(self, text: int) -> List[float]:
+        # text + IF boost + Q1 + 1区 per row, summed in scoreRow's order; one array per text score.
+        tail = self._tails.get(text)
+        if tail is None:
+            tail = []
+            for boost, q1, cas1 in zip(self.if_boost, self.is_q1, self.is_cas1):
+                score = float(text)
+                if boost is not None:
+                    score += boost
+                if q1:
+                    score += 40
+                if cas1:
+                    score += 30
+                tail.append(score)
+            self._tails[text] = tail
+        return tail
+
+    def substring_matches(self, needle: str) -> List[int]:
+        # Verifying the rarest trigram's postings directly is cheaper than intersecting posting lists.
+        rarest = None
+        for gram in row_grams(needle):
+            encoded = self.grams.get(gram)
+            if encoded is None:
+                return []
+            if rarest is None or len(encoded) < len(rarest):
+                rarest = encoded
+        haystacks = self.haystacks
+        return [i for i in accumulate(rarest or []) if needle in haystacks[i]]
+
+    def passes_min_if(self, idx: int, min_if: Optional[float]) -> bool:
+        if min_if is None:
+            return True
+        v = self.if_values[idx]
+        return math.isfinite(v) and v >= min_if
+
+    def suggest_ids(self, query: str, limit: int = 12, min_if: Optional[float] = None) -> List[int]:
+        # Same ranking as find_suggestions(), but only the indexed candidates are scored.
+        q = query.strip()
+        if not q:
+            return []
+        q_lower = q.lower()
+        q_abbr = normalize_abbr_query(q)
+        use_abbr = is_abbr_query(q_abbr)
+        short_abbr = use_abbr and len(q_abbr) <= 4
+
+        candidates: Set[int] = set()
+        abbr_candidates: Set[int] = set()
+        if use_abbr:
+            abbr_candidates = self.abbr_prefix_matches(q_abbr)
+            candidates |= abbr_candidates
+        if short_abbr or len(q_lower) < GRAM_SIZE:
+            for name in PREFIX_FIELDS:
+                candidates.update(self.prefix_matches(name, q_lower))
+        if not short_abbr:
+            if len(q_lower) >= GRAM_SIZE:
+                candidates.update(self.substring_matches(q_lower))
+            else:
+                # Too short for the trigram postings; such rows can only earn prefix points, so the
+                # rest rank purely by quality and the first `limit` in quality order are enough.
+                found = 0
+                for idx in self.quality_order:
+                    if found >= limit:
+                        break
+                    if idx in candidates or q_lower not in self.haystacks[idx]:
+                        continue
+                    if self.passes_min_if(idx, min_if):
+                        candidates.add(idx)
+                        found += 1
+
+        # Every text term is a set lookup or a substring test; the IF/Q1/1区 tail is read from a
+        # cached per-row array, so no candidate goes through the full score().
+        title_prefix = set(self.prefix_matches("title", q_lower))
+        title_exact = set(self.exact_matches("title", q_lower))
+        ident_prefix: Set[int] = set()
+        ident_exact: Set[int] = set()
+        for name in PREFIX_FIELDS[1:]:
+            ident_prefix.update(self.prefix_matches(name, q_lower))
+            ident_exact.update(self.exact_matches(name, q_lower))
+        abbr_exact = set(self.abbr_exact_matches(q_abbr)) if use_abbr else set()
+        long_query = len(q_lower) >= 3
+        titles = self.fields["title"]
+        haystacks = self.haystacks
+        tails = self._tails
+        scored = []
+        for idx in candidates:
+            if min_if is not None and not self.passes_min_if(idx, min_if):
+                continue
+            text = 0
+            if idx in title_exact:
+                text += 1000
+            if idx in ident_exact:
+                text += 950
+            if idx in title_prefix:
+                text += 450
+            if idx in ident_prefix:
+                text += 330
+            if idx in abbr_exact:
+                text += 280
+            elif idx in abbr_candidates:
+                text += 220
+            if long_query and q_lower in titles[idx]:
+                text += 180
+            if long_query and q_lower in haystacks[idx]:
+                text += 70
+            tail = tails.get(text)
+            if tail is None:
+                tail = self.tail_scores(text)
+            score = tail[idx]
+            if score > 0:
+                scored.append((-score, idx))
+        return [idx for _, idx in heapq.nsmallest(limit, scored)]
+
+    def suggest(self, query: str, limit: int = 12, min_if: Optional[float] = None) -> List[Dict]:
+        return [self.rows[idx] for idx in self.suggest_ids(query, limit=limit, min_if=min_if)]
@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import json
+import math
+import re
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from search_index_codec import decode_search_index, encode_search_index
+from search_query import (
+    PREFIX_FIELDS,
+    build_title_abbr_variants,
+    find_suggestions,
+    is_abbr_query,
+    normalize_abbr_query,
+    quality_score,
+    score_row,
+)
+
+
+SHARD_FORMAT = "search-shards-v1"
+SHARD_ROW_BUDGET = 512
+SHARD_MAX_DEPTH = 32
+SHARD_TOP_COUNT = 64
+POPULAR_COUNT = 256
+ORDER_FIELD = "order"
+# What scoreRow can still give a row that is in neither the prefix shard nor the popular shard, on top
+# of its quality tail: the title/haystack substring bonuses and an abbreviation hit the prefix does not pin.
+SUBSTRING_SCORE = 250
+ABBR_SCORE = 280
+# scoreRow adds its terms one by one, so the bound gets a little slack against rounding.
+SCORE_SLACK = 1e-9
+ALNUM_RE = re.compile(r"^[a-z0-9]+$")
+
+
+def row_prefix_strings(row: Dict, abbr_variants: Optional[List[str]] = None) -> List[str]:
+    # Everything findSuggestions matches by prefix: the lowercased id/title fields and the abbreviations.
+    strings = {str(row.get(name) or "").lower() for name in PREFIX_FIELDS}
+    strings.update(build_title_abbr_variants(row.get("title")) if abbr_variants is None else abbr_variants)
+    strings.discard("")
+    return sorted(strings)
+
+
+def shard_file_stem(prefix: str) -> str:
+    return "shard-" + prefix.encode("utf-8").hex()
+
+
+def shard_entry(manifest: Dict, prefix: str) -> Optional[Dict]:
+    # Manifest entries are [hash, count] for complete shards and [hash, count, floor] for split keys.
+    raw = (manifest.get("shards") or {}).get(prefix)
+    if raw is None:
+        return None
+    return {
+        "file": f"{manifest.get('dir') or ''}{shard_file_stem(prefix)}.{raw[0]}.json",
+        "count": raw[1],
+        "split": len(raw) > 2,
+        "floor": raw[2] if len(raw) > 2 else None,
+    }
+
+
+class SearchShardBuilder:
+    # Fed the search-index rows in order. A shard holds every row with a prefix string starting with its
+    # key; keys over the row budget are split one character deeper and keep only the rows that rank highest
+    # for the key itself as a query (with the best excluded score as "floor").
+    def __init__(
+        self,
+        row_budget: int = SHARD_ROW_BUDGET,
+        max_depth: int = SHARD_MAX_DEPTH,
+        top_count: int = SHARD_TOP_COUNT,
+        popular_count: int = POPULAR_COUNT,
+    ) -> None:
+        self.row_budget = row_budget
+        self.max_depth = max_depth
+        self.top_count = top_count
+        self.popular_count = popular_count
+        self.rows: List[Dict] = []
+        self.abbrs: List[List[str]] = []
+        self.strings: List[List[str]] = []
+
+    def add(self, row: Dict) -> None:
+        abbrs = build_title_abbr_variants(row.get("title"))
+        self.rows.append(row)
+        self.abbrs.append(abbrs)
+        self.strings.append(row_prefix_strings(row, abbrs))
+
+    def groups(self, members: Iterable[int], prefix: str) -> Dict[str, List[int]]:
+        depth = len(prefix) + 1
+        out: Dict[str, List[int]] = {}
+        for idx in members:
+            keys = {s[:depth] for s in self.strings[idx] if len(s) >= depth and s.startswith(prefix)}
+            for key in keys:
+                out.setdefault(key, []).append(idx)
+        return out
+
+    def top_rows(self, prefix: str, members: List[int], count: int) -> Tuple[List[int], Optional[float]]:
+        scores = {i: score_row(self.rows[i], prefix, self.abbrs[i]) for i in members}
+        ranked = sorted(members, key=lambda i: (-scores[i], i))
+        floor = scores[ranked[count]] if len(ranked) > count else None
+        return sorted(ranked[:count]), floor
+
+    def popular(self) -> Tuple[List[int], Optional[float]]:
+        ranked = sorted(range(len(self.rows)), key=lambda i: (-quality_score(self.rows[i]), i))
+        floor = quality_score(self.rows[ranked[self.popular_count]]) if len(ranked) > self.popular_count else None
+        return sorted(ranked[: self.popular_count]), floor
+
+    def shards(
+        self, members: Optional[List[int]] = None, prefix: str = ""
+    ) -> Iterator[Tuple[str, List[int], bool, Optional[float]]]:
+        # (key, row numbers, split, floor) for every key, parents before their children.
+        if members is None:
+            members = list(range(len(self.rows)))
+        for key, rows in sorted(self.groups(members, prefix).items()):
+            if len(rows) > self.row_budget and len(key) < self.max_depth:
+                top, floor = self.top_rows(key, rows, self.top_count)
+                yield key, top, True, floor
+                yield from self.shards(rows, key)
+            else:
+                yield key, rows, False, None
+
+    def payload(self, rows: List[int], fields: List[str], meta: Dict[str, object]) -> Dict[str, object]:
+        items = ({**self.rows[i], ORDER_FIELD: i} for i in rows)
+        index_fields = list(fields) + [ORDER_FIELD]
+        return encode_search_index(items, index_fields, {**meta, "index_fields": index_fields})
+
+
+# --- Query side (mirrors findShardSuggestions in app.js) ---
+
+
+def resolve_shard(manifest: Dict, query: str) -> Tuple[str, Optional[Dict]]:
+    # Walks split keys one character at a time; a split key is only used as-is when it equals the query.
+    q = query.strip().lower()
+    prefix = ""
+    for ch in q:
+        prefix += ch
+        entry = shard_entry(manifest, prefix)
+        if entry is None or not entry.get("split") or len(prefix) == len(q):
+            return prefix, entry
+    return prefix, None
+
+
+def outside_bound(manifest: Dict, query: str, prefix: str, entry: Optional[Dict]) -> float:
+    # Upper bound on the score of any row missing from the prefix and popular shards (-inf: none can match).
+    q = query.strip()
+    q_abbr = normalize_abbr_query(q)
+    use_abbr = is_abbr_query(q_abbr)
+    short_abbr = use_abbr and len(q_abbr) <= 4
+    abbr_outside = use_abbr and not ALNUM_RE.match(prefix)
+    bound = -math.inf
+    popular_floor = (manifest.get("popular") or {}).get("floor")
+    if (not short_abbr or abbr_outside) and popular_floor is not None:
+        bound = (SUBSTRING_SCORE if len(q) >= 3 else 0) + (ABBR_SCORE if abbr_outside else 0) + popular_floor
+        bound += SCORE_SLACK
+    if entry and entry.get("split") and entry.get("floor") is not None:
+        bound = max(bound, entry["floor"])
+    return bound
+
+
+def suggest_from_shards(
+    manifest: Dict,
+    shard_rows: List[Dict],
+    popular_rows: List[Dict],
+    query: str,
+    limit: int = 12,
+    min_if: Optional[float] = None,
+) -> Tuple[List[Dict], bool]:
+    # Returns (rows, exact); exact means the result equals find_suggestions over the whole index.
+    merged = {row[ORDER_FIELD]: row for row in popular_rows + shard_rows}
+    candidates = [merged[k] for k in sorted(merged)]
+    results = find_suggestions(candidates, query, limit=limit, min_if=min_if)
+    prefix, entry = resolve_shard(manifest, query)
+    bound = outside_bound(manifest, query, prefix, entry)
+    exact = bound == -math.inf or (len(results) >= limit and score_row(results[-1], query.strip()) > bound)
+    return results, exact
+
+
+class SearchShards:
+    # Reads only the manifest, the popular shard and the shard a query resolves to.
+    def __init__(self, manifest_path: Path) -> None:
+        self.manifest_path = Path(manifest_path)
+        self.manifest = json.loads(self.manifest_path.read_text(encoding="utf-8"))
+        self._rows: Dict[str, List[Dict]] = {}
+
+    def load_rows(self, rel: Optional[str]) -> List[Dict]:
+        if not rel:
+            return []
+        if rel not in self._rows:
+            path = self.manifest_path.parent / rel
+            self._rows[rel] = decode_search_index(json.loads(path.read_text(encoding="utf-8")))["journals"]
+        return self._rows[rel]
+
+    def suggest(self, query: str, limit: int = 12, min_if: Optional[float] = None) -> Tuple[List[Dict], bool]:
+        if not query.strip():
+            return [], True
+        _, entry = resolve_shard(self.manifest, query)
+        shard_rows = self.load_rows(entry.get("file")) if entry else []
+        popular_rows = self.load_rows((self.manifest.get("popular") or {}).get("file"))
+        return suggest_from_shards(self.manifest, shard_rows, popular_rows, query, limit=limit, min_if=min_if)
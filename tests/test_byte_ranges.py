@@ -0,0 +1,91 @@
+import http.client
+import sys
+import tempfile
+import threading
+import unittest
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import dev_server  # noqa: E402
+
+UNSATISFIABLE = "416"
+
+PARSE_CASES = [
+    # (Range header, file size, (first, last) | None for "serve the whole file" | UNSATISFIABLE)
+    ("bytes=0-3", 10, (0, 3)),
+    ("bytes=2-2", 10, (2, 2)),
+    ("bytes=5-100", 10, (5, 9)),
+    (" bytes=1-2 ", 10, (1, 2)),
+    ("bytes=7-", 10, (7, 9)),
+    ("bytes=0-", 10, (0, 9)),
+    ("bytes=-3", 10, (7, 9)),
+    ("bytes=-20", 10, (0, 9)),
+    ("bytes=-0", 10, UNSATISFIABLE),
+    ("bytes=10-", 10, UNSATISFIABLE),
+    ("bytes=12-15", 10, UNSATISFIABLE),
+    ("bytes=0-1,4-5", 10, None),
+    ("bytes=0-1, 4-", 10, None),
+    ("bytes=5-2", 10, None),
+    ("bytes=-", 10, None),
+    ("items=0-1", 10, None),
+    ("bytes=0-", 0, UNSATISFIABLE),
+    ("bytes=0-0", 0, UNSATISFIABLE),
+    ("bytes=-5", 0, UNSATISFIABLE),
+]
+
+
+class ParseByteRangeTest(unittest.TestCase):
+    def test_cases(self) -> None:
+        for header, size, expected in PARSE_CASES:
+            with self.subTest(header=header, size=size):
+                if expected == UNSATISFIABLE:
+                    with self.assertRaises(ValueError):
+                        dev_server.parse_byte_range(header, size)
+                else:
+                    self.assertEqual(dev_server.parse_byte_range(header, size), expected)
+
+
+class SendRangeTest(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        root = Path(tmp.name)
+        (root / "digits.json").write_bytes(b"0123456789")
+        (root / "empty.json").write_bytes(b"")
+        patcher = mock.patch.object(dev_server, "BASE_DIR", root)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), dev_server.DevHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+    def get(self, path, headers):
+        conn = http.client.HTTPConnection("127.0.0.1", self.server.server_port)
+        self.addCleanup(conn.close)
+        conn.request("GET", path, headers=headers)
+        response = conn.getresponse()
+        return response.status, response.getheader("Content-Range"), response.read()
+
+    def test_cases(self) -> None:
+        cases = [
+            # (path, extra headers, status, Content-Range, body)
+            ("/digits.json", {"Range": "bytes=2-4"}, 206, "bytes 2-4/10", b"234"),
+            ("/digits.json", {"Range": "bytes=-3"}, 206, "bytes 7-9/10", b"789"),
+            ("/digits.json", {"Range": "bytes=7-"}, 206, "bytes 7-9/10", b"789"),
+            ("/digits.json", {"Range": "bytes=0-1,4-5"}, 200, None, b"0123456789"),
+            ("/digits.json", {"Range": "bytes=12-"}, 416, "bytes */10", b""),
+            ("/digits.json", {"Range": "bytes=0-1", "If-Range": "Thu, 01 Jan 1970 00:00:00 GMT"}, 200, None, b"0123456789"),
+            ("/empty.json", {"Range": "bytes=0-"}, 416, "bytes */0", b""),
+            ("/empty.json", {"Range": "bytes=-1"}, 416, "bytes */0", b""),
+        ]
+        for path, headers, status, content_range, body in cases:
+            with self.subTest(path=path, headers=headers):
+                self.assertEqual(self.get(path, headers), (status, content_range, body))
+
+
+if __name__ == "__main__":
+    unittest.main()
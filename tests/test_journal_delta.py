@@ -0,0 +1,88 @@
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import build_data  # noqa: E402
+
+
+def journal(jid, title, if_value=None):
+    return {"id": jid, "title": title, "issn": "", "if_2023": if_value, "tags": []}
+
+
+class JournalDeltaTrackerTest(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = Path(tmp.name)
+        for name in ("FINGERPRINT_FILE", "DELTA_FILE", "DELTA_PATCH_FILE"):
+            patcher = mock.patch.object(build_data, name, self.tmp / getattr(build_data, name).name)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def build(self, rows, revision, patch=False):
+        delta = build_data.JournalDeltaTracker(patch=patch)
+        for row in rows:
+            delta.add(row, build_data.encode_json_bytes(row), row["id"] % 4)
+        return delta.close({"generated_at": "2026-01-01T00:00:00", "revision": revision, "chunk_strategy": "id_mod"})
+
+    def read(self, path):
+        return json.loads(path.read_text(encoding="utf-8"))
+
+    def test_first_build_lists_everything_as_added(self) -> None:
+        meta = self.build([journal(1, "Alpha"), journal(2, "Beta")], "r1")
+        self.assertEqual((meta["added"], meta["changed"], meta["removed"]), (2, 0, 0))
+        self.assertIsNone(meta["base_revision"])
+        self.assertEqual(self.read(build_data.DELTA_FILE)["added"], [{"id": 1, "bucket": 1}, {"id": 2, "bucket": 2}])
+
+    def test_counts_added_changed_and_removed(self) -> None:
+        self.build([journal(1, "Alpha", 1.5), journal(2, "Beta"), journal(3, "Gamma")], "r1")
+        meta = self.build([journal(1, "Alpha", 2.0), journal(2, "Beta"), journal(5, "Epsilon")], "r2")
+        self.assertEqual((meta["added"], meta["changed"], meta["removed"]), (1, 1, 1))
+        self.assertEqual((meta["revision"], meta["base_revision"]), ("r2", "r1"))
+        delta = self.read(build_data.DELTA_FILE)
+        self.assertEqual(delta["added"], [{"id": 5, "bucket": 1}])
+        self.assertEqual(delta["changed"], [{"id": 1, "bucket": 1}])
+        self.assertEqual(delta["removed"], [{"id": 3, "bucket": 3}])
+
+    def test_unchanged_build_is_empty(self) -> None:
+        rows = [journal(1, "Alpha", 1.5), journal(2, "Beta")]
+        self.build(rows, "r1")
+        meta = self.build(rows, "r2")
+        self.assertEqual((meta["added"], meta["changed"], meta["removed"]), (0, 0, 0))
+
+    def test_published_chunk_records_are_fingerprinted(self) -> None:
+        # A new related list changes the chunk record but not the journals.json record.
+        row = journal(1, "Alpha", 1.5)
+        encoded = build_data.encode_json_bytes(row)
+        for revision, related in (("r1", [[2]]), ("r2", [[3]])):
+            delta = build_data.JournalDeltaTracker()
+            delta.add(row, encoded, 1, (build_data.append_json_field(encoded, "related", related), None))
+            meta = delta.close({"revision": revision})
+        self.assertEqual((meta["added"], meta["changed"], meta["removed"]), (0, 1, 0))
+
+    def test_patch_reproduces_the_new_build(self) -> None:
+        old = [journal(1, "Alpha", 1.5), journal(2, "Beta"), journal(3, "Gamma")]
+        new = [journal(1, "Alpha", 2.0), journal(2, "Beta"), journal(5, "Epsilon")]
+        self.build(old, "r1")
+        self.build(new, "r2", patch=True)
+        patch = self.read(build_data.DELTA_PATCH_FILE)
+        merged = {row["id"]: row for row in old}
+        for jid in patch["removed"]:
+            merged.pop(jid)
+        merged.update({row["id"]: row for row in patch["journals"]})
+        self.assertEqual(sorted(merged.values(), key=lambda row: row["id"]), sorted(new, key=lambda row: row["id"]))
+
+    def test_stale_patch_removed_without_the_flag(self) -> None:
+        self.build([journal(1, "Alpha")], "r1", patch=True)
+        self.assertTrue(build_data.DELTA_PATCH_FILE.is_file())
+        self.build([journal(1, "Alpha")], "r2")
+        self.assertFalse(build_data.DELTA_PATCH_FILE.is_file())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import build_data  # noqa: E402
+
+
+def make_store(journals):
+    # journals: (title, issn, eissn, cn_number) in load order.
+    store = build_data.JournalStore()
+    for title, issn, eissn, cn_number in journals:
+        j = store.get_or_create(title=title, issn=issn, eissn=eissn, cn_number=cn_number)
+        j.issn = j.issn or issn
+        j.eissn = j.eissn or eissn
+        j.cn_number = j.cn_number or cn_number
+        store.touch_index(j)
+    return store
+
+
+class JournalIdRegistryTest(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = Path(tmp.name)
+        self.registry_file = self.tmp / "journal_id_registry.json"
+        # Keep seed_from_published away from the repo's own data/ directory.
+        for name, value in (("OUT_FILE", self.tmp / "journals.json"), ("CHUNK_DIR", self.tmp / "journal_chunks")):
+            patcher = mock.patch.object(build_data, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def build(self, journals):
+        # One build: load the registry, assign, save. Returns {title: public id}.
+        store = make_store(journals)
+        registry = build_data.JournalIdRegistry(self.registry_file)
+        mapping = registry.assign(store)
+        registry.save()
+        return {j.title: mapping[j.id] for j in store.items.values()}, registry
+
+    def test_reordered_sources_keep_ids(self) -> None:
+        journals = [
+            ("Alpha", "1111-1111", "", ""),
+            ("Beta", "2222-2222", "3333-3333", ""),
+            ("Gamma", "", "", "11-1111/A"),
+            ("Delta", "", "", ""),
+        ]
+        first, _ = self.build(journals)
+        second, _ = self.build(list(reversed(journals)))
+        self.assertEqual(first, second)
+
+    def test_ids_are_never_reused(self) -> None:
+        first, _ = self.build([("Alpha", "1111-1111", "", ""), ("Beta", "2222-2222", "", "")])
+        second, _ = self.build([("Alpha", "1111-1111", "", ""), ("Epsilon", "4444-4444", "", "")])
+        self.assertEqual(second["Alpha"], first["Alpha"])
+        self.assertNotIn(second["Epsilon"], first.values())
+        third, _ = self.build([("Beta", "2222-2222", "", "")])
+        self.assertEqual(third["Beta"], first["Beta"])
+
+    def test_keys_stay_with_their_first_id_across_a_merge(self) -> None:
+        split = [("Beta", "2222-2222", "", ""), ("Gamma", "", "", "11-1111/A")]
+        first, registry = self.build(split)
+        keys = dict(registry.keys)
+        # For one build the CN journal is only known through Beta's record.
+        self.build([("Beta", "2222-2222", "", "11-1111/A")])
+        _, registry = self.build(split)
+        self.assertEqual(registry.keys["cn:11-1111/A"], keys["cn:11-1111/A"])
+        self.assertEqual(registry.keys["issn:2222-2222"], keys["issn:2222-2222"])
+        again, _ = self.build(split)
+        self.assertEqual(again, first)
+
+    def test_oldest_id_wins_when_identifiers_disagree(self) -> None:
+        first, _ = self.build([("Alpha", "1111-1111", "", ""), ("Beta", "2222-2222", "", "")])
+        merged, _ = self.build([("Alpha", "1111-1111", "2222-2222", "")])
+        self.assertEqual(merged["Alpha"], min(first.values()))
+
+    def test_title_claim_refused_for_another_journals_id(self) -> None:
+        first, _ = self.build([("Gamma", "", "", "11-1111/A")])
+        # Same title, but an ISSN journal: the id already belongs to the CN journal.
+        second, _ = self.build([("Gamma", "5555-5555", "", "")])
+        self.assertNotEqual(second["Gamma"], first["Gamma"])
+
+    def test_title_claim_refused_for_cn_journals(self) -> None:
+        first, _ = self.build([("Delta", "", "", "")])
+        second, _ = self.build([("Delta", "", "", "22-2222/B")])
+        self.assertNotEqual(second["Delta"], first["Delta"])
+
+    def test_title_claim_allowed_when_a_journal_gains_an_issn(self) -> None:
+        first, _ = self.build([("Delta", "", "", "")])
+        second, _ = self.build([("Delta", "6666-6666", "", "")])
+        self.assertEqual(second["Delta"], first["Delta"])
+
+    def test_seeds_from_published_journals(self) -> None:
+        build_data.OUT_FILE.write_text(
+            '{"journals":[{"id":7,"title":"Alpha","issn":"1111-1111","eissn":"","cn_number":""}]}',
+            encoding="utf-8",
+        )
+        ids, registry = self.build([("Alpha", "1111-1111", "", ""), ("Beta", "2222-2222", "", "")])
+        self.assertTrue(registry.seeded)
+        self.assertEqual(ids, {"Alpha": 7, "Beta": 8})
+
+
+if __name__ == "__main__":
+    unittest.main()
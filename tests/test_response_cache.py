@@ -0,0 +1,152 @@
+import gzip
+import json
+import sys
+import threading
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from response_cache import InFlightTimeout, PreparedJson, SingleFlight, StripedLRUCache  # noqa: E402
+
+
+class StripedLRUCacheTest(unittest.TestCase):
+    def test_capacity_rounds_up_per_stripe(self) -> None:
+        cache = StripedLRUCache(10, stripes=4)
+        self.assertEqual(cache.stripe_capacity, 3)
+        self.assertEqual(cache.stats()["capacity"], 12)
+        tiny = StripedLRUCache(0, stripes=0)
+        self.assertEqual((len(tiny.stripes), tiny.stripe_capacity), (1, 1))
+
+    def test_each_stripe_evicts_its_own_least_recently_used(self) -> None:
+        # Small ints hash to themselves: 0, 4, 8, 12 share stripe 0, 1 lives in stripe 1.
+        cache = StripedLRUCache(8, stripes=4)
+        cache.set(1, "one")
+        for key in (0, 4):
+            cache.set(key, key)
+        cache.get(0)
+        cache.set(8, 8)
+        self.assertIsNone(cache.get(4))
+        self.assertEqual((cache.get(0), cache.get(8), cache.get(1)), (0, 8, "one"))
+        stats = cache.stats()
+        self.assertEqual((stats["items"], stats["evictions"]), (3, 1))
+        self.assertEqual((stats["hits"], stats["misses"]), (4, 1))
+
+    def test_set_refreshes_recency(self) -> None:
+        cache = StripedLRUCache(2, stripes=1)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.set("a", 3)
+        cache.set("c", 4)
+        self.assertEqual((cache.get("a"), cache.get("b"), cache.get("c")), (3, None, 4))
+
+
+class SingleFlightTest(unittest.TestCase):
+    def start_leader(self, flight, key, fn):
+        # Runs do(key, fn) in a thread and returns once fn has started, so later callers are waiters.
+        started, release, result = threading.Event(), threading.Event(), {}
+
+        def leader_fn():
+            started.set()
+            release.wait(5)
+            return fn()
+
+        def run():
+            try:
+                result["value"] = flight.do(key, leader_fn)
+            except BaseException as e:
+                result["error"] = e
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        self.assertTrue(started.wait(5))
+        return thread, release, result
+
+    def test_waiters_share_the_leaders_result(self) -> None:
+        flight = SingleFlight()
+        thread, release, leader = self.start_leader(flight, "k", lambda: "value")
+        waiter_runs = []
+        threading.Timer(0.05, release.set).start()
+        value = flight.do("k", lambda: waiter_runs.append(1))
+        thread.join()
+        self.assertEqual(value, ("value", True))
+        self.assertEqual(leader["value"], ("value", False))
+        self.assertEqual(waiter_runs, [])
+        self.assertEqual(flight.in_flight(), 0)
+
+    def test_leader_exception_reaches_waiters(self) -> None:
+        flight = SingleFlight()
+        error = ValueError("upstream failed")
+
+        def fail():
+            raise error
+
+        thread, release, leader = self.start_leader(flight, "k", fail)
+        threading.Timer(0.05, release.set).start()
+        with self.assertRaises(ValueError) as caught:
+            flight.do("k", lambda: "not run")
+        thread.join()
+        self.assertIs(caught.exception, error)
+        self.assertIs(leader["error"], error)
+        # The failed call is forgotten; the next caller runs fn again.
+        self.assertEqual(flight.do("k", lambda: "retry"), ("retry", False))
+
+    def test_waiter_timeout_leaves_the_leader_running(self) -> None:
+        flight = SingleFlight()
+        thread, release, leader = self.start_leader(flight, "k", lambda: "late")
+        with self.assertRaises(InFlightTimeout):
+            flight.do("k", lambda: "not run", timeout=0.01)
+        self.assertEqual(flight.in_flight(), 1)
+        release.set()
+        thread.join()
+        self.assertEqual(leader["value"], ("late", False))
+        self.assertEqual(flight.in_flight(), 0)
+
+    def test_different_keys_do_not_wait(self) -> None:
+        flight = SingleFlight()
+        thread, release, _ = self.start_leader(flight, "a", lambda: "a")
+        self.assertEqual(flight.do("b", lambda: "b", timeout=0.01), ("b", False))
+        release.set()
+        thread.join()
+
+
+class PreparedJsonTest(unittest.TestCase):
+    def test_body_and_etag_follow_the_payload(self) -> None:
+        payload = {"title": "期刊", "if": 1.5}
+        prepared = PreparedJson(payload)
+        self.assertEqual(prepared.body, json.dumps(payload, ensure_ascii=False).encode("utf-8"))
+        self.assertEqual(prepared.etag, PreparedJson(dict(payload)).etag)
+        self.assertNotEqual(prepared.etag, PreparedJson({"title": "期刊", "if": 2.0}).etag)
+
+    def test_gzip_body_only_above_the_threshold(self) -> None:
+        small = PreparedJson({"x": 1})
+        self.assertIsNone(small.gzipped)
+        large = PreparedJson({"x": "y" * 2048})
+        self.assertEqual(gzip.decompress(large.gzipped), large.body)
+        self.assertNotEqual(large.gzip_etag, large.etag)
+
+    def test_matches(self) -> None:
+        small = PreparedJson({"x": 1})
+        large = PreparedJson({"x": "y" * 2048})
+        cases = [
+            (small, small.etag, True),
+            (small, f"W/{small.etag}", True),
+            (small, "*", True),
+            (small, f'"other", {small.etag}', True),
+            (small, f'W/"other",W/{small.etag}', True),
+            (small, '"other"', False),
+            (small, "", False),
+            (small, None, False),
+            # No gzip body was prepared, so its tag cannot have been handed out.
+            (small, small.gzip_etag, False),
+            (large, large.gzip_etag, True),
+            (large, f'"other", W/{large.gzip_etag}', True),
+            (large, large.etag, True),
+        ]
+        for prepared, header, expected in cases:
+            with self.subTest(header=header):
+                self.assertIs(prepared.matches(header), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()